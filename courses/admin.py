@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import User, Course, Material, Enrollment, Exam, Question, Answer, Grade, Forum, Post
+from .models import User, Course, Material, Enrollment, Exam, Question, Answer, ExamAttempt, AttemptAnswer, Grade, Forum, Post, MediaBlob
 
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
@@ -9,7 +9,9 @@ class UserAdmin(admin.ModelAdmin):
 
 @admin.register(Course)
 class CourseAdmin(admin.ModelAdmin):
-    list_display = ('title', 'instructor', 'start_date', 'end_date')
+    list_display = ('title', 'instructor', 'start_date', 'end_date', 'enrollment_count', 'exam_count')
+    list_select_related = ('instructor',)
+    readonly_fields = ('enrollment_count', 'exam_count')
     search_fields = ('title', 'description')
     list_filter = ('start_date', 'end_date', 'instructor')
 
@@ -43,6 +45,17 @@ class AnswerAdmin(admin.ModelAdmin):
     list_filter = ('question', 'is_correct')
     search_fields = ('text', 'question__text')
 
+@admin.register(ExamAttempt)
+class ExamAttemptAdmin(admin.ModelAdmin):
+    list_display = ('student', 'exam', 'started_at', 'finished_at')
+    list_filter = ('exam',)
+    search_fields = ('student__username', 'exam__title')
+
+@admin.register(AttemptAnswer)
+class AttemptAnswerAdmin(admin.ModelAdmin):
+    list_display = ('attempt', 'question', 'answer', 'answered_at')
+    search_fields = ('attempt__student__username', 'question__text')
+
 @admin.register(Grade)
 class GradeAdmin(admin.ModelAdmin):
     list_display = ('student', 'exam', 'marks_obtained')
@@ -51,7 +64,9 @@ class GradeAdmin(admin.ModelAdmin):
 
 @admin.register(Forum)
 class ForumAdmin(admin.ModelAdmin):
-    list_display = ('title', 'course', 'created_at', 'created_by')
+    list_display = ('title', 'course', 'created_at', 'created_by', 'post_count', 'last_post_at')
+    list_select_related = ('course', 'created_by')
+    readonly_fields = ('post_count', 'last_post_at')
     list_filter = ('course', 'created_at')
     search_fields = ('title', 'course__title', 'created_by__username')
 
@@ -60,3 +75,9 @@ class PostAdmin(admin.ModelAdmin):
     list_display = ('forum', 'content', 'created_at', 'created_by')
     list_filter = ('forum', 'created_at')
     search_fields = ('content', 'forum__title', 'created_by__username')
+
+@admin.register(MediaBlob)
+class MediaBlobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'size', 'ref_count', 'created_at')
+    readonly_fields = ('name', 'digest', 'size', 'ref_count', 'created_at')
+    search_fields = ('name', 'digest')
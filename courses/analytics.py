@@ -0,0 +1,147 @@
+"""
+analytics.py
+
+Analítica materializada para los dashboards de administrador e instructor. El comando
+refresh_analytics (pensado para ejecutarse periódicamente, p. ej. desde cron) agrega las
+inscripciones por día, la distribución de notas por examen y los estudiantes activos por curso
+en tablas de resumen; los dashboards solo leen esas filas, así que su coste no depende del
+número de filas de Grade o Enrollment.
+"""
+
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count, F, Sum
+from django.db.models.functions import Greatest, Least
+from django.utils import timezone
+
+from .models import (
+    Course, CourseActivityStat, DailyEnrollmentStat, Enrollment, ExamAttempt, ExamGradeStat, Grade, Post,
+)
+
+ANALYTICS_ACTIVE_DAYS = getattr(settings, 'ANALYTICS_ACTIVE_DAYS', 30)
+ANALYTICS_DASHBOARD_DAYS = getattr(settings, 'ANALYTICS_DASHBOARD_DAYS', 30)
+DASHBOARD_LIMIT = 10
+GRADE_BUCKETS = 10
+BATCH_SIZE = 1000
+
+
+def refresh_enrollments():
+    """
+    Recalcula las inscripciones por día de cada curso y del total. Devuelve las filas creadas.
+    """
+    per_course = Enrollment.objects.order_by().values('course_id', 'enrollment_date').annotate(total=Count('id'))
+    per_day = Enrollment.objects.order_by().values('enrollment_date').annotate(total=Count('id'))
+    rows = [
+        DailyEnrollmentStat(course_id=row['course_id'], date=row['enrollment_date'], enrollments=row['total'])
+        for row in per_course.iterator()
+    ]
+    rows += [
+        DailyEnrollmentStat(course=None, date=row['enrollment_date'], enrollments=row['total'])
+        for row in per_day.iterator()
+    ]
+    with transaction.atomic():
+        DailyEnrollmentStat.objects.all().delete()
+        DailyEnrollmentStat.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+    return len(rows)
+
+
+def refresh_grades(now=None):
+    """
+    Recalcula el resumen de notas de cada examen calificado. Devuelve las filas creadas.
+    """
+    now = now or timezone.now()
+    grades = Grade.objects.filter(exam__total_marks__gt=0).order_by()
+    bucket = Greatest(Least(F('marks_obtained') * GRADE_BUCKETS / F('exam__total_marks'), GRADE_BUCKETS - 1), 0)
+    distributions = {}
+    for row in grades.annotate(bucket=bucket).values('exam_id', 'bucket').annotate(total=Count('id')).iterator():
+        distributions.setdefault(row['exam_id'], [0] * GRADE_BUCKETS)[row['bucket']] = row['total']
+    rows = [
+        ExamGradeStat(
+            exam_id=row['exam_id'], graded=row['graded'], average=row['average'] or 0,
+            distribution=distributions.get(row['exam_id'], [0] * GRADE_BUCKETS), refreshed_at=now,
+        )
+        for row in grades.values('exam_id').annotate(graded=Count('id'), average=Avg('marks_obtained')).iterator()
+    ]
+    with transaction.atomic():
+        ExamGradeStat.objects.all().delete()
+        ExamGradeStat.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+    return len(rows)
+
+
+def refresh_activity(now=None):
+    """
+    Recalcula los estudiantes activos de cada curso: los que empezaron un examen o publicaron
+    en un foro del curso en los últimos ANALYTICS_ACTIVE_DAYS días. Devuelve las filas creadas.
+    """
+    now = now or timezone.now()
+    since = now - timedelta(days=ANALYTICS_ACTIVE_DAYS)
+    attempts = ExamAttempt.objects.filter(started_at__gte=since).values_list('exam__course_id', 'student_id')
+    posts = Post.objects.filter(created_at__gte=since).values_list('forum__course_id', 'created_by_id')
+    active = Counter(course_id for course_id, _ in attempts.union(posts).iterator())
+    rows = [
+        CourseActivityStat(course_id=course_id, active_students=active[course_id], refreshed_at=now)
+        for course_id in Course.objects.values_list('id', flat=True).iterator()
+    ]
+    with transaction.atomic():
+        CourseActivityStat.objects.all().delete()
+        CourseActivityStat.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+    return len(rows)
+
+
+def refresh_all(now=None):
+    """
+    Recalcula todas las tablas de resumen. Devuelve {tabla: filas creadas}.
+    """
+    return {
+        'enrollments': refresh_enrollments(),
+        'grades': refresh_grades(now),
+        'activity': refresh_activity(now),
+    }
+
+
+def enrollment_series(courses=None, days=ANALYTICS_DASHBOARD_DAYS, today=None):
+    """
+    Devuelve (fechas, inscripciones) de los últimos 'days' días, con ceros en los días sin datos.
+    Sin 'courses' usa las filas del total; con un queryset de cursos suma sus filas por día.
+    """
+    today = today or timezone.localdate()
+    start = today - timedelta(days=days - 1)
+    stats = DailyEnrollmentStat.objects.filter(date__gte=start, date__lte=today)
+    if courses is None:
+        totals = dict(stats.filter(course__isnull=True).values_list('date', 'enrollments'))
+    else:
+        totals = dict(
+            stats.filter(course__in=courses).order_by().values('date')
+            .annotate(total=Sum('enrollments')).values_list('date', 'total')
+        )
+    dates = [start + timedelta(days=n) for n in range(days)]
+    return [date.isoformat() for date in dates], [totals.get(date, 0) for date in dates]
+
+
+def dashboard(courses=None):
+    """
+    Contexto de los dashboards a partir de las tablas de resumen. 'courses' limita los datos
+    a un queryset de cursos (dashboard del instructor); sin él se muestran todos.
+    """
+    exams = ExamGradeStat.objects.select_related('exam').order_by('-graded', '-exam_id')
+    activity = CourseActivityStat.objects.select_related('course').order_by('-active_students', '-course_id')
+    if courses is not None:
+        exams = exams.filter(exam__course__in=courses)
+        activity = activity.filter(course__in=courses)
+    labels, enrollments = enrollment_series(courses)
+    exams = list(exams[:DASHBOARD_LIMIT])
+    activity = list(activity[:DASHBOARD_LIMIT])
+    refreshed = [stat.refreshed_at for stat in exams + activity]
+    return {
+        'enrollment_chart': {'labels': labels, 'data': enrollments},
+        'enrollments_total': sum(enrollments),
+        'exam_stats': exams,
+        'grade_chart': [
+            {'label': stat.exam.title, 'data': stat.distribution} for stat in exams
+        ],
+        'course_activity': activity,
+        'refreshed_at': max(refreshed) if refreshed else None,
+    }
@@ -1,6 +1,7 @@
 # api_urls.py
+from django.urls import path
 from rest_framework.routers import DefaultRouter
-from .views import CourseViewSet, MaterialViewSet, ExamViewSet, QuestionViewSet, AnswerViewSet
+from .views import CourseViewSet, MaterialViewSet, ExamViewSet, QuestionViewSet, AnswerViewSet, BulkEnrollmentAPIView, SearchAPIView
 
 router = DefaultRouter()
 router.register(r'courses', CourseViewSet)
@@ -9,4 +10,7 @@ router.register(r'exams', ExamViewSet)
 router.register(r'questions', QuestionViewSet)
 router.register(r'answers', AnswerViewSet)
 
-urlpatterns = router.urls
+urlpatterns = [
+    path('enrollments/bulk/', BulkEnrollmentAPIView.as_view(), name='api_bulk_enroll'),
+    path('search/', SearchAPIView.as_view(), name='api_search'),
+] + router.urls
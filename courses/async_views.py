@@ -0,0 +1,124 @@
+"""
+async_views.py
+
+Versiones asíncronas de las vistas de lectura más visitadas: inicio, catálogo, detalle de
+curso, lista de foros e hilo. Con ASGI (online_courses/asgi.py activa ASYNC_VIEWS) urls.py las
+usa en lugar de las de views.py, de modo que la petición no ocupa un hilo mientras espera a
+la base de datos: el usuario se resuelve con auser() y las consultas de la vista con el ORM
+asíncrono (aget, aexists, async for). La plantilla se sigue renderizando en un hilo
+(QueryBudgetMixin.adispatch), porque sus procesadores de contexto consultan la base de datos.
+
+Cada vista hereda de su versión síncrona y solo redefine los métodos HTTP: plantilla,
+contexto, permisos y presupuesto de consultas son los mismos.
+"""
+
+import inspect
+
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.db.models import QuerySet
+from django.http import Http404
+from django.shortcuts import aget_object_or_404, redirect
+from django.template.response import TemplateResponse
+
+from . import threads, views
+from .authorization import get_access
+from .models import Course
+
+
+class AsyncViewMixin:
+    """
+    Mixin base de las vistas asíncronas. Resuelve request.user antes de las comprobaciones de
+    acceso de los mixins síncronos, que así no consultan la base de datos desde el bucle de eventos.
+    """
+    async def dispatch(self, request, *args, **kwargs):
+        request.user = await request.auser()
+        response = super().dispatch(request, *args, **kwargs)
+        if inspect.isawaitable(response):
+            response = await response
+        return response
+
+    async def aget_object(self, queryset=None):
+        """
+        Versión asíncrona de get_object() (solo por clave primaria).
+        """
+        if queryset is None:
+            queryset = self.get_queryset()
+        try:
+            return await queryset.aget(pk=self.kwargs[self.pk_url_kwarg])
+        except queryset.model.DoesNotExist:
+            raise Http404(f'No se encontró {queryset.model._meta.verbose_name}.')
+
+    async def aevaluate(self, context):
+        """
+        Evalúa con el ORM asíncrono los querysets del contexto, que si no se evaluarían al
+        renderizar la plantilla.
+        """
+        for key, value in context.items():
+            if isinstance(value, QuerySet):
+                context[key] = [item async for item in value]
+        return context
+
+
+class IndexView(AsyncViewMixin, views.IndexView):
+    """
+    Versión asíncrona de views.IndexView.
+    """
+    async def get(self, request, *args, **kwargs):
+        context = await self.aevaluate(self.get_context_data(**kwargs))
+        return self.render_to_response(context)
+
+
+class CourseListView(AsyncViewMixin, views.CourseListView):
+    """
+    Versión asíncrona de views.CourseListView.
+    """
+    async def get(self, request, *args, **kwargs):
+        self.object_list = [course async for course in self.get_queryset()]
+        return self.render_to_response(self.get_context_data())
+
+    def handle_no_permission(self):
+        # Como StudentAccessMixin, pero sin renderizar en el bucle de eventos.
+        return TemplateResponse(self.request, '404.html')
+
+
+class CourseDetailView(AsyncViewMixin, views.CourseDetailView):
+    """
+    Versión asíncrona de views.CourseDetailView. Trae los materiales y exámenes del curso con
+    la misma consulta que el curso.
+    """
+    async def get(self, request, *args, **kwargs):
+        self.object = await self.aget_object(self.get_queryset().prefetch_related('materials', 'exams'))
+        access = get_access(request)
+        await access.aload_enrollments()
+        if access.must_enroll(self.object):
+            messages.error(request, 'Debes inscribirte en el curso para verlo.')
+            return redirect('enroll_course', pk=self.object.pk)
+        return self.render_to_response(self.get_context_data(object=self.object))
+
+
+class ForumListView(AsyncViewMixin, views.ForumListView):
+    """
+    Versión asíncrona de views.ForumListView.
+    """
+    async def get(self, request, *args, **kwargs):
+        course = await aget_object_or_404(Course, pk=self.kwargs['course_id'])
+        self.object_list = [forum async for forum in self.get_queryset()]
+        return self.render_to_response(self.get_context_data(course=course))
+
+
+class ForumDetailView(AsyncViewMixin, views.ForumDetailView):
+    """
+    Versión asíncrona de views.ForumDetailView. La publicación (POST) se procesa en un hilo
+    con la vista síncrona.
+    """
+    async def get(self, request, *args, **kwargs):
+        self.object = await self.aget_object()
+        try:
+            page = await threads.aload_page(self.object, before=request.GET.get('before'))
+        except ValueError:
+            page = await threads.aload_page(self.object)
+        return self.render_to_response(self.get_context_data(object=self.object, thread=page))
+
+    async def post(self, request, *args, **kwargs):
+        return await sync_to_async(super().post)(request, *args, **kwargs)
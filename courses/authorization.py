@@ -0,0 +1,131 @@
+"""
+authorization.py
+
+Capa de autorización de las vistas. AccessContext reúne, para el usuario de una petición, su
+rol, sus inscripciones (curso y estado) y los cursos que imparte, junto con las reglas de
+acceso que los usan. Cada dato se consulta como mucho una vez: get_access() guarda el contexto
+en la petición, así que las comprobaciones de los mixins (mixins.AuthorizationMixin), las
+vistas y las funciones auxiliares comparten las mismas consultas.
+"""
+
+from django.utils.functional import cached_property
+
+from .models import Course, Enrollment
+
+# Estados de inscripción que dan acceso al contenido de un curso.
+ACCESS_STATUSES = ('inscrito', 'en_espera')
+
+
+class AccessContext:
+    """
+    Rol, inscripciones y cursos propios de un usuario, cargados a demanda y memoizados.
+    """
+    def __init__(self, user):
+        self.user = user
+
+    @property
+    def is_authenticated(self):
+        return self.user.is_authenticated
+
+    @property
+    def is_superuser(self):
+        return self.user.is_superuser
+
+    @cached_property
+    def role(self):
+        return self.user.role if self.user.is_authenticated else None
+
+    @property
+    def is_admin(self):
+        return self.is_superuser or self.role == 'admin'
+
+    @cached_property
+    def enrollments(self):
+        """
+        Devuelve {id del curso: estado} de las inscripciones del usuario.
+        """
+        if not self.is_authenticated:
+            return {}
+        return dict(self._enrollment_rows())
+
+    async def aload_enrollments(self):
+        """
+        Carga las inscripciones con el ORM asíncrono en la misma caché que enrollments, para
+        que las vistas asíncronas apliquen las reglas sin consultar desde el bucle de eventos.
+        """
+        if 'enrollments' not in self.__dict__:
+            rows = [row async for row in self._enrollment_rows()] if self.is_authenticated else []
+            self.__dict__['enrollments'] = dict(rows)
+        return self.enrollments
+
+    def _enrollment_rows(self):
+        return Enrollment.objects.filter(student=self.user).values_list('course_id', 'status')
+
+    @cached_property
+    def owned_course_ids(self):
+        """
+        Ids de los cursos que imparte el usuario.
+        """
+        if not self.is_authenticated:
+            return frozenset()
+        return frozenset(Course.objects.filter(instructor=self.user).values_list('pk', flat=True))
+
+    def owns_course(self, course):
+        return self.is_authenticated and course.instructor_id == self.user.pk
+
+    def is_enrolled(self, course_id, statuses=None):
+        status = self.enrollments.get(course_id)
+        return status is not None and (statuses is None or status in statuses)
+
+    def can_manage_course(self, course):
+        """
+        Editan un curso y su contenido los superusuarios y su instructor.
+        """
+        return self.is_superuser or (self.role == 'instructor' and self.owns_course(course))
+
+    def can_access_course(self, course):
+        """
+        Acceden al contenido de un curso los administradores, su instructor y sus estudiantes
+        inscritos o en espera.
+        """
+        return self.is_admin or self.owns_course(course) or self.is_enrolled(course.pk, ACCESS_STATUSES)
+
+    def must_enroll(self, course):
+        """
+        Los estudiantes no inscritos en un curso deben inscribirse para ver su detalle.
+        """
+        return self.role == 'student' and not self.is_enrolled(course.pk)
+
+    def can_manage_enrollments(self, course=None):
+        """
+        Los administradores gestionan todas las inscripciones; los instructores, las de sus cursos.
+        """
+        if self.is_admin:
+            return True
+        return self.role == 'instructor' and (course is None or self.owns_course(course))
+
+    def can_view_exam_statistics(self, exam):
+        """
+        Solo los superusuarios y el instructor del curso ven las estadísticas de un examen.
+        """
+        return self.can_manage_course(exam.course)
+
+    def visible_course_ids(self):
+        """
+        Ids de los cursos cuyo contenido ve el usuario, o None si los ve todos.
+        """
+        if self.is_admin:
+            return None
+        if self.role == 'instructor':
+            return sorted(self.owned_course_ids)
+        return sorted(course_id for course_id in self.enrollments if self.is_enrolled(course_id, ACCESS_STATUSES))
+
+
+def get_access(request):
+    """
+    Devuelve el AccessContext de la petición, creándolo la primera vez (o si cambió el usuario).
+    """
+    access = getattr(request, '_access', None)
+    if access is None or access.user is not request.user:
+        access = request._access = AccessContext(request.user)
+    return access
@@ -0,0 +1,52 @@
+"""
+caching.py
+
+Utilidades de caché compartidas por la aplicación. Implementa contadores de versión
+almacenados en la caché de Django para invalidar entradas derivadas sin tener que
+conocer todas sus claves.
+"""
+
+import time
+
+from django.core.cache import cache
+
+
+def version_key(namespace, ident=None):
+    """
+    Construye la clave de caché del contador de versión de un espacio de nombres.
+    """
+    if ident is None:
+        return f'version:{namespace}'
+    return f'version:{namespace}:{ident}'
+
+
+def get_versions(keys):
+    """
+    Devuelve un diccionario {clave: versión} para las claves dadas con una sola lectura.
+    Las claves ausentes (nunca creadas o expulsadas de la caché) se inicializan con un
+    valor basado en el reloj para que nunca coincidan con una versión anterior.
+    """
+    keys = list(keys)
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return versions
+
+
+def get_version(key):
+    """
+    Devuelve la versión actual de una sola clave.
+    """
+    return get_versions([key])[key]
+
+
+def bump_version(key):
+    """
+    Incrementa el contador de versión, invalidando todas las entradas que dependan de él.
+    """
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
@@ -0,0 +1,21 @@
+"""
+context_processors.py
+
+Procesadores de contexto de la aplicación de cursos.
+"""
+
+from django.utils.functional import SimpleLazyObject
+
+from .authorization import get_access
+from .sidebar import get_sidebar
+
+
+def sidebar(request):
+    """
+    Expone la navegación lateral como 'sidebar'. Se evalúa de forma perezosa, de modo que las
+    plantillas que no la usan no consultan ni la caché ni la base de datos.
+    """
+    user = getattr(request, 'user', None)
+    if user is None:
+        return {}
+    return {'sidebar': SimpleLazyObject(lambda: get_sidebar(user, get_access(request)))}
@@ -0,0 +1,81 @@
+"""
+counters.py
+
+Contadores desnormalizados de actividad: inscripciones y exámenes por curso, publicaciones y
+fecha de la última publicación por foro. Las señales de Enrollment, Exam y Post los ajustan
+con UPDATE ... F() dentro de la misma transacción que la fila (ver CountedMixin en models.py),
+así que los listados los leen sin agregados por fila. recount_courses() y recount_forums()
+los reconstruyen en bloque (comando `recount`) tras cargas masivas que no emiten señales.
+"""
+
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Course, Enrollment, Exam, Forum, Post
+
+
+def adjust(model, pk, **deltas):
+    """
+    Suma a los contadores de una fila los incrementos dados, sin bajar nunca de cero.
+    """
+    model.objects.filter(pk=pk).update(**{
+        field: Greatest(F(field) + delta, Value(0)) for field, delta in deltas.items()
+    })
+
+
+def _latest_post_at():
+    return Subquery(
+        Post.objects.filter(forum=OuterRef('pk')).order_by('-created_at').values('created_at')[:1]
+    )
+
+
+def post_added(post):
+    """
+    Cuenta una publicación nueva y la registra como la última del foro.
+    """
+    Forum.objects.filter(pk=post.forum_id).update(
+        post_count=F('post_count') + 1,
+        last_post_at=Greatest(Coalesce(F('last_post_at'), Value(post.created_at)), Value(post.created_at)),
+    )
+
+
+def post_removed(post):
+    """
+    Descuenta una publicación eliminada y recalcula la fecha de la última del foro.
+    """
+    Forum.objects.filter(pk=post.forum_id).update(
+        post_count=Greatest(F('post_count') - 1, Value(0)),
+        last_post_at=_latest_post_at(),
+    )
+
+
+def _count(model, field):
+    """
+    Subconsulta correlacionada con el número de filas de model que apuntan a la fila exterior.
+    """
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('pk')}).order_by().values(field)
+        .annotate(total=Count('pk')).values('total')
+    ), 0)
+
+
+def recount_courses(queryset=None):
+    """
+    Reconstruye los contadores de los cursos con un único UPDATE. Devuelve las filas actualizadas.
+    """
+    queryset = Course.objects.all() if queryset is None else queryset
+    return queryset.update(
+        enrollment_count=_count(Enrollment, 'course'),
+        exam_count=_count(Exam, 'course'),
+    )
+
+
+def recount_forums(queryset=None):
+    """
+    Reconstruye los contadores de los foros con un único UPDATE. Devuelve las filas actualizadas.
+    """
+    queryset = Forum.objects.all() if queryset is None else queryset
+    return queryset.update(
+        post_count=_count(Post, 'forum'),
+        last_post_at=_latest_post_at(),
+    )
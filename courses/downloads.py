@@ -0,0 +1,129 @@
+"""
+downloads.py
+
+Entrega protegida de los archivos de Material. La vista comprueba el acceso una vez y después:
+
+- si MEDIA_SENDFILE está configurado, delega el envío en el servidor web con X-Sendfile (Apache,
+  lighttpd) o X-Accel-Redirect (nginx, con una location interna en MEDIA_ACCEL_PREFIX que
+  apunte a PROTECTED_MEDIA_ROOT); el proceso de Django solo genera las cabeceras;
+- si no, envía el archivo por bloques con soporte de Range (un único rango), If-Range, ETag y
+  If-None-Match, de modo que el navegador puede saltar a cualquier página de un PDF grande.
+
+El ETag de un blob es su hash de contenido; para los archivos anteriores a la deduplicación se
+deriva de la fecha de modificación y el tamaño.
+"""
+
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, quote_etag
+
+from . import storage
+
+# None, 'x-sendfile' o 'x-accel-redirect'.
+MEDIA_SENDFILE = getattr(settings, 'MEDIA_SENDFILE', None)
+MEDIA_ACCEL_PREFIX = getattr(settings, 'MEDIA_ACCEL_PREFIX', '/protected-media/')
+CHUNK_SIZE = 64 * 1024
+
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def file_etag(name, stat):
+    stem = os.path.splitext(os.path.basename(name))[0]
+    if storage.is_blob(name):
+        return quote_etag(stem)
+    return quote_etag(f'{stat.st_mtime_ns:x}-{stat.st_size:x}')
+
+
+def parse_range(header, size):
+    """
+    Devuelve (inicio, fin) inclusivos del rango pedido, None si la cabecera no es un rango
+    simple (se envía el archivo completo) o False si el rango no es satisfacible.
+    """
+    match = RANGE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    start, end = match.groups()
+    if not start:
+        # bytes=-N: los últimos N bytes.
+        length = int(end)
+        return (max(size - length, 0), size - 1) if length and size else False
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def iter_range(path, start, length):
+    with open(path, 'rb') as handle:
+        handle.seek(start)
+        while length > 0:
+            chunk = handle.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def serve_file(request, name, filename, as_attachment=False):
+    """
+    Respuesta con el archivo 'name' del almacenamiento protegido, enviado como 'filename'.
+    """
+    path = storage.protected_storage.path(name)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise Http404('El archivo no existe.')
+    etag = file_etag(name, stat)
+    not_modified = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if not_modified is not None:
+        return not_modified
+
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    size = stat.st_size
+    if MEDIA_SENDFILE:
+        response = HttpResponse(content_type=content_type)
+        if MEDIA_SENDFILE == 'x-accel-redirect':
+            response['X-Accel-Redirect'] = MEDIA_ACCEL_PREFIX.rstrip('/') + '/' + name
+        else:
+            response['X-Sendfile'] = path
+    else:
+        byte_range = None
+        header = request.headers.get('Range')
+        if header and request.headers.get('If-Range', etag) == etag:
+            byte_range = parse_range(header, size)
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        if byte_range:
+            start, end = byte_range
+            response = StreamingHttpResponse(iter_range(path, start, end - start + 1), status=206,
+                                             content_type=content_type)
+            response['Content-Length'] = end - start + 1
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        else:
+            response = FileResponse(open(path, 'rb'), content_type=content_type)
+            response['Content-Length'] = size
+        response['Accept-Ranges'] = 'bytes'
+
+    response['Content-Disposition'] = content_disposition_header(as_attachment, filename)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    # Privada y revalidada siempre: el acceso se comprueba en cada petición, pero un 304 no
+    # vuelve a enviar el archivo.
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def download_name(material):
+    """
+    Nombre con el que se descarga el material: su título con la extensión del archivo.
+    """
+    extension = os.path.splitext(material.file.name)[1].lower()
+    return f'{material.title}{extension}'
@@ -0,0 +1,158 @@
+"""
+enrollments.py
+
+Operaciones masivas sobre inscripciones. bulk_enroll() recibe pares (usuario, curso) de un CSV
+o de la API, los resuelve con dos consultas IN, inserta las inscripciones nuevas con
+bulk_create(ignore_conflicts=True) y devuelve el resultado de cada fila. delete_enrollments()
+elimina las inscripciones de un curso por lotes acotados para no bloquear SQLite durante segundos.
+
+bulk_create y los borrados por lotes no envían señales: los contadores de los cursos y la
+navegación lateral se actualizan al confirmar cada transacción.
+
+Formato CSV: columnas username y course (id del curso).
+"""
+
+import csv
+import io
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from . import counters, sidebar
+from .models import Course, Enrollment, User
+
+ENROLLMENT_BATCH_SIZE = getattr(settings, 'ENROLLMENT_BATCH_SIZE', 500)
+
+CREATED = 'created'
+ALREADY_ENROLLED = 'already_enrolled'
+DUPLICATE = 'duplicate'
+UNKNOWN_USER = 'unknown_user'
+NOT_STUDENT = 'not_student'
+UNKNOWN_COURSE = 'unknown_course'
+FORBIDDEN = 'forbidden'
+INVALID = 'invalid'
+
+
+def parse_enrollment_csv(uploaded_file):
+    """
+    Lee los pares (usuario, curso) de un CSV subido. Lanza ValueError si el formato no es válido.
+    """
+    try:
+        content = uploaded_file.read().decode('utf-8-sig')
+    except UnicodeDecodeError:
+        raise ValueError('El archivo debe estar codificado en UTF-8.')
+    reader = csv.DictReader(io.StringIO(content))
+    if not reader.fieldnames or not {'username', 'course'} <= set(reader.fieldnames):
+        raise ValueError('El CSV debe tener las columnas "username" y "course".')
+    return [(row['username'], row['course']) for row in reader]
+
+
+def _course_id(value):
+    try:
+        course_id = int(str(value).strip())
+    except (TypeError, ValueError):
+        return None
+    return course_id if course_id > 0 else None
+
+
+def _invalidate(course_ids, student_ids):
+    counters.recount_courses(Course.objects.filter(pk__in=course_ids))
+    for student_id in student_ids:
+        sidebar.invalidate_user(student_id)
+
+
+def bulk_enroll(pairs, user=None):
+    """
+    Inscribe los pares (usuario, curso) y devuelve una lista con el resultado de cada fila:
+    {'row', 'username', 'course', 'status'}. Si se indica 'user' y no es administrador, solo
+    se aceptan los cursos que imparte.
+    """
+    rows = [(str(username or '').strip(), _course_id(course)) for username, course in pairs]
+    usernames = {username for username, _ in rows if username}
+    course_ids = {course_id for _, course_id in rows if course_id}
+
+    students = {
+        username: (pk, role)
+        for username, pk, role in User.objects.filter(username__in=usernames).values_list('username', 'pk', 'role')
+    }
+    instructors = dict(Course.objects.filter(pk__in=course_ids).values_list('pk', 'instructor_id'))
+    manages_all = user is None or user.is_superuser or user.role == 'admin'
+
+    results, candidates, seen = [], {}, set()
+    for number, (username, course_id) in enumerate(rows, start=1):
+        result = {'row': number, 'username': username, 'course': course_id}
+        results.append(result)
+        if not username or not course_id:
+            result['status'] = INVALID
+        elif username not in students:
+            result['status'] = UNKNOWN_USER
+        elif students[username][1] != 'student':
+            result['status'] = NOT_STUDENT
+        elif course_id not in instructors:
+            result['status'] = UNKNOWN_COURSE
+        elif not manages_all and instructors[course_id] != user.pk:
+            result['status'] = FORBIDDEN
+        elif (students[username][0], course_id) in seen:
+            result['status'] = DUPLICATE
+        else:
+            key = (students[username][0], course_id)
+            seen.add(key)
+            candidates[key] = result
+
+    if not candidates:
+        return results
+    student_ids = {student_id for student_id, _ in candidates}
+    candidate_courses = {course_id for _, course_id in candidates}
+    existing = set(
+        Enrollment.objects.filter(student_id__in=student_ids, course_id__in=candidate_courses)
+        .values_list('student_id', 'course_id')
+    )
+    new = [key for key in candidates if key not in existing]
+    for key, result in candidates.items():
+        result['status'] = ALREADY_ENROLLED if key in existing else CREATED
+
+    with transaction.atomic():
+        Enrollment.objects.bulk_create(
+            [Enrollment(student_id=student_id, course_id=course_id) for student_id, course_id in new],
+            batch_size=ENROLLMENT_BATCH_SIZE, ignore_conflicts=True,
+        )
+        transaction.on_commit(lambda: _invalidate(
+            {course_id for _, course_id in new}, {student_id for student_id, _ in new},
+        ))
+    return results
+
+
+def delete_enrollments(course, batch_size=ENROLLMENT_BATCH_SIZE):
+    """
+    Elimina las inscripciones del curso con un DELETE por lote de 'batch_size' filas, de modo
+    que cada sentencia bloquea la base de datos poco tiempo. Devuelve el número de filas eliminadas.
+
+    El DELETE se ejecuta en SQL para no disparar las señales post_delete por fila (un UPDATE del
+    contador y una invalidación por inscripción); su trabajo lo hace _invalidate() al confirmar
+    cada lote, de modo que si un lote posterior falla los ya confirmados quedan al día.
+    """
+    table = connection.ops.quote_name(Enrollment._meta.db_table)
+    pk_column = connection.ops.quote_name(Enrollment._meta.pk.column)
+    deleted = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                Enrollment.objects.filter(course=course).order_by('pk').values_list('pk', 'student_id')[:batch_size]
+            )
+            if not batch:
+                break
+            placeholders = ', '.join(['%s'] * len(batch))
+            with connection.cursor() as cursor:
+                cursor.execute(f'DELETE FROM {table} WHERE {pk_column} IN ({placeholders})', [pk for pk, _ in batch])
+                deleted += cursor.rowcount
+            student_ids = {student_id for _, student_id in batch}
+            transaction.on_commit(lambda student_ids=student_ids: _invalidate({course.pk}, student_ids))
+    return deleted
+
+
+def summarize(results):
+    """
+    Número de filas por resultado.
+    """
+    return dict(Counter(result['status'] for result in results))
@@ -0,0 +1,73 @@
+"""
+exam_cache.py
+
+Caché de lectura del contenido de los exámenes: preguntas y opciones de respuesta, sin el
+campo is_correct. Las entradas se indexan por id del examen y un contador de versión que las
+señales de Exam, Question y Answer incrementan al guardar o eliminar (ver caching.py), por lo
+que funciona igual con LocMemCache que con FileBasedCache.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .caching import bump_version, get_version, version_key
+from .models import Answer, Question
+
+EXAM_CONTENT_CACHE_TIMEOUT = getattr(settings, 'EXAM_CONTENT_CACHE_TIMEOUT', 60 * 60)
+
+
+def exam_version_key(exam_id):
+    return version_key('exam_content', exam_id)
+
+
+def build_exam_content(exam_id):
+    """
+    Consulta las preguntas y respuestas del examen (dos consultas) y devuelve un diccionario
+    {id de pregunta: pregunta}, donde cada pregunta incluye la lista de sus respuestas.
+    """
+    questions = {
+        question['id']: dict(question, answers=[])
+        for question in Question.objects.filter(exam_id=exam_id).order_by('pk').values('id', 'text', 'question_type')
+    }
+    answers = Answer.objects.filter(question__exam_id=exam_id).order_by('pk').values('id', 'text', 'question_id')
+    for answer in answers:
+        questions[answer['question_id']]['answers'].append({'id': answer['id'], 'text': answer['text']})
+    return questions
+
+
+def get_exam_content(exam_id):
+    """
+    Devuelve el contenido del examen desde la caché, construyéndolo si la versión cambió.
+    """
+    key = f'exam_content:{exam_id}:{get_version(exam_version_key(exam_id))}'
+    content = cache.get(key)
+    if content is None:
+        content = build_exam_content(exam_id)
+        cache.set(key, content, EXAM_CONTENT_CACHE_TIMEOUT)
+    return content
+
+
+def get_questions(exam_id, question_ids=None):
+    """
+    Devuelve las preguntas del examen en el orden de question_ids (o por id si no se indica).
+    """
+    content = get_exam_content(exam_id)
+    if question_ids is None:
+        return list(content.values())
+    return [content[question_id] for question_id in question_ids if question_id in content]
+
+
+def get_question(exam_id, question_ids, question_number):
+    """
+    Devuelve la pregunta en la posición indicada (empezando en 1) o None si no existe.
+    """
+    if question_number < 1 or question_number > len(question_ids):
+        return None
+    return get_exam_content(exam_id).get(question_ids[question_number - 1])
+
+
+def invalidate_exam(exam_id):
+    """
+    Invalida el contenido cacheado del examen.
+    """
+    bump_version(exam_version_key(exam_id))
@@ -0,0 +1,135 @@
+"""
+exam_import.py
+
+Creación masiva de preguntas y respuestas de un examen. Las preguntas pueden venir del
+formulario de CrearExamenView o de un archivo JSON/CSV, y se insertan con bulk_create dentro
+de una transacción: unas pocas sentencias en lugar de una por fila.
+
+Formato JSON: una lista (o {"questions": [...]}) de objetos
+    {"text": "...", "question_type": "multiple_choice", "answers": [{"text": "...", "is_correct": true}]}
+
+Formato CSV: columnas question_text, question_type, option1..option5, correct_option
+(las mismas que envía el formulario).
+"""
+
+import csv
+import io
+import json
+
+from django.db import transaction
+
+from .exam_cache import invalidate_exam
+from .models import Answer, Question
+
+OPTION_FIELDS = ['option1', 'option2', 'option3', 'option4', 'option5']
+QUESTION_TYPES = {value for value, _ in Question.QUESTION_TYPES}
+
+
+def _question(text, question_type, options, correct_option):
+    """
+    Normaliza una pregunta con opciones numeradas (1..5) al formato interno.
+    """
+    if question_type not in QUESTION_TYPES:
+        raise ValueError(f'Tipo de pregunta no válido: "{question_type}".')
+    answers = []
+    if question_type == 'multiple_choice':
+        try:
+            correct = int(correct_option)
+        except (TypeError, ValueError):
+            raise ValueError(f'Opción correcta no válida en la pregunta "{text}".')
+        answers = [
+            {'text': option, 'is_correct': position == correct}
+            for position, option in enumerate(options, start=1) if option
+        ]
+    return {'text': text, 'question_type': question_type, 'answers': answers}
+
+
+def parse_form_questions(data):
+    """
+    Lee las preguntas de los campos repetidos del formulario de creación de exámenes.
+    """
+    texts = data.getlist('question_text')
+    types = data.getlist('question_type')
+    options = [data.getlist(field) for field in OPTION_FIELDS]
+    correct_options = data.getlist('correct_option')
+
+    questions = []
+    for i, text in enumerate(texts):
+        if not text:
+            continue
+        row_options = [column[i] if i < len(column) else '' for column in options]
+        correct = correct_options[i] if i < len(correct_options) else None
+        questions.append(_question(text, types[i] if i < len(types) else 'text', row_options, correct))
+    return questions
+
+
+def parse_import_file(uploaded_file):
+    """
+    Lee las preguntas de un archivo JSON o CSV subido. Lanza ValueError si el formato no es válido.
+    """
+    name = uploaded_file.name.lower()
+    content = uploaded_file.read().decode('utf-8-sig')
+    if name.endswith('.json'):
+        return _parse_json(content)
+    if name.endswith('.csv'):
+        return _parse_csv(content)
+    raise ValueError('El archivo debe tener extensión .json o .csv.')
+
+
+def _parse_json(content):
+    try:
+        data = json.loads(content)
+    except json.JSONDecodeError as error:
+        raise ValueError(f'JSON no válido: {error}')
+    if isinstance(data, dict):
+        data = data.get('questions', [])
+    if not isinstance(data, list):
+        raise ValueError('El JSON debe ser una lista de preguntas.')
+
+    questions = []
+    for item in data:
+        if not isinstance(item, dict) or not item.get('text'):
+            raise ValueError('Cada pregunta debe tener un campo "text".')
+        question_type = item.get('question_type', 'multiple_choice' if item.get('answers') else 'text')
+        if question_type not in QUESTION_TYPES:
+            raise ValueError(f'Tipo de pregunta no válido: "{question_type}".')
+        answers = [
+            {'text': answer['text'], 'is_correct': bool(answer.get('is_correct'))}
+            for answer in item.get('answers', []) if answer.get('text')
+        ]
+        questions.append({'text': item['text'], 'question_type': question_type, 'answers': answers})
+    return questions
+
+
+def _parse_csv(content):
+    reader = csv.DictReader(io.StringIO(content))
+    if not reader.fieldnames or 'question_text' not in reader.fieldnames:
+        raise ValueError('El CSV debe tener la columna "question_text".')
+    return [
+        _question(
+            row['question_text'],
+            row.get('question_type') or 'text',
+            [row.get(field) or '' for field in OPTION_FIELDS],
+            row.get('correct_option'),
+        )
+        for row in reader if row.get('question_text')
+    ]
+
+
+def create_questions(exam, questions):
+    """
+    Inserta las preguntas y sus respuestas con dos bulk_create dentro de una transacción.
+    bulk_create no envía señales, por lo que la caché del examen se invalida al confirmar.
+    """
+    with transaction.atomic():
+        created = Question.objects.bulk_create([
+            Question(exam=exam, text=question['text'], question_type=question['question_type'])
+            for question in questions
+        ])
+        Answer.objects.bulk_create([
+            Answer(question=question, text=answer['text'], is_correct=answer['is_correct'])
+            for question, data in zip(created, questions)
+            for answer in data['answers']
+        ])
+        transaction.on_commit(lambda: invalidate_exam(exam.id))
+    return created
@@ -0,0 +1,134 @@
+"""
+exam_stats.py
+
+Análisis de ítems de los exámenes con NumPy. Las notas y las respuestas de los intentos
+terminados se leen como columnas planas (values_list) y se convierten en arrays; todas las
+estadísticas (media, mediana, desviación típica, histograma, dificultad y discriminación por
+pregunta y alfa de Cronbach) se calculan de forma vectorizada, sin recorrer objetos del ORM.
+"""
+
+import numpy as np
+from django.db.models import BooleanField, ExpressionWrapper, F, Q
+
+from .models import AttemptAnswer, ExamAttempt, Grade, Question
+
+HISTOGRAM_BINS = 10
+# Proporción de intentos en los grupos superior e inferior del índice de discriminación.
+DISCRIMINATION_GROUP = 0.27
+
+
+def load_marks(exam_id):
+    """
+    Devuelve las notas del examen como array de float.
+    """
+    marks = Grade.objects.filter(exam_id=exam_id).values_list('marks_obtained', flat=True)
+    return np.fromiter(marks.iterator(), dtype=np.float64)
+
+
+def load_questions(exam_id):
+    """
+    Devuelve (ids de las preguntas ordenados, textos) del examen.
+    """
+    rows = list(Question.objects.filter(exam_id=exam_id).order_by('pk').values_list('pk', 'text'))
+    return np.array([pk for pk, _ in rows], dtype=np.int64), [text for _, text in rows]
+
+
+def load_responses(exam_id, question_ids):
+    """
+    Devuelve la matriz intentos × preguntas de los intentos terminados del examen. Cada celda
+    vale 1 si la respuesta elegida es correcta y 0 si es incorrecta o no se respondió.
+    """
+    attempts = ExamAttempt.objects.filter(exam_id=exam_id, finished_at__isnull=False)
+    attempt_ids = np.fromiter(attempts.order_by('pk').values_list('pk', flat=True).iterator(), dtype=np.int64)
+    correct = (
+        AttemptAnswer.objects.filter(attempt__in=attempts)
+        .annotate(correct=ExpressionWrapper(
+            Q(answer__is_correct=True, answer__question_id=F('question_id')), output_field=BooleanField(),
+        ))
+        .filter(correct=True)
+        .values_list('attempt_id', 'question_id')
+    )
+    pairs = np.array(list(correct.iterator()), dtype=np.int64).reshape(-1, 2)
+    return response_matrix(attempt_ids, question_ids, pairs)
+
+
+def response_matrix(attempt_ids, question_ids, correct_pairs):
+    """
+    Construye la matriz de aciertos a partir de los pares (intento, pregunta) correctos.
+    Ambas listas de ids deben estar ordenadas; los pares con ids desconocidos se ignoran.
+    """
+    matrix = np.zeros((len(attempt_ids), len(question_ids)), dtype=np.uint8)
+    if not len(correct_pairs) or not matrix.size:
+        return matrix
+    rows = np.searchsorted(attempt_ids, correct_pairs[:, 0])
+    cols = np.searchsorted(question_ids, correct_pairs[:, 1])
+    known = (rows < len(attempt_ids)) & (cols < len(question_ids))
+    rows, cols, pairs = rows[known], cols[known], correct_pairs[known]
+    known = (attempt_ids[rows] == pairs[:, 0]) & (question_ids[cols] == pairs[:, 1])
+    matrix[rows[known], cols[known]] = 1
+    return matrix
+
+
+def grade_summary(marks, total_marks):
+    """
+    Media, mediana, desviación típica e histograma de las notas sobre [0, total_marks].
+    """
+    if not marks.size:
+        return {'count': 0, 'mean': None, 'median': None, 'stddev': None, 'histogram': None}
+    counts, edges = np.histogram(marks, bins=HISTOGRAM_BINS, range=(0, max(total_marks, marks.max(), 1)))
+    return {
+        'count': int(marks.size),
+        'mean': float(marks.mean()),
+        'median': float(np.median(marks)),
+        'stddev': float(marks.std()),
+        'histogram': {'counts': counts.tolist(), 'edges': edges.tolist()},
+    }
+
+
+def item_analysis(matrix):
+    """
+    Dificultad (proporción de aciertos) y discriminación (diferencia de aciertos entre el 27 %
+    de intentos con mejor y peor puntuación) de cada pregunta, y alfa de Cronbach del examen.
+    """
+    attempts, items = matrix.shape
+    if not attempts or not items:
+        return {'difficulty': [None] * items, 'discrimination': [None] * items, 'cronbach_alpha': None}
+    responses = matrix.astype(np.float64)
+    totals = responses.sum(axis=1)
+    difficulty = responses.mean(axis=0)
+
+    group = max(1, int(round(attempts * DISCRIMINATION_GROUP)))
+    order = np.argsort(totals, kind='stable')
+    discrimination = responses[order[-group:]].mean(axis=0) - responses[order[:group]].mean(axis=0)
+
+    alpha = None
+    total_variance = totals.var(ddof=1) if attempts > 1 else 0.0
+    if items > 1 and total_variance > 0:
+        alpha = float(items / (items - 1) * (1 - responses.var(axis=0, ddof=1).sum() / total_variance))
+    return {
+        'difficulty': difficulty.tolist(),
+        'discrimination': discrimination.tolist(),
+        'cronbach_alpha': alpha,
+    }
+
+
+def exam_statistics(exam):
+    """
+    Estadísticas completas del examen en un diccionario serializable a JSON.
+    """
+    question_ids, texts = load_questions(exam.pk)
+    matrix = load_responses(exam.pk, question_ids)
+    items = item_analysis(matrix)
+    return {
+        'exam': exam.pk,
+        'title': exam.title,
+        'total_marks': exam.total_marks,
+        'grades': grade_summary(load_marks(exam.pk), exam.total_marks),
+        'attempts': int(matrix.shape[0]),
+        'cronbach_alpha': items['cronbach_alpha'],
+        'questions': [
+            {'id': int(pk), 'text': text, 'difficulty': difficulty, 'discrimination': discrimination}
+            for pk, text, difficulty, discrimination
+            in zip(question_ids, texts, items['difficulty'], items['discrimination'])
+        ],
+    }
@@ -0,0 +1,48 @@
+"""
+exam_timer.py
+
+Temporizador de los exámenes. Las páginas del examen cuentan atrás en el navegador
+(static/js/exam-timer.js) y cada EXAM_TIMER_HEARTBEAT segundos se resincronizan con
+ExamTimerView, una vista JSON que no renderiza plantillas ni carga las preguntas: lee el
+inicio y el fin del intento y la duración del examen con una consulta por el índice único
+(student, exam) de ExamAttempt.
+"""
+
+from django.conf import settings
+from django.urls import reverse
+
+from .models import ExamAttempt
+
+EXAM_TIMER_HEARTBEAT = getattr(settings, 'EXAM_TIMER_HEARTBEAT', 30)
+
+
+def timer_state(student, exam_id, now=None):
+    """
+    Estado del intento del estudiante en el examen: 'not_started', 'in_progress', 'expired'
+    (sin tiempo, pendiente de calificar) o 'finished', con los segundos restantes.
+    """
+    attempt = (
+        ExamAttempt.objects.filter(student=student, exam_id=exam_id)
+        .values('started_at', 'finished_at', 'exam__duration').first()
+    )
+    state = {'status': 'not_started', 'remaining_seconds': None, 'heartbeat': EXAM_TIMER_HEARTBEAT}
+    if attempt is None:
+        return state
+    if attempt['finished_at'] is not None:
+        state.update(status='finished', remaining_seconds=0, result_url=reverse('exam_result', args=[exam_id]))
+    else:
+        remaining = ExamAttempt.seconds_left(attempt['started_at'], attempt['exam__duration'], now)
+        state.update(status='in_progress' if remaining else 'expired', remaining_seconds=remaining)
+    return state
+
+
+def timer_context(attempt):
+    """
+    Contexto del temporizador para las plantillas del examen.
+    """
+    remaining = attempt.remaining_seconds()
+    return {
+        'remaining_seconds': remaining,
+        'remaining_time': -(-remaining // 60),
+        'timer_heartbeat': EXAM_TIMER_HEARTBEAT,
+    }
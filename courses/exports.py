@@ -0,0 +1,175 @@
+"""
+exports.py
+
+Exportaciones en streaming de notas, inscripciones y listas de clase. Las filas se leen con
+values_list().iterator(chunk_size=...) y se escriben a medida que se generan, así que la
+memoria no crece con el número de filas: el CSV se envía con StreamingHttpResponse y el XLSX
+se escribe con openpyxl en modo write-only a un archivo temporal que luego se envía por bloques.
+"""
+
+import csv
+import tempfile
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from django.conf import settings
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+
+from .models import Enrollment, Grade
+
+try:
+    from openpyxl import Workbook
+except ImportError:  # openpyxl es opcional: sin él solo se ofrece CSV.
+    Workbook = None
+
+EXPORT_CHUNK_SIZE = getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+
+
+@dataclass
+class Export:
+    """
+    Definición de una exportación: modelo, columnas (cabecera, campo) y campos de filtrado.
+    """
+    model: type
+    columns: list
+    course_field: str
+    date_field: str
+    exam_field: str = None
+    requires_course: bool = False
+    filters: dict = field(default_factory=dict)
+
+    def queryset(self, user, course=None, exam=None, since=None, until=None):
+        """
+        Filas de la exportación como tuplas, en el orden de las columnas. Los instructores
+        solo exportan datos de sus propios cursos.
+        """
+        queryset = self.model.objects.filter(**self.filters)
+        if not (user.is_superuser or user.role == 'admin'):
+            queryset = queryset.filter(**{f'{self.course_field}__instructor': user})
+        if course:
+            queryset = queryset.filter(**{f'{self.course_field}_id': course})
+        if exam and self.exam_field:
+            queryset = queryset.filter(**{f'{self.exam_field}_id': exam})
+        if since:
+            queryset = queryset.filter(**{f'{self.date_field}__gte': since})
+        if until:
+            queryset = queryset.filter(**{f'{self.date_field}__lte': until})
+        return queryset.order_by('pk').values_list(*[name for _, name in self.columns])
+
+    @property
+    def headers(self):
+        return [header for header, _ in self.columns]
+
+
+EXPORTS = {
+    'grades': Export(
+        model=Grade,
+        columns=[
+            ('Estudiante', 'student__username'),
+            ('Correo', 'student__email'),
+            ('Curso', 'exam__course__title'),
+            ('Examen', 'exam__title'),
+            ('Nota', 'marks_obtained'),
+            ('Puntaje total', 'exam__total_marks'),
+            ('Fecha', 'start_time'),
+        ],
+        course_field='exam__course',
+        exam_field='exam',
+        date_field='start_time__date',
+    ),
+    'enrollments': Export(
+        model=Enrollment,
+        columns=[
+            ('Estudiante', 'student__username'),
+            ('Correo', 'student__email'),
+            ('Curso', 'course__title'),
+            ('Estado', 'status'),
+            ('Fecha de inscripción', 'enrollment_date'),
+        ],
+        course_field='course',
+        date_field='enrollment_date',
+    ),
+    'roster': Export(
+        model=Enrollment,
+        columns=[
+            ('Usuario', 'student__username'),
+            ('Nombre', 'student__first_name'),
+            ('Apellidos', 'student__last_name'),
+            ('Correo', 'student__email'),
+            ('Estado', 'status'),
+            ('Fecha de inscripción', 'enrollment_date'),
+        ],
+        course_field='course',
+        date_field='enrollment_date',
+        requires_course=True,
+        filters={'status__in': ['inscrito', 'en_espera']},
+    ),
+}
+
+
+class Echo:
+    """
+    Pseudo-búfer para csv.writer: devuelve cada línea en lugar de guardarla.
+    """
+    def write(self, value):
+        return value
+
+
+def iter_rows(rows):
+    return rows.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def iter_csv(headers, rows):
+    """
+    Genera el CSV línea a línea, con BOM para que Excel detecte UTF-8.
+    """
+    writer = csv.writer(Echo())
+    yield '\ufeff' + writer.writerow(headers)
+    for row in iter_rows(rows):
+        yield writer.writerow(row)
+
+
+def excel_value(value):
+    """
+    Excel no admite fechas con zona horaria: se convierten a la hora local sin zona.
+    """
+    if isinstance(value, datetime) and timezone.is_aware(value):
+        return timezone.make_naive(value)
+    return value
+
+
+def csv_response(name, headers, rows):
+    response = StreamingHttpResponse(iter_csv(headers, rows), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{name}.csv"'
+    return response
+
+
+def xlsx_response(name, headers, rows):
+    """
+    Escribe el XLSX en modo write-only (las filas no se guardan en memoria) sobre un archivo
+    temporal anónimo, que FileResponse envía por bloques y elimina al cerrarse.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(name)
+    sheet.append(headers)
+    for row in iter_rows(rows):
+        sheet.append([excel_value(value) for value in row])
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return FileResponse(
+        output, as_attachment=True, filename=f'{name}.xlsx',
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
+
+
+def export_response(name, user, file_format='csv', **filters):
+    """
+    Respuesta con la exportación 'name' en el formato pedido.
+    """
+    export = EXPORTS[name]
+    rows = export.queryset(user, **filters)
+    if file_format == 'xlsx':
+        return xlsx_response(name, export.headers, rows)
+    return csv_response(name, export.headers, rows)
@@ -144,6 +144,14 @@ class QuestionForm(forms.ModelForm):
         model = Question
         fields = ['text', 'question_type']
 
+def answer_choices(question):
+    """
+    Devuelve las opciones (id, texto) de una pregunta, ya sea una instancia o un diccionario cacheado.
+    """
+    if isinstance(question, dict):
+        return [(answer['id'], answer['text']) for answer in question['answers']]
+    return [(answer.id, answer.text) for answer in question.answers.all()]
+
 class AnswerForm(forms.Form):
     """
     Formulario para la selección de respuestas en los exámenes.
@@ -152,12 +160,44 @@ class AnswerForm(forms.Form):
 
     def __init__(self, *args, **kwargs):
         """
-        Inicializa el formulario de respuestas con las opciones disponibles.
+        Inicializa el formulario de respuestas con las opciones disponibles. La pregunta puede ser
+        una instancia de Question o el diccionario cacheado por exam_cache.
         """
         question = kwargs.pop('question')
         super().__init__(*args, **kwargs)
-        self.fields['answer'].choices = [(answer.id, answer.text) for answer in question.answers.all()]
+        self.fields['answer'].choices = answer_choices(question)
         
+class ExamAnswersForm(forms.Form):
+    """
+    Formulario con una pregunta por campo para presentar el examen completo en una sola página.
+    Recibe las preguntas cacheadas por exam_cache.
+    """
+    def __init__(self, *args, **kwargs):
+        """
+        Crea un campo 'question_<id>' por pregunta con sus respuestas como opciones.
+        """
+        self.questions = kwargs.pop('questions')
+        super().__init__(*args, **kwargs)
+        for question in self.questions:
+            self.fields[f'question_{question["id"]}'] = forms.ChoiceField(
+                label=question['text'],
+                widget=forms.RadioSelect,
+                required=False,
+                choices=answer_choices(question),
+            )
+
+    def selected_answers(self):
+        """
+        Devuelve los pares (id de pregunta, id de respuesta) elegidos. Las opciones ya fueron
+        validadas contra las respuestas de cada pregunta, así que no se consulta la base de datos.
+        """
+        pairs = []
+        for question in self.questions:
+            answer_id = self.cleaned_data.get(f'question_{question["id"]}')
+            if answer_id:
+                pairs.append((question['id'], int(answer_id)))
+        return pairs
+
 class ForumForm(forms.ModelForm):
     """
     Formulario para la creación y edición de foros.
@@ -189,3 +229,38 @@ class UserProfileForm(UserChangeForm):
             'email': forms.EmailInput(attrs={'class': 'form-control'}),
             'profile_picture': forms.FileInput(attrs={'class': 'form-control'}),
         }
+
+class SearchForm(forms.Form):
+    """
+    Formulario de la búsqueda de texto completo (ver search.py).
+    """
+    q = forms.CharField(max_length=200, required=False, strip=True)
+    page = forms.IntegerField(min_value=1, required=False)
+
+class ExportFilterForm(forms.Form):
+    """
+    Formulario para validar los filtros de las exportaciones (ver exports.py).
+    """
+    FORMAT_CHOICES = (
+        ('csv', 'CSV'),
+        ('xlsx', 'Excel'),
+    )
+    format = forms.ChoiceField(choices=FORMAT_CHOICES, required=False)
+    course = forms.IntegerField(required=False, min_value=1)
+    exam = forms.IntegerField(required=False, min_value=1)
+    since = forms.DateField(required=False)
+    until = forms.DateField(required=False)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        since, until = cleaned_data.get('since'), cleaned_data.get('until')
+        if since and until and since > until:
+            raise forms.ValidationError('La fecha inicial debe ser anterior a la final.')
+        cleaned_data['format'] = cleaned_data.get('format') or 'csv'
+        return cleaned_data
+
+class EnrollmentImportForm(forms.Form):
+    """
+    Formulario para subir un CSV de inscripciones masivas (columnas username y course).
+    """
+    file = forms.FileField(label='Archivo CSV', widget=forms.FileInput(attrs={'class': 'form-control-file', 'accept': '.csv'}))
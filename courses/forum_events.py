@@ -0,0 +1,191 @@
+"""
+forum_events.py
+
+Publicaciones de los foros en tiempo real con server-sent events. Al confirmar un Post nuevo,
+la señal post_save publica su representación JSON (threads.serialize_post) en el canal del foro
+de un hub de publicación/suscripción; la vista asíncrona ForumEventsView mantiene abierta una
+respuesta text/event-stream por cliente y le reenvía los mensajes, así que el navegador recibe
+solo las publicaciones nuevas sin recargar el hilo.
+
+El hub se elige con FORUM_EVENTS_HUB (ruta a una subclase de Hub). InProcessHub reparte los
+mensajes dentro del proceso; con varios procesos, cada stream consulta además la base de datos
+en cada keepalive para recoger lo publicado en otros procesos, de modo que ningún mensaje se
+pierde aunque llegue con retraso. Cada evento lleva como id el cursor de la publicación: al
+reconectar, el navegador envía Last-Event-ID y el stream empieza por lo que se perdió.
+
+Con ASGI (p. ej. uvicorn online_courses.asgi:application) la conexión queda abierta. Con WSGI
+una respuesta infinita bloquearía el worker, así que el stream envía lo pendiente y termina, y
+EventSource reconecta a los FORUM_EVENTS_RETRY milisegundos.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from . import threads
+
+FORUM_EVENTS_HUB = getattr(settings, 'FORUM_EVENTS_HUB', 'courses.forum_events.InProcessHub')
+FORUM_EVENTS_KEEPALIVE = getattr(settings, 'FORUM_EVENTS_KEEPALIVE', 15)
+FORUM_EVENTS_MAX_AGE = getattr(settings, 'FORUM_EVENTS_MAX_AGE', 300)
+FORUM_EVENTS_RETRY = getattr(settings, 'FORUM_EVENTS_RETRY', 5000)
+FORUM_EVENTS_QUEUE_SIZE = 100
+
+_hub = None
+_hub_lock = threading.Lock()
+
+
+def channel(forum_id):
+    return f'forum:{forum_id}'
+
+
+class Subscription:
+    """
+    Cola de mensajes de un suscriptor. Si se llena (cliente lento) se descartan los mensajes
+    y se marca 'overflowed' para que el stream se resincronice desde la base de datos.
+    """
+    def __init__(self, hub, channel, loop):
+        self.hub = hub
+        self.channel = channel
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=FORUM_EVENTS_QUEUE_SIZE)
+        self.overflowed = False
+
+    def deliver(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self, timeout):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class Hub:
+    """
+    Interfaz del hub de publicación/suscripción. Una implementación para un broker local
+    (Redis, PostgreSQL LISTEN/NOTIFY...) publica en el broker y entrega los mensajes
+    recibidos a sus suscriptores con Subscription.deliver en el bucle de cada uno.
+    """
+    def subscribe(self, channel):
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+    def publish(self, channel, message):
+        raise NotImplementedError
+
+
+class InProcessHub(Hub):
+    """
+    Hub en memoria del proceso. publish() puede llamarse desde cualquier hilo: los mensajes
+    se entregan en el bucle de eventos de cada suscriptor con call_soon_threadsafe.
+    """
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.channel]
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            if not subscription.loop.is_closed():
+                subscription.loop.call_soon_threadsafe(subscription.deliver, message)
+        return len(subscribers)
+
+
+def get_hub():
+    global _hub
+    with _hub_lock:
+        if _hub is None:
+            _hub = import_string(FORUM_EVENTS_HUB)()
+    return _hub
+
+
+def publish_post(post):
+    """
+    Publica la publicación en el canal de su foro al confirmar la transacción.
+    """
+    transaction.on_commit(lambda: get_hub().publish(channel(post.forum_id), threads.serialize_post(post)))
+
+
+def format_event(message):
+    return f'id: {message["cursor"]}\nevent: post\ndata: {json.dumps(message)}\n\n'
+
+
+def newer_posts(forum_id, cursor):
+    """
+    Publicaciones posteriores al cursor, ya serializadas.
+    """
+    return [threads.serialize_post(post) for post in threads.load_newer(forum_id, cursor)]
+
+
+def pending_events(forum_id, cursor):
+    """
+    Eventos de las publicaciones posteriores a 'cursor', para los streams que terminan en
+    seguida (WSGI).
+    """
+    events = [f'retry: {FORUM_EVENTS_RETRY}\n\n']
+    if cursor:
+        events += [format_event(message) for message in newer_posts(forum_id, cursor)]
+    return events
+
+
+async def event_stream(forum_id, cursor):
+    """
+    Genera los eventos del foro: primero las publicaciones posteriores a 'cursor' y después
+    las que lleguen al hub, durante FORUM_EVENTS_MAX_AGE segundos.
+    """
+    subscription = get_hub().subscribe(channel(forum_id))
+    deadline = time.monotonic() + FORUM_EVENTS_MAX_AGE
+    last_id = 0
+    try:
+        yield f'retry: {FORUM_EVENTS_RETRY}\n\n'
+        catch_up = cursor is not None
+        while True:
+            if catch_up:
+                for message in await sync_to_async(newer_posts)(forum_id, cursor):
+                    cursor, last_id = message['cursor'], max(last_id, message['id'])
+                    yield format_event(message)
+                catch_up = False
+            if time.monotonic() >= deadline:
+                return
+            try:
+                message = await subscription.get(min(FORUM_EVENTS_KEEPALIVE, deadline - time.monotonic()))
+            except asyncio.TimeoutError:
+                # Recoge lo publicado en otros procesos y mantiene viva la conexión.
+                catch_up = cursor is not None
+                yield ': keepalive\n\n'
+                continue
+            if subscription.overflowed:
+                subscription.overflowed = False
+                catch_up = cursor is not None
+            if message['id'] > last_id:
+                cursor, last_id = message['cursor'], message['id']
+                yield format_event(message)
+    finally:
+        subscription.close()
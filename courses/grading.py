@@ -0,0 +1,44 @@
+"""
+grading.py
+
+Motor de calificación de exámenes. Calcula la nota de un intento uniendo las respuestas
+registradas (AttemptAnswer) con Answer.is_correct en una única consulta agregada.
+"""
+
+from django.db.models import Count, F, Q
+
+from .models import AttemptAnswer, Grade
+
+
+def score_attempt(attempt):
+    """
+    Devuelve (respuestas correctas, total de preguntas) del intento.
+    El total sale de la lista de preguntas guardada en el intento, sin consultar la base de datos.
+    """
+    result = AttemptAnswer.objects.filter(attempt=attempt).aggregate(
+        correct=Count('id', filter=Q(answer__is_correct=True, answer__question_id=F('question_id'))),
+    )
+    return result['correct'], attempt.total_questions
+
+
+def calculate_marks(attempt):
+    """
+    Calcula la nota del intento escalada a la puntuación total del examen.
+    """
+    correct, total = score_attempt(attempt)
+    if not total:
+        return 0
+    return round(correct * attempt.exam.total_marks / total)
+
+
+def finish_attempt(attempt):
+    """
+    Califica el intento, guarda la nota y lo marca como terminado. Como Grade(student, exam)
+    es único, un envío repetido devuelve la nota ya guardada en lugar de duplicarla.
+    """
+    grade, _ = Grade.objects.get_or_create(
+        student=attempt.student, exam=attempt.exam,
+        defaults={'marks_obtained': calculate_marks(attempt)},
+    )
+    attempt.finish()
+    return grade
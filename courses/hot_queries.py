@@ -0,0 +1,50 @@
+"""
+hot_queries.py
+
+Registro de las consultas más frecuentes de las vistas. El comando explain_hot_queries imprime
+el plan de ejecución de cada una para detectar regresiones de índices.
+"""
+
+from .models import Enrollment, ExamAttempt, Grade, Material, Post, User
+
+HOT_QUERIES = {}
+
+
+def register(name):
+    """
+    Decorador que registra una función sin argumentos que devuelve el queryset a analizar.
+    """
+    def decorator(func):
+        HOT_QUERIES[name] = func
+        return func
+    return decorator
+
+
+@register('grade_for_student_exam')
+def grade_for_student_exam():
+    return Grade.objects.filter(student_id=1, exam_id=1)
+
+
+@register('enrollment_for_student_course')
+def enrollment_for_student_course():
+    return Enrollment.objects.filter(student_id=1, course_id=1)
+
+
+@register('attempt_for_student_exam')
+def attempt_for_student_exam():
+    return ExamAttempt.objects.filter(student_id=1, exam_id=1)
+
+
+@register('forum_posts_by_time')
+def forum_posts_by_time():
+    return Post.objects.filter(forum_id=1).order_by('created_at', 'id')
+
+
+@register('instructor_materials')
+def instructor_materials():
+    return Material.objects.filter(course__instructor_id=1)
+
+
+@register('instructors')
+def instructors():
+    return User.objects.filter(role='instructor')
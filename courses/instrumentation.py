@@ -0,0 +1,122 @@
+"""
+instrumentation.py
+
+Instrumentación de SQL por petición: número de consultas, tiempo total en base de datos y
+consultas repetidas (por huella del SQL). Mantiene además un histograma móvil en memoria del
+proceso por nombre de URL.
+"""
+
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+QUERY_STATS_WINDOW = getattr(settings, 'QUERY_STATS_WINDOW', 500)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+_IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+
+
+def fingerprint(sql):
+    """
+    Normaliza el SQL para agrupar consultas equivalentes (las listas IN de distinto tamaño cuentan igual).
+    """
+    return _IN_LIST.sub('IN (...)', sql)
+
+
+class QueryRecorder:
+    """
+    Envoltorio de ejecución (connection.execute_wrapper) que acumula las estadísticas de las consultas.
+    """
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    @contextmanager
+    def record(self):
+        """
+        Registra las consultas de todas las conexiones mientras dura el bloque.
+        """
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+    @property
+    def duplicates(self):
+        """
+        Devuelve {huella: repeticiones} de las consultas ejecutadas más de una vez.
+        """
+        return {sql: count for sql, count in self.fingerprints.items() if count > 1}
+
+    def server_timing(self):
+        """
+        Devuelve el valor de la cabecera Server-Timing con las métricas de la petición.
+        """
+        metrics = [f'db;dur={self.duration * 1000:.2f};desc="{self.count} queries"']
+        duplicated = sum(self.duplicates.values())
+        if duplicated:
+            metrics.append(f'db-dup;desc="{duplicated} duplicated"')
+        return ', '.join(metrics)
+
+
+_lock = threading.Lock()
+_samples = defaultdict(lambda: deque(maxlen=QUERY_STATS_WINDOW))
+
+
+def record_request(url_name, recorder):
+    """
+    Añade las métricas de una petición al histograma móvil de su URL.
+    """
+    with _lock:
+        _samples[url_name].append((recorder.count, recorder.duration))
+
+
+def _bucket(count):
+    for limit in QUERY_COUNT_BUCKETS:
+        if count <= limit:
+            return f'<={limit}'
+    return f'>{QUERY_COUNT_BUCKETS[-1]}'
+
+
+def query_stats():
+    """
+    Devuelve, por nombre de URL, el histograma de número de consultas de las últimas peticiones
+    y el tiempo medio y máximo en base de datos (ms).
+    """
+    with _lock:
+        samples = {url_name: list(values) for url_name, values in _samples.items()}
+    stats = {}
+    for url_name, values in samples.items():
+        counts = [count for count, _ in values]
+        durations = [duration * 1000 for _, duration in values]
+        stats[url_name] = {
+            'requests': len(values),
+            'histogram': dict(Counter(_bucket(count) for count in counts)),
+            'max_queries': max(counts),
+            'avg_db_ms': round(sum(durations) / len(durations), 2),
+            'max_db_ms': round(max(durations), 2),
+        }
+    return stats
+
+
+def reset_query_stats():
+    """
+    Vacía el histograma de todas las URLs.
+    """
+    with _lock:
+        _samples.clear()
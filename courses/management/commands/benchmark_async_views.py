@@ -0,0 +1,145 @@
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.models import Course, Forum, User
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+# (nombre, aplicación de uvicorn, argumentos extra, ASYNC_VIEWS)
+SERVERS = [
+    ('WSGI síncrono', 'online_courses.wsgi:application', ['--interface', 'wsgi'], '0'),
+    ('ASGI asíncrono', 'online_courses.asgi:application', [], '1'),
+]
+
+
+class Command(BaseCommand):
+    """
+    Compara el rendimiento de las vistas de lectura servidas con WSGI (vistas síncronas en el
+    pool de hilos de uvicorn) y con ASGI (async_views.py), con muchas conexiones concurrentes.
+    Arranca un uvicorn local para cada modo sobre la base de datos configurada y reparte las
+    peticiones entre inicio, catálogo, un curso, sus foros y un hilo, con la sesión de un usuario.
+    """
+    help = 'Mide el rendimiento de las vistas de lectura con WSGI y con ASGI bajo carga concurrente.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=500)
+        parser.add_argument('--requests', type=int, default=5000)
+        parser.add_argument('--user', help='Usuario con el que se hacen las peticiones (por defecto, un administrador).')
+
+    def handle(self, *args, **options):
+        if aiohttp is None:
+            raise CommandError('El benchmark necesita aiohttp.')
+        user = self.get_user(options['user'])
+        paths = self.get_paths()
+        session = import_module(settings.SESSION_ENGINE).SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+        cookies = {settings.SESSION_COOKIE_NAME: session.session_key}
+        self.stdout.write(f'{options["requests"]} peticiones, {options["concurrency"]} conexiones, rutas: {", ".join(paths)}')
+        try:
+            for name, application, arguments, async_views in SERVERS:
+                port = self.free_port()
+                process = self.start_server(application, arguments, async_views, port)
+                try:
+                    result = asyncio.run(self.load(
+                        f'http://127.0.0.1:{port}', paths, cookies, options['requests'], options['concurrency'],
+                    ))
+                finally:
+                    process.terminate()
+                    process.wait()
+                self.stdout.write(
+                    f'{name}: {result["throughput"]:.0f} peticiones/s, p50 {result["p50"]:.0f} ms, '
+                    f'p99 {result["p99"]:.0f} ms, errores {result["errors"]}'
+                )
+        finally:
+            session.delete()
+
+    def get_user(self, username):
+        users = User.objects.all()
+        user = users.filter(username=username).first() if username else users.filter(is_superuser=True).first()
+        if user is None:
+            raise CommandError('No hay ningún usuario con el que medir; indícalo con --user.')
+        return user
+
+    def get_paths(self):
+        paths = ['/', '/list/']
+        forum = Forum.objects.order_by('-post_count').first()
+        course = forum.course if forum else Course.objects.first()
+        if course is not None:
+            paths += [f'/{course.pk}/', f'/course/{course.pk}/foros/']
+        if forum is not None:
+            paths.append(f'/forum/{forum.pk}/')
+        return paths
+
+    def free_port(self):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            return sock.getsockname()[1]
+
+    def start_server(self, application, arguments, async_views, port):
+        environment = {**os.environ, 'ASYNC_VIEWS': async_views}
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'uvicorn', application, '--port', str(port), '--log-level', 'warning',
+             '--no-access-log', '--backlog', '4096', *arguments],
+            env=environment, cwd=settings.BASE_DIR,
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                return process
+            except OSError:
+                time.sleep(0.2)
+        process.terminate()
+        raise CommandError(f'uvicorn no arrancó en el puerto {port}.')
+
+    async def load(self, base_url, paths, cookies, total, concurrency):
+        timeout = aiohttp.ClientTimeout(total=120)
+        connector = aiohttp.TCPConnector(limit=concurrency)
+        async with aiohttp.ClientSession(base_url, cookies=cookies, connector=connector, timeout=timeout) as client:
+            # Calentamiento: carga la aplicación y llena las cachés.
+            for path in paths:
+                async with client.get(path) as response:
+                    await response.read()
+
+            latencies, errors = [], 0
+            counter = iter(range(total))
+
+            async def worker():
+                nonlocal errors
+                for n in counter:
+                    start = time.perf_counter()
+                    try:
+                        async with client.get(paths[n % len(paths)], allow_redirects=False) as response:
+                            await response.read()
+                            if response.status != 200:
+                                errors += 1
+                    except (aiohttp.ClientError, asyncio.TimeoutError):
+                        errors += 1
+                    latencies.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - start
+        latencies.sort()
+        return {
+            'throughput': total / elapsed,
+            'p50': statistics.median(latencies),
+            'p99': latencies[int(len(latencies) * 0.99) - 1],
+            'errors': errors,
+        }
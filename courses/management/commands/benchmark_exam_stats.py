@@ -0,0 +1,46 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from courses import exam_stats
+
+
+class Command(BaseCommand):
+    """
+    Mide el cálculo vectorizado de exam_stats con datos sintéticos, sin base de datos:
+    construcción de la matriz de aciertos, resumen de notas y análisis de ítems.
+    """
+    help = 'Mide las estadísticas de exámenes con un número grande de intentos sintéticos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--attempts', type=int, default=100_000)
+        parser.add_argument('--questions', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        attempts, questions = options['attempts'], options['questions']
+        rng = np.random.default_rng(options['seed'])
+        attempt_ids = np.arange(1, attempts + 1, dtype=np.int64)
+        question_ids = np.arange(1, questions + 1, dtype=np.int64)
+        # Cada intento acierta cada pregunta con una probabilidad que depende de su habilidad.
+        ability = rng.random((attempts, 1))
+        correct = rng.random((attempts, questions)) < ability
+        rows, cols = np.nonzero(correct)
+        pairs = np.column_stack([attempt_ids[rows], question_ids[cols]])
+        marks = correct.sum(axis=1).astype(np.float64)
+
+        timings = []
+        for _ in range(options['repeat']):
+            start = time.perf_counter()
+            matrix = exam_stats.response_matrix(attempt_ids, question_ids, pairs)
+            exam_stats.grade_summary(marks, questions)
+            result = exam_stats.item_analysis(matrix)
+            timings.append(time.perf_counter() - start)
+
+        self.stdout.write(
+            f'{attempts} intentos × {questions} preguntas ({len(pairs)} aciertos): '
+            f'mejor {min(timings) * 1000:.1f} ms, mediana {np.median(timings) * 1000:.1f} ms; '
+            f'alfa de Cronbach {result["cronbach_alpha"]:.3f}'
+        )
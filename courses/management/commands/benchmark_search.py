@@ -0,0 +1,66 @@
+import itertools
+import random
+import statistics
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+
+from courses import search
+from courses.models import Course, SearchEntry, User
+
+# Vocabulario sintético con frecuencias de Zipf, como el texto real: unas pocas palabras
+# aparecen en casi todas las publicaciones y la mayoría en muy pocas.
+VOCABULARY = [f'palabra{n}' for n in range(20_000)]
+CUMULATIVE_WEIGHTS = list(itertools.accumulate(1 / (n + 1) for n in range(len(VOCABULARY))))
+QUERIES = ('palabra0', 'palabra50', 'palabra5000', 'palabra0 palabra1')
+
+
+class Command(BaseCommand):
+    """
+    Mide la búsqueda de texto completo sobre publicaciones sintéticas, comparada con un
+    LIKE '%texto%'. Los datos se crean dentro de una transacción que se deshace al final.
+    """
+    help = 'Mide la búsqueda de texto completo con un número grande de publicaciones sintéticas.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=100_000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with transaction.atomic():
+            admin = User(username='benchmark_search', role='admin', is_superuser=True)
+            admin.save()
+            course = Course.objects.create(
+                title='Benchmark', description='', start_date=date.today(), end_date=date.today(), instructor=admin,
+            )
+            first = (SearchEntry.objects.aggregate(last=Max('object_id'))['last'] or 0) + 1
+            start = time.perf_counter()
+            SearchEntry.objects.bulk_create(
+                (
+                    SearchEntry(kind='post', object_id=n, course=course, body=' '.join(rng.choices(VOCABULARY, cum_weights=CUMULATIVE_WEIGHTS, k=30)))
+                    for n in range(first, first + options['posts'])
+                ),
+                batch_size=search.BATCH_SIZE,
+            )
+            self.stdout.write(f'{options["posts"]} publicaciones indexadas en {time.perf_counter() - start:.1f} s.')
+
+            for text in QUERIES:
+                fts = self.measure(lambda: search.search(text, admin), options['repeat'])
+                like = self.measure(
+                    lambda: search._search_fallback(text, None, search.SEARCH_PAGE_SIZE, 0), options['repeat'],
+                )
+                self.stdout.write(f'"{text}": índice {fts:.1f} ms, LIKE {like:.1f} ms (mediana)')
+            transaction.set_rollback(True)
+
+    def measure(self, function, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
@@ -0,0 +1,68 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from courses.models import Answer, Course, Exam, Question, User
+
+# (nombre, SESSION_ENGINE, MESSAGE_STORAGE)
+CONFIGURATIONS = [
+    ('db + mensajes en sesión', 'django.contrib.sessions.backends.db', 'django.contrib.messages.storage.session.SessionStorage'),
+    ('db + fallback', 'django.contrib.sessions.backends.db', 'django.contrib.messages.storage.fallback.FallbackStorage'),
+    ('cached_db + cookie firmada', 'django.contrib.sessions.backends.cached_db', 'django.contrib.messages.storage.cookie.CookieStorage'),
+]
+
+
+class Command(BaseCommand):
+    """
+    Mide las consultas a django_session de un estudiante que responde un examen pregunta a
+    pregunta (POST de la respuesta con su mensaje flash y GET de la siguiente pregunta) con
+    varias configuraciones de sesiones y mensajes. Los datos se crean dentro de una transacción
+    que se deshace al final.
+    """
+    help = 'Compara las lecturas y escrituras de sesión por respuesta de examen según el motor de sesiones.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questions', type=int, default=50)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            instructor = User.objects.create_user('benchmark_profe', 'benchmark_profe@example.com', role='instructor')
+            course = Course.objects.create(
+                title='Benchmark', description='', start_date='2024-01-01', end_date='2024-12-31', instructor=instructor,
+            )
+            exam = Exam.objects.create(title='Benchmark', course=course, total_marks=options['questions'], duration=600)
+            answers = []
+            for n in range(options['questions']):
+                question = Question.objects.create(text=f'P{n}', exam=exam, question_type='multiple_choice')
+                answers.append(Answer.objects.create(text='Sí', question=question, is_correct=n % 2 == 0))
+                Answer.objects.create(text='No', question=question, is_correct=n % 2 == 1)
+
+            for number, (name, engine, storage) in enumerate(CONFIGURATIONS):
+                student = User.objects.create_user(f'benchmark_alumno{number}', f'benchmark_alumno{number}@example.com')
+                with override_settings(SESSION_ENGINE=engine, MESSAGE_STORAGE=storage, ALLOWED_HOSTS=['testserver']):
+                    result = self.measure(Client(), student, exam, answers)
+                self.stdout.write(
+                    f'{name}: por respuesta {result["reads"]:.2f} lecturas y {result["writes"]:.2f} '
+                    f'escrituras de sesión, {result["ms"]:.1f} ms (mediana)'
+                )
+            transaction.set_rollback(True)
+
+    def measure(self, client, student, exam, answers):
+        client.force_login(student)
+        client.get(f'/exam/{exam.pk}/question/1/')
+        reads = writes = 0
+        timings = []
+        for number, answer in enumerate(answers, start=1):
+            start = time.perf_counter()
+            with CaptureQueriesContext(connection) as queries:
+                response = client.post(f'/exam/{exam.pk}/question/{number}/', {'answer': answer.pk})
+                client.get(response['Location'])
+            timings.append((time.perf_counter() - start) * 1000)
+            statements = [query['sql'] for query in queries if '"django_session"' in query['sql']]
+            reads += sum(sql.startswith('SELECT') for sql in statements)
+            writes += len(statements) - sum(sql.startswith('SELECT') for sql in statements)
+        return {'reads': reads / len(answers), 'writes': writes / len(answers), 'ms': statistics.median(timings)}
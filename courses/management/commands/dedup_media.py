@@ -0,0 +1,119 @@
+import os
+import shutil
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from courses import storage
+from courses.models import MediaBlob
+
+
+class Command(BaseCommand):
+    """
+    Deduplica en el sitio los archivos ya subidos de los campos que usan DedupStorage: cada
+    contenido se guarda una vez como blob del storage del campo, las filas pasan a apuntar al blob
+    y las copias se borran. Los materiales que aún están en MEDIA_ROOT se trasladan así a
+    PROTECTED_MEDIA_ROOT.
+    """
+    help = 'Deduplica por contenido los archivos de materiales, imágenes de curso y fotos de perfil.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Solo muestra lo que se haría.')
+        parser.add_argument('--prune', action='store_true', help='Elimina los blobs que ninguna fila referencia.')
+        parser.add_argument(
+            '--prune-age', type=int, default=3600,
+            help='Segundos que debe tener un blob sin referencias para eliminarlo (una subida en curso aún no la suma).',
+        )
+
+    def handle(self, *args, **options):
+        public = storage.media_storage
+        # renames: {(modelo, campo): {nombre: blob}}; blobs: {blob: (storage, hash, tamaño, ruta de origen)}
+        renames, blobs, moved, saved = {}, {}, [], 0
+        for model, field in storage.dedup_fields():
+            target = storage.field_storage(model, field)
+            directory = model._meta.get_field(field).upload_to
+            # Los materiales subidos antes de ProtectedStorage siguen en MEDIA_ROOT: se buscan
+            # también allí y se trasladan a PROTECTED_MEDIA_ROOT.
+            media_storages = [target] if target is public else [target, public]
+            names = {}
+            for media in media_storages:
+                if media.exists(directory):
+                    for name in self.walk(media, directory):
+                        names.setdefault(name, media)
+            for name in (
+                model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+                .values_list(field, flat=True).distinct()
+            ):
+                if name in names or target.owns(name):
+                    continue
+                media = next((media for media in media_storages if media.exists(name)), None)
+                if media is not None:
+                    names[name] = media
+
+            field_renames = renames[(model, field)] = {}
+            for name, media in sorted(names.items()):
+                path = media.path(name)
+                digest = storage.hash_file(path)
+                blob = target.blob_name(digest, name)
+                size = os.path.getsize(path)
+                if blob in blobs or target.exists(blob):
+                    saved += size
+                blobs.setdefault(blob, (target, digest, size, path))
+                field_renames[name] = blob
+                moved.append((media, name))
+
+        self.stdout.write(
+            f'{len(moved)} archivos, {len(blobs)} contenidos distintos, {saved / 1024 / 1024:.1f} MB duplicados.'
+        )
+        if options['dry_run']:
+            return
+
+        for blob, (target, _, _, source) in blobs.items():
+            if not target.exists(blob):
+                os.makedirs(os.path.dirname(target.path(blob)), exist_ok=True)
+                shutil.copy2(source, target.path(blob))
+
+        with transaction.atomic():
+            for blob, (_, digest, size, _) in blobs.items():
+                MediaBlob.objects.get_or_create(name=blob, defaults={'digest': digest, 'size': size})
+            updated = sum(
+                model.objects.filter(**{field: name}).update(**{field: blob})
+                for (model, field), field_renames in renames.items() for name, blob in field_renames.items()
+            )
+            storage.recount_blobs()
+            # Las copias originales solo se borran cuando las filas ya apuntan a los blobs. Un
+            # blob público que deja de usarse (el de un material trasladado) se borra como tal.
+            copies = [(media, name) for media, name in moved if not storage.is_blob(name)]
+            unused = list(MediaBlob.objects.filter(
+                name__in=[name for _, name in moved if storage.is_blob(name)], ref_count=0,
+            ).values_list('name', flat=True))
+            MediaBlob.objects.filter(name__in=unused).delete()
+            transaction.on_commit(lambda: self.remove(copies, unused))
+
+        pruned = 0
+        if options['prune']:
+            cutoff = timezone.now() - timedelta(seconds=options['prune_age'])
+            for blob in MediaBlob.objects.filter(ref_count=0, created_at__lt=cutoff):
+                blob.delete()
+                storage.blob_storage(blob.name).remove_unused(blob.name)
+                pruned += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'{updated} referencias actualizadas, {len(moved)} archivos sustituidos por blobs, '
+            f'{pruned} blobs sin uso eliminados.'
+        ))
+
+    def walk(self, media, directory):
+        directories, files = media.listdir(directory)
+        for name in files:
+            yield f'{directory.rstrip("/")}/{name}'
+        for subdirectory in directories:
+            yield from self.walk(media, f'{directory.rstrip("/")}/{subdirectory}')
+
+    def remove(self, copies, unused):
+        for media, name in copies:
+            if media.exists(name):
+                os.remove(media.path(name))
+        for name in unused:
+            storage.blob_storage(name).remove_unused(name)
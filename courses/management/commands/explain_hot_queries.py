@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.hot_queries import HOT_QUERIES
+
+
+def full_scans(plan):
+    """
+    Devuelve las líneas del plan de SQLite que recorren una tabla completa sin índice.
+    """
+    return [
+        line.strip(' -|`') for line in plan.splitlines()
+        if 'SCAN' in line and 'USING' not in line
+    ]
+
+
+class Command(BaseCommand):
+    """
+    Imprime EXPLAIN QUERY PLAN de cada consulta registrada en courses.hot_queries.
+    """
+    help = 'Muestra el plan de ejecución de las consultas frecuentes registradas.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help='Consultas a analizar (por defecto, todas).')
+        parser.add_argument(
+            '--strict', action='store_true',
+            help='Termina con error si alguna consulta recorre una tabla completa sin índice.',
+        )
+
+    def handle(self, *args, **options):
+        names = options['names'] or sorted(HOT_QUERIES)
+        unknown = set(names) - set(HOT_QUERIES)
+        if unknown:
+            raise CommandError(f'Consultas desconocidas: {", ".join(sorted(unknown))}')
+
+        regressions = []
+        for name in names:
+            queryset = HOT_QUERIES[name]()
+            plan = queryset.explain()
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(str(queryset.query))
+            self.stdout.write(plan)
+            self.stdout.write('')
+            scans = full_scans(plan)
+            if scans:
+                regressions.append(f'{name}: {"; ".join(scans)}')
+
+        if regressions and options['strict']:
+            raise CommandError('Consultas sin índice:\n' + '\n'.join(regressions))
+        for regression in regressions:
+            self.stdout.write(self.style.WARNING(regression))
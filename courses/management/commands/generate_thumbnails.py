@@ -0,0 +1,21 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from courses import thumbnails
+
+
+class Command(BaseCommand):
+    """
+    Genera en el pool de hilos las miniaturas que falten de las imágenes ya subidas.
+    """
+    help = 'Genera las miniaturas de las imágenes de curso y fotos de perfil existentes.'
+
+    def handle(self, *args, **options):
+        names = set()
+        for label, field in thumbnails.IMAGE_FIELDS:
+            names.update(
+                apps.get_model(label).objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+                .values_list(field, flat=True)
+            )
+        created = sum(len(result) for result in thumbnails.executor().map(thumbnails.generate, sorted(names)))
+        self.stdout.write(self.style.SUCCESS(f'{created} miniaturas generadas para {len(names)} imágenes.'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from courses import search
+
+
+class Command(BaseCommand):
+    """
+    Reconstruye el índice de búsqueda de cursos, materiales, foros y publicaciones.
+    """
+    help = 'Reconstruye el índice de búsqueda de texto completo.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--no-pdf', action='store_true', help='No extrae el texto de los PDF.')
+
+    def handle(self, *args, **options):
+        total = search.rebuild(extract_pdfs=not options['no_pdf'])
+        self.stdout.write(self.style.SUCCESS(f'Índice de búsqueda reconstruido: {total} documentos.'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from courses import counters
+
+
+class Command(BaseCommand):
+    """
+    Reconstruye en bloque los contadores desnormalizados de cursos y foros.
+    """
+    help = 'Recalcula los contadores de inscripciones, exámenes y publicaciones.'
+
+    def handle(self, *args, **options):
+        courses = counters.recount_courses()
+        forums = counters.recount_forums()
+        self.stdout.write(self.style.SUCCESS(f'Contadores recalculados: {courses} cursos, {forums} foros.'))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from courses import analytics
+
+
+class Command(BaseCommand):
+    """
+    Recalcula las tablas de resumen que leen los dashboards. Pensado para ejecutarse
+    periódicamente (p. ej. cada hora desde cron).
+    """
+    help = 'Agrega inscripciones, notas y actividad en las tablas de resumen de los dashboards.'
+
+    def handle(self, *args, **options):
+        counts = analytics.refresh_all()
+        summary = ', '.join(f'{name}: {rows}' for name, rows in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'Analítica actualizada ({summary}).'))
@@ -0,0 +1,46 @@
+import re
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+# Claves que las versiones anteriores guardaban en la sesión; el progreso de los exámenes
+# está ahora en ExamAttempt.
+LEGACY_KEYS = re.compile(r'^exam_\d+_')
+
+
+class Command(BaseCommand):
+    """
+    Elimina de las sesiones guardadas las claves de exámenes de versiones anteriores y borra
+    las sesiones caducadas. Las sesiones se reescriben con el motor configurado, de modo que
+    con cached_db también se actualiza la caché.
+    """
+    help = 'Quita de las sesiones las claves antiguas de exámenes y borra las sesiones caducadas.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Solo muestra lo que se haría.')
+
+    def handle(self, *args, **options):
+        engine = import_module(settings.SESSION_ENGINE)
+        sessions = Session.objects.filter(expire_date__gt=timezone.now())
+        trimmed = removed = 0
+        for session in sessions.iterator(chunk_size=2000):
+            stale = [key for key in session.get_decoded() if LEGACY_KEYS.match(key)]
+            if not stale:
+                continue
+            trimmed += 1
+            removed += len(stale)
+            if not options['dry_run']:
+                store = engine.SessionStore(session_key=session.session_key)
+                for key in stale:
+                    store.pop(key, None)
+                store.save()
+        expired = Session.objects.filter(expire_date__lte=timezone.now()).count()
+        if not options['dry_run']:
+            engine.SessionStore.clear_expired()
+        prefix = 'Se recortarían' if options['dry_run'] else 'Recortadas'
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix} {trimmed} sesiones ({removed} claves de exámenes); {expired} sesiones caducadas.'
+        ))
@@ -0,0 +1,47 @@
+"""
+middleware.py
+
+Middleware de la aplicación de cursos.
+"""
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .instrumentation import QueryRecorder, record_request
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Mide las consultas SQL de cada petición, las acumula en el histograma de su URL y, si
+    SERVER_TIMING_HEADERS está activo, las expone en la cabecera Server-Timing.
+    Admite los dos modos: con ASGI no obliga a Django a ejecutar las vistas asíncronas en un hilo.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = QueryRecorder()
+        with recorder.record():
+            response = self.get_response(request)
+        return self.finish(request, response, recorder)
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder()
+        with recorder.record():
+            response = await self.get_response(request)
+        return self.finish(request, response, recorder)
+
+    def finish(self, request, response, recorder):
+        match = getattr(request, 'resolver_match', None)
+        if match is not None:
+            record_request(match.view_name, recorder)
+        if getattr(settings, 'SERVER_TIMING_HEADERS', settings.DEBUG):
+            response['Server-Timing'] = recorder.server_timing()
+        return response
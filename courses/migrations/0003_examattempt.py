@@ -0,0 +1,72 @@
+# Generated by Django 5.0.1 on 2026-10-17 02:15
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def copy_student_answers(apps, schema_editor):
+    """
+    Agrupa las StudentAnswer existentes en intentos por (estudiante, examen).
+    """
+    StudentAnswer = apps.get_model('courses', 'StudentAnswer')
+    ExamAttempt = apps.get_model('courses', 'ExamAttempt')
+    AttemptAnswer = apps.get_model('courses', 'AttemptAnswer')
+    Question = apps.get_model('courses', 'Question')
+    Grade = apps.get_model('courses', 'Grade')
+
+    attempts = {}
+    for row in StudentAnswer.objects.order_by('pk').iterator():
+        key = (row.student_id, row.exam_id)
+        if key not in attempts:
+            question_ids = list(Question.objects.filter(exam_id=row.exam_id).order_by('pk').values_list('pk', flat=True))
+            finished = Grade.objects.filter(student_id=row.student_id, exam_id=row.exam_id).exists()
+            attempts[key] = ExamAttempt.objects.create(
+                student_id=row.student_id, exam_id=row.exam_id, question_ids=question_ids,
+                finished_at=row.answered_at if finished else None,
+            )
+        AttemptAnswer.objects.create(
+            attempt=attempts[key], question_id=row.question_id, answer_id=row.answer_id, answered_at=row.answered_at,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0002_studentanswer'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExamAttempt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('question_ids', models.JSONField(default=list)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attempts', to='courses.exam')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exam_attempts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('student', 'exam')},
+            },
+        ),
+        migrations.CreateModel(
+            name='AttemptAnswer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('answered_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('answer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attempt_answers', to='courses.answer')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attempt_answers', to='courses.question')),
+                ('attempt', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='answers', to='courses.examattempt')),
+            ],
+            options={
+                'unique_together': {('attempt', 'question')},
+            },
+        ),
+        migrations.RunPython(copy_student_answers, migrations.RunPython.noop),
+        migrations.DeleteModel(
+            name='StudentAnswer',
+        ),
+    ]
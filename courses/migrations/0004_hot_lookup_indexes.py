@@ -0,0 +1,59 @@
+# Generated by Django 5.0.1 on 2026-10-17 02:19
+
+import logging
+
+from django.db import migrations, models
+from django.db.models import Count
+
+logger = logging.getLogger(__name__)
+
+
+def remove_duplicate_grades(apps, schema_editor):
+    """
+    Deja una sola nota por (estudiante, examen) antes de crear la restricción única: la de más
+    puntos (con empate, la más antigua), para no bajar la nota de nadie. Las notas borradas se
+    registran con sus ids. No es reversible.
+    """
+    Grade = apps.get_model('courses', 'Grade')
+    duplicated = (
+        Grade.objects.values('student', 'exam').annotate(total=Count('id')).filter(total__gt=1).order_by()
+    )
+    removed = []
+    for pair in duplicated:
+        ids = Grade.objects.filter(student=pair['student'], exam=pair['exam']).order_by(
+            '-marks_obtained', 'start_time', 'id',
+        ).values_list('id', flat=True)
+        removed.extend(list(ids)[1:])
+    if not removed:
+        return
+    logger.warning('Se eliminan %d notas duplicadas (ids: %s)', len(removed), ', '.join(map(str, removed)))
+    for start in range(0, len(removed), 500):
+        Grade.objects.filter(id__in=removed[start:start + 500]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('courses', '0003_examattempt'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='material',
+            index=models.Index(fields=['course', '-uploaded_at'], name='material_course_uploaded_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['forum', 'created_at', 'id'], name='post_forum_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role'], name='user_role_idx'),
+        ),
+        migrations.RunPython(remove_duplicate_grades, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='grade',
+            constraint=models.UniqueConstraint(fields=('student', 'exam'), name='unique_grade_per_student_exam'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.0.1 on 2026-10-17 02:26
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0005_activity_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseActivityStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('active_students', models.PositiveIntegerField(default=0)),
+                ('refreshed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='activity_stat', to='courses.course')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ExamGradeStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('graded', models.PositiveIntegerField(default=0)),
+                ('average', models.FloatField(default=0)),
+                ('distribution', models.JSONField(default=list)),
+                ('refreshed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('exam', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='grade_stat', to='courses.exam')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyEnrollmentStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('enrollments', models.PositiveIntegerField(default=0)),
+                ('course', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_enrollment_stats', to='courses.course')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date', 'course'], name='enrollment_stat_date_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailyenrollmentstat',
+            constraint=models.UniqueConstraint(fields=('course', 'date'), name='unique_daily_enrollment_stat'),
+        ),
+    ]
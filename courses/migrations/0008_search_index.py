@@ -0,0 +1,75 @@
+# Generated by Django 5.0.1 on 2026-10-17 02:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+SQLITE_INDEX = [
+    """CREATE VIRTUAL TABLE courses_searchentry_fts USING fts5(
+        title, body, content='courses_searchentry', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER courses_searchentry_ai AFTER INSERT ON courses_searchentry BEGIN
+        INSERT INTO courses_searchentry_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END""",
+    """CREATE TRIGGER courses_searchentry_ad AFTER DELETE ON courses_searchentry BEGIN
+        INSERT INTO courses_searchentry_fts(courses_searchentry_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+    END""",
+    """CREATE TRIGGER courses_searchentry_au AFTER UPDATE OF title, body ON courses_searchentry BEGIN
+        INSERT INTO courses_searchentry_fts(courses_searchentry_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO courses_searchentry_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END""",
+]
+SQLITE_DROP = [
+    'DROP TRIGGER IF EXISTS courses_searchentry_ai',
+    'DROP TRIGGER IF EXISTS courses_searchentry_ad',
+    'DROP TRIGGER IF EXISTS courses_searchentry_au',
+    'DROP TABLE IF EXISTS courses_searchentry_fts',
+]
+POSTGRESQL_INDEX = [
+    """CREATE INDEX courses_searchentry_tsv ON courses_searchentry USING GIN ((
+        setweight(to_tsvector('spanish', title), 'A') || setweight(to_tsvector('spanish', body), 'B')
+    ))""",
+]
+POSTGRESQL_DROP = ['DROP INDEX IF EXISTS courses_searchentry_tsv']
+
+
+def run_for_vendor(statements):
+    """
+    Ejecuta las sentencias del motor de base de datos actual; en otros motores no hace nada
+    y la búsqueda recurre a icontains.
+    """
+    def run(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0007_dedup_media_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('course', 'Curso'), ('material', 'Material'), ('forum', 'Foro'), ('post', 'Publicación')], max_length=10)),
+                ('object_id', models.PositiveIntegerField()),
+                ('title', models.CharField(blank=True, max_length=255)),
+                ('body', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='courses.course')),
+            ],
+            options={
+                'unique_together': {('kind', 'object_id')},
+            },
+        ),
+        migrations.RunPython(
+            run_for_vendor({'sqlite': SQLITE_INDEX, 'postgresql': POSTGRESQL_INDEX}),
+            run_for_vendor({'sqlite': SQLITE_DROP, 'postgresql': POSTGRESQL_DROP}),
+        ),
+    ]
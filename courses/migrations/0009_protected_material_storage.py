@@ -0,0 +1,19 @@
+# Generated by Django 5.0.1 on 2026-10-17 03:41
+
+import courses.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0008_search_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='material',
+            name='file',
+            field=models.FileField(blank=True, null=True, storage=courses.storage.get_protected_storage, upload_to='materials/'),
+        ),
+    ]
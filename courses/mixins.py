@@ -1,11 +1,123 @@
-from django.core.exceptions import PermissionDenied
-from django.shortcuts import redirect
+import inspect
+import logging
 
-class RoleRequiredMixin(UserPassesTestMixin):
-    required_role = None
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.mixins import UserPassesTestMixin
+from django.shortcuts import render
+
+from .authorization import get_access
+from .instrumentation import QueryRecorder
+
+logger = logging.getLogger(__name__)
+
+
+class AuthorizationMixin(UserPassesTestMixin):
+    """
+    Base de los mixins de acceso. La regla se define en has_permission(access) con el
+    AccessContext de la petición (authorization.py); si necesita el objeto de la vista lo pide
+    a get_object(), que lo memoiza, de modo que la vista no vuelve a consultarlo al renderizar.
+    Sin permiso se muestra la página 404.html.
+    """
+    @property
+    def access(self):
+        return get_access(self.request)
 
     def test_func(self):
-        return self.request.user.role == self.required_role
+        return self.has_permission(self.access)
+
+    def has_permission(self, access):
+        return True
+
+    def get_object(self, queryset=None):
+        if queryset is not None:
+            return super().get_object(queryset)
+        if '_object' not in self.__dict__:
+            self._object = super().get_object()
+        return self._object
 
     def handle_no_permission(self):
-        return redirect('404')  # Asegúrate de que '404' es el nombre correcto de tu vista de error 404.
+        return render(self.request, '404.html')
+
+
+class RoleRequiredMixin(AuthorizationMixin):
+    """
+    Exige uno de los roles de required_role (un rol o una tupla de roles). Con allow_superuser
+    los superusuarios pasan aunque tengan otro rol.
+    """
+    required_role = None
+    allow_superuser = False
+
+    def has_permission(self, access):
+        roles = (self.required_role,) if isinstance(self.required_role, str) else tuple(self.required_role or ())
+        return access.role in roles or (self.allow_superuser and access.is_superuser)
+
+
+class SuperuserRequiredMixin(AuthorizationMixin):
+    """
+    Restringe la vista a los superusuarios.
+    """
+    def has_permission(self, access):
+        return access.is_superuser
+
+
+class StudentAccessMixin(AuthorizationMixin):
+    """
+    Mixin para restringir el acceso de los estudiantes.
+    """
+    def has_permission(self, access):
+        return access.role != 'student'
+
+
+class QueryBudgetExceeded(Exception):
+    """
+    Se lanza cuando una vista supera su presupuesto de consultas y QUERY_BUDGET_STRICT está activo.
+    """
+
+class QueryBudgetMixin:
+    """
+    Mixin para declarar el número máximo de consultas SQL de una vista (query_budget), incluido
+    el renderizado de la plantilla. Si se supera, registra un aviso con las consultas repetidas;
+    con QUERY_BUDGET_STRICT (p. ej. en las pruebas) lanza QueryBudgetExceeded.
+    Debe ir antes que los demás mixins para medir también sus comprobaciones.
+    """
+    query_budget = None
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.query_budget is None:
+            return super().dispatch(request, *args, **kwargs)
+        if self.view_is_async:
+            return self.adispatch(request, *args, **kwargs)
+
+        recorder = QueryRecorder()
+        with recorder.record():
+            response = super().dispatch(request, *args, **kwargs)
+            if hasattr(response, 'render') and not response.is_rendered:
+                response.render()
+        self.check_query_budget(recorder)
+        return response
+
+    async def adispatch(self, request, *args, **kwargs):
+        """
+        dispatch() de las vistas asíncronas: la plantilla se renderiza en un hilo, porque sus
+        procesadores de contexto y los querysets perezosos consultan la base de datos.
+        """
+        recorder = QueryRecorder()
+        with recorder.record():
+            response = super().dispatch(request, *args, **kwargs)
+            if inspect.isawaitable(response):
+                response = await response
+            if hasattr(response, 'render') and not response.is_rendered:
+                await sync_to_async(response.render)()
+        self.check_query_budget(recorder)
+        return response
+
+    def check_query_budget(self, recorder):
+        if recorder.count > self.query_budget:
+            message = (
+                f'{type(self).__name__} ejecutó {recorder.count} consultas '
+                f'(presupuesto: {self.query_budget}); repetidas: {recorder.duplicates}'
+            )
+            if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
@@ -1,5 +1,8 @@
 from django.contrib.auth.models import AbstractUser, BaseUserManager, Group, Permission
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
+
+from .storage import get_media_storage, get_protected_storage
 
 class UserManager(BaseUserManager):
     """
@@ -34,6 +37,36 @@ class UserManager(BaseUserManager):
 
         return self.create_user(username, email, password, **extra_fields)
 
+class CounterFieldsMixin:
+    """
+    Mixin para modelos con contadores desnormalizados (ver counters.py). Los contadores solo
+    se modifican con UPDATE ... F(), así que save() de una instancia existente no los escribe
+    y no pisa con valores leídos antes los incrementos hechos mientras tanto.
+    """
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and not kwargs.get('force_insert') and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
+
+class CountedMixin:
+    """
+    Mixin para modelos que alimentan contadores desnormalizados. Guarda y elimina dentro de
+    una transacción para que las señales que ajustan los contadores se confirmen o se
+    reviertan junto con la fila.
+    """
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            return super().delete(*args, **kwargs)
+
 class User(AbstractUser):
     """
     Modelo personalizado de usuario que incluye roles adicionales y campos relacionados.
@@ -46,10 +79,15 @@ class User(AbstractUser):
     role = models.CharField(max_length=10, choices=ROLE_CHOICES, default='student')
     groups = models.ManyToManyField(Group, related_name='custom_user_set')
     user_permissions = models.ManyToManyField(Permission, related_name='custom_user_set')
-    profile_picture = models.ImageField(upload_to='profile_pictures/', null=True, blank=True)
+    profile_picture = models.ImageField(upload_to='profile_pictures/', storage=get_media_storage, null=True, blank=True)
 
     objects = UserManager()
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(fields=['role'], name='user_role_idx'),
+        ]
+
     def save(self, *args, **kwargs):
         """
         Sobrescribe el método save para asegurarse de que los superusuarios tengan el rol de administrador.
@@ -58,7 +96,7 @@ class User(AbstractUser):
             self.role = 'admin'
         super().save(*args, **kwargs)
 
-class Course(models.Model):
+class Course(CounterFieldsMixin, models.Model):
     """
     Modelo para los cursos.
     """
@@ -67,8 +105,12 @@ class Course(models.Model):
     start_date = models.DateField()
     end_date = models.DateField()
     instructor = models.ForeignKey(User, on_delete=models.CASCADE, limit_choices_to={'role': 'instructor'})
-    image = models.ImageField(upload_to='course_images/', null=True, blank=True)
+    image = models.ImageField(upload_to='course_images/', storage=get_media_storage, null=True, blank=True)
     video_url = models.URLField(blank=True, null=True)
+    enrollment_count = models.PositiveIntegerField(default=0, editable=False)
+    exam_count = models.PositiveIntegerField(default=0, editable=False)
+
+    counter_fields = ('enrollment_count', 'exam_count')
 
     def __str__(self):
         return self.title
@@ -92,7 +134,7 @@ class Course(models.Model):
             return f"https://img.youtube.com/vi/{youtube_id}/0.jpg"
         return None
 
-class Enrollment(models.Model):
+class Enrollment(CountedMixin, models.Model):
     """
     Modelo para las inscripciones de los estudiantes en los cursos.
     """
@@ -140,9 +182,14 @@ class Material(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='materials')
     file_type = models.CharField(max_length=50)
     uploaded_at = models.DateTimeField(auto_now_add=True)
-    file = models.FileField(upload_to='materials/', blank=True, null=True)
+    file = models.FileField(upload_to='materials/', storage=get_protected_storage, blank=True, null=True)
     video_url = models.URLField(max_length=200, blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['course', '-uploaded_at'], name='material_course_uploaded_idx'),
+        ]
+
     @staticmethod
     def extract_youtube_id(url):
         """
@@ -165,7 +212,7 @@ class Material(models.Model):
         """
         return self.extract_youtube_id(self.video_url)
 
-class Exam(models.Model):
+class Exam(CountedMixin, models.Model):
     """
     Modelo para los exámenes.
     """
@@ -203,6 +250,113 @@ class Answer(models.Model):
     def __str__(self):
         return self.text
     
+
+class ExamAttemptManager(models.Manager):
+    """
+    Manager para ExamAttempt con el método para iniciar o reanudar un intento.
+    """
+    def start(self, student, exam):
+        """
+        Devuelve el intento del estudiante en el examen, creándolo si no existe. Al crearlo
+        guarda la lista ordenada de ids de las preguntas para no volver a cargarla.
+        """
+        attempt = self.filter(student=student, exam=exam).first()
+        if attempt is None:
+            question_ids = list(exam.questions.order_by('pk').values_list('pk', flat=True))
+            attempt, _ = self.get_or_create(student=student, exam=exam, defaults={'question_ids': question_ids})
+        attempt.student = student
+        attempt.exam = exam
+        return attempt
+
+
+class ExamAttempt(models.Model):
+    """
+    Modelo para el intento de un estudiante en un examen. Conserva el orden de las preguntas
+    y la hora de inicio, de modo que el intento sobrevive a la pérdida de la sesión.
+    """
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='exam_attempts')
+    exam = models.ForeignKey(Exam, on_delete=models.CASCADE, related_name='attempts')
+    question_ids = models.JSONField(default=list)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    objects = ExamAttemptManager()
+
+    class Meta:
+        unique_together = ('student', 'exam')
+
+    def __str__(self):
+        return f"Intento de {self.student_id} en {self.exam_id}"
+
+    @property
+    def total_questions(self):
+        return len(self.question_ids)
+
+    @property
+    def is_finished(self):
+        return self.finished_at is not None
+
+    @staticmethod
+    def seconds_left(started_at, duration, now=None):
+        """
+        Segundos que quedan de un examen de 'duration' minutos empezado en 'started_at'.
+        """
+        now = now or timezone.now()
+        return max(0, int(duration * 60 - (now - started_at).total_seconds()))
+
+    def remaining_seconds(self, now=None):
+        """
+        Devuelve los segundos que quedan antes de que termine el tiempo del examen.
+        """
+        return self.seconds_left(self.started_at, self.exam.duration, now)
+
+    def record_answer(self, question_id, answer_id):
+        """
+        Guarda o reemplaza la respuesta a una pregunta con una única sentencia INSERT ... ON CONFLICT.
+        """
+        self.record_answers([(question_id, answer_id)])
+
+    def record_answers(self, pairs):
+        """
+        Guarda o reemplaza varias respuestas (pares id de pregunta, id de respuesta) en una sola sentencia.
+        """
+        now = timezone.now()
+        rows = [
+            AttemptAnswer(attempt=self, question_id=question_id, answer_id=answer_id, answered_at=now)
+            for question_id, answer_id in pairs
+        ]
+        if rows:
+            AttemptAnswer.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=['attempt', 'question'],
+                update_fields=['answer', 'answered_at'],
+            )
+
+    def finish(self):
+        """
+        Marca el intento como terminado.
+        """
+        if self.finished_at is None:
+            self.finished_at = timezone.now()
+            self.save(update_fields=['finished_at'])
+
+
+class AttemptAnswer(models.Model):
+    """
+    Modelo para la respuesta seleccionada en una pregunta durante un intento de examen.
+    """
+    attempt = models.ForeignKey(ExamAttempt, on_delete=models.CASCADE, related_name='answers')
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='attempt_answers')
+    answer = models.ForeignKey(Answer, on_delete=models.CASCADE, related_name='attempt_answers')
+    answered_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = ('attempt', 'question')
+
+    def __str__(self):
+        return f"{self.attempt_id}: {self.answer_id} en {self.question_id}"
+    
     
 from django.utils import timezone
 class Grade(models.Model):
@@ -213,12 +367,16 @@ class Grade(models.Model):
     exam = models.ForeignKey(Exam, on_delete=models.CASCADE)
     marks_obtained = models.IntegerField()
     start_time = models.DateTimeField(auto_now_add=True) 
-    
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'exam'], name='unique_grade_per_student_exam'),
+        ]
 
     def __str__(self):
         return f"{self.student.username}: {self.marks_obtained} en {self.exam.title}"
 
-class Forum(models.Model):
+class Forum(CounterFieldsMixin, models.Model):
     """
     Modelo para los foros de discusión de los cursos.
     """
@@ -226,11 +384,15 @@ class Forum(models.Model):
     title = models.CharField(max_length=200)
     created_at = models.DateTimeField(auto_now_add=True)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE)
+    post_count = models.PositiveIntegerField(default=0, editable=False)
+    last_post_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    counter_fields = ('post_count', 'last_post_at')
 
     def __str__(self):
         return self.title
 
-class Post(models.Model):
+class Post(CountedMixin, models.Model):
     """
     Modelo para las publicaciones en los foros.
     """
@@ -239,6 +401,11 @@ class Post(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['forum', 'created_at', 'id'], name='post_forum_created_idx'),
+        ]
+
     def __str__(self):
         return f"Post by {self.created_by.username} in {self.forum.title}"
 
@@ -251,3 +418,88 @@ class Profile(models.Model):
 
     def __str__(self):
         return f'{self.user.username} Profile'
+
+class DailyEnrollmentStat(models.Model):
+    """
+    Resumen materializado de inscripciones por día y curso (course nulo = todos los cursos).
+    Lo recalcula el comando refresh_analytics (ver analytics.py).
+    """
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, null=True, blank=True, related_name='daily_enrollment_stats')
+    date = models.DateField()
+    enrollments = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['course', 'date'], name='unique_daily_enrollment_stat'),
+        ]
+        indexes = [
+            models.Index(fields=['date', 'course'], name='enrollment_stat_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.date}: {self.enrollments}"
+
+class ExamGradeStat(models.Model):
+    """
+    Resumen materializado de las notas de un examen: número de notas, media y distribución
+    por tramos del 10 % de la puntuación total.
+    """
+    exam = models.OneToOneField(Exam, on_delete=models.CASCADE, related_name='grade_stat')
+    graded = models.PositiveIntegerField(default=0)
+    average = models.FloatField(default=0)
+    distribution = models.JSONField(default=list)
+    refreshed_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Notas de {self.exam_id}: {self.graded}"
+
+class CourseActivityStat(models.Model):
+    """
+    Resumen materializado de los estudiantes activos de un curso: los que empezaron un examen
+    o publicaron en un foro del curso dentro de la ventana ANALYTICS_ACTIVE_DAYS.
+    """
+    course = models.OneToOneField(Course, on_delete=models.CASCADE, related_name='activity_stat')
+    active_students = models.PositiveIntegerField(default=0)
+    refreshed_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Actividad de {self.course_id}: {self.active_students}"
+
+class MediaBlob(models.Model):
+    """
+    Archivo guardado una sola vez bajo su hash SHA-256 por DedupStorage (ver storage.py).
+    ref_count cuenta los campos de archivo que lo referencian; al llegar a cero se elimina.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    digest = models.CharField(max_length=64, db_index=True)
+    size = models.BigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count})"
+
+class SearchEntry(models.Model):
+    """
+    Documento del índice de búsqueda (ver search.py): un curso, material, foro o publicación
+    con su título y texto. En SQLite una tabla FTS5 de contenido externo lo indexa mediante
+    triggers; en PostgreSQL, un índice GIN sobre su tsvector.
+    """
+    KIND_CHOICES = (
+        ('course', 'Curso'),
+        ('material', 'Material'),
+        ('forum', 'Foro'),
+        ('post', 'Publicación'),
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField()
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='+')
+    title = models.CharField(max_length=255, blank=True)
+    body = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('kind', 'object_id')
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}: {self.title}"
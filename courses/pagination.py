@@ -0,0 +1,18 @@
+"""
+pagination.py
+
+Clases de paginación para la API REST.
+"""
+
+from rest_framework.pagination import CursorPagination
+
+
+class IdCursorPagination(CursorPagination):
+    """
+    Paginación por cursor ordenada por la clave primaria (indexada), de los registros más
+    recientes a los más antiguos. El coste de cada página no depende de su posición en la tabla.
+    """
+    ordering = '-id'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
@@ -0,0 +1,355 @@
+"""
+search.py
+
+Búsqueda de texto completo en cursos, materiales (incluido el texto de sus PDF), foros y
+publicaciones. Cada objeto tiene una fila SearchEntry con su título y texto que las señales
+mantienen al día al guardar o eliminar; el motor de la base de datos la indexa:
+
+- SQLite: tabla FTS5 de contenido externo (courses_searchentry_fts) sincronizada por triggers
+  y ordenada con bm25, con el título con más peso que el texto; de las publicaciones solo se
+  ordenan las SEARCH_MAX_CANDIDATES coincidencias más recientes para acotar el coste de términos
+  frecuentes (cursos, materiales y foros se ordenan siempre);
+- PostgreSQL: índice GIN sobre setweight(to_tsvector(title), 'A') || setweight(to_tsvector(body), 'B')
+  y ordenación con ts_rank;
+- otros motores: icontains sobre SearchEntry, sin ordenación por relevancia.
+
+El texto de los PDF se extrae con pypdf (opcional) en un pool de hilos, fuera de la petición.
+El comando rebuild_search_index reconstruye el índice completo.
+"""
+
+import html
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from itertools import chain, islice
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.db.models import Q
+from django.urls import reverse
+from django.utils.safestring import mark_safe
+
+from . import storage
+from .authorization import AccessContext
+from .models import Course, Forum, Material, Post, SearchEntry
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # pypdf es opcional: sin él los PDF se indexan solo por su título.
+    PdfReader = None
+
+logger = logging.getLogger(__name__)
+
+SEARCH_PAGE_SIZE = getattr(settings, 'SEARCH_PAGE_SIZE', 20)
+SEARCH_PDF_MAX_CHARS = getattr(settings, 'SEARCH_PDF_MAX_CHARS', 500_000)
+SEARCH_WORKERS = getattr(settings, 'SEARCH_WORKERS', 1)
+SEARCH_LANGUAGE = 'spanish'
+SNIPPET_WORDS = 16
+BATCH_SIZE = 1000
+
+# Marcadores del fragmento: se sustituyen por <mark> después de escapar el texto.
+MARK_START, MARK_END = '\x02', '\x03'
+WORD = re.compile(r'\w+')
+
+_executor = None
+_lock = threading.Lock()
+
+
+@dataclass
+class SearchResult:
+    kind: str
+    object_id: int
+    course_id: int
+    title: str
+    snippet: str
+    rank: float
+    url: str = ''
+
+    @property
+    def kind_display(self):
+        return dict(SearchEntry.KIND_CHOICES).get(self.kind, self.kind)
+
+    def as_dict(self):
+        return {
+            'kind': self.kind, 'id': self.object_id, 'course': self.course_id, 'title': self.title,
+            'snippet': self.snippet, 'rank': self.rank, 'url': self.url,
+        }
+
+
+def document(instance):
+    """
+    Devuelve (tipo, id del curso, título, texto) del documento de búsqueda de una instancia.
+    """
+    if isinstance(instance, Course):
+        return 'course', instance.pk, instance.title, instance.description
+    if isinstance(instance, Material):
+        return 'material', instance.course_id, instance.title, None
+    if isinstance(instance, Forum):
+        return 'forum', instance.course_id, instance.title, ''
+    if isinstance(instance, Post):
+        return 'post', instance.forum.course_id, '', instance.content
+    raise TypeError(f'{type(instance).__name__} no se indexa.')
+
+
+def index(instance):
+    """
+    Crea o actualiza el documento de búsqueda de la instancia. El texto de un material es el de
+    su PDF: se conserva si el archivo no cambió y se extrae en segundo plano si cambió.
+    """
+    kind, course_id, title, body = document(instance)
+    defaults = {'course_id': course_id, 'title': title[:255]}
+    if body is not None:
+        defaults['body'] = body
+    SearchEntry.objects.update_or_create(kind=kind, object_id=instance.pk, defaults=defaults)
+    if kind == 'material' and 'file' in getattr(instance, '_changed_files', {}):
+        name = instance.file.name
+        transaction.on_commit(lambda: schedule_pdf(instance.pk, name))
+
+
+def remove(instance):
+    """
+    Elimina el documento de búsqueda de una instancia eliminada.
+    """
+    kind = {Course: 'course', Material: 'material', Forum: 'forum', Post: 'post'}[type(instance)]
+    SearchEntry.objects.filter(kind=kind, object_id=instance.pk).delete()
+
+
+def extract_pdf_text(name, max_chars=SEARCH_PDF_MAX_CHARS):
+    """
+    Texto de un PDF del almacenamiento de los materiales, hasta 'max_chars' caracteres. Devuelve ''
+    si no es un PDF, pypdf no está instalado o el archivo no se puede leer.
+    """
+    if PdfReader is None or not name or not name.lower().endswith('.pdf'):
+        return ''
+    parts, length = [], 0
+    try:
+        for page in PdfReader(storage.protected_storage.path(name)).pages:
+            text = page.extract_text() or ''
+            parts.append(text)
+            length += len(text)
+            if length >= max_chars:
+                break
+    except Exception:
+        logger.warning('No se pudo extraer el texto del PDF %s.', name)
+    return ' '.join(parts)[:max_chars]
+
+
+def index_pdf(material_id, name):
+    """
+    Guarda en el documento del material el texto de su PDF si el archivo sigue siendo 'name'.
+    """
+    text = extract_pdf_text(name)
+    if Material.objects.filter(pk=material_id, file=name).exists():
+        SearchEntry.objects.filter(kind='material', object_id=material_id).update(body=text)
+
+
+def executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=SEARCH_WORKERS, thread_name_prefix='search')
+    return _executor
+
+
+def _run_pdf(material_id, name):
+    try:
+        index_pdf(material_id, name)
+    except Exception:
+        logger.exception('Error al indexar el PDF del material %s.', material_id)
+    finally:
+        # Cada hilo del pool tiene su propia conexión: se cierra al terminar la tarea.
+        connections.close_all()
+
+
+def schedule_pdf(material_id, name):
+    """
+    Encola la extracción del texto del PDF de un material en el pool. Con SEARCH_ASYNC = False
+    (se lee en cada llamada) lo extrae en el hilo actual.
+    """
+    if not getattr(settings, 'SEARCH_ASYNC', True):
+        return index_pdf(material_id, name)
+    return executor().submit(_run_pdf, material_id, name)
+
+
+def rebuild(extract_pdfs=True):
+    """
+    Reconstruye el índice completo. Devuelve el número de documentos indexados.
+
+    Los documentos se leen con iterator() y se insertan en lotes de BATCH_SIZE, cada uno en su
+    transacción, de modo que la memoria no crece con el número de publicaciones y ninguna
+    transacción bloquea la base de datos durante toda la reconstrucción. Mientras dura, las
+    búsquedas ven un índice parcial.
+    """
+    forums = dict(Forum.objects.values_list('pk', 'course_id'))
+    rows = chain(
+        (
+            SearchEntry(kind='course', object_id=pk, course_id=pk, title=title[:255], body=description)
+            for pk, title, description in Course.objects.values_list('pk', 'title', 'description').iterator(BATCH_SIZE)
+        ),
+        (
+            SearchEntry(kind='forum', object_id=pk, course_id=course_id, title=title[:255])
+            for pk, course_id, title in Forum.objects.values_list('pk', 'course_id', 'title').iterator(BATCH_SIZE)
+        ),
+        (
+            SearchEntry(
+                kind='material', object_id=pk, course_id=course_id, title=title[:255],
+                body=extract_pdf_text(name) if extract_pdfs else '',
+            )
+            for pk, course_id, title, name in (
+                Material.objects.values_list('pk', 'course_id', 'title', 'file').iterator(BATCH_SIZE)
+            )
+        ),
+        (
+            SearchEntry(kind='post', object_id=pk, course_id=forums[forum_id], body=content)
+            for pk, forum_id, content in Post.objects.values_list('pk', 'forum_id', 'content').iterator(BATCH_SIZE)
+        ),
+    )
+    SearchEntry.objects.all().delete()
+    total = 0
+    while batch := list(islice(rows, BATCH_SIZE)):
+        with transaction.atomic():
+            SearchEntry.objects.bulk_create(batch)
+        total += len(batch)
+    return total
+
+
+def visible_courses(user, access=None):
+    """
+    Ids de los cursos cuyos documentos ve el usuario, o None si los ve todos.
+    """
+    return (access or AccessContext(user)).visible_course_ids()
+
+
+def fts_query(text):
+    """
+    Convierte el texto del usuario en una consulta FTS5 segura: cada palabra entre comillas, de
+    modo que los operadores de FTS5 quedan como texto. No se usan prefijos (palabra*): un prefijo
+    corto se expande a miles de términos y la consulta deja de estar acotada.
+    """
+    return ' '.join(f'"{word}"' for word in WORD.findall(text))
+
+
+def course_filter(course_ids, column):
+    if course_ids is None:
+        return '', []
+    if not course_ids:
+        return ' AND 0', []
+    return f' AND {column} IN ({", ".join(["%s"] * len(course_ids))})', list(course_ids)
+
+
+def _search_sqlite(text, course_ids, limit, offset):
+    query = fts_query(text)
+    if not query:
+        return []
+    where, params = course_filter(course_ids, 'e.course_id')
+    candidates_where, candidates_params = course_filter(course_ids, 'c.course_id')
+    # De las publicaciones solo se ordenan por relevancia las SEARCH_MAX_CANDIDATES coincidencias
+    # más recientes: con un término muy frecuente, bm25 sobre cientos de miles de filas tardaría
+    # cientos de ms. El corte no se aplica a cursos, materiales y foros, que rebuild() inserta
+    # primero (ids más bajos) y que si no desaparecerían de los resultados.
+    sql = f"""
+        SELECT e.kind, e.object_id, e.course_id, e.title,
+               snippet(courses_searchentry_fts, -1, %s, %s, '…', {SNIPPET_WORDS}),
+               bm25(courses_searchentry_fts, 5.0, 1.0) AS rank
+        FROM courses_searchentry_fts
+        JOIN courses_searchentry e ON e.id = courses_searchentry_fts.rowid
+        WHERE courses_searchentry_fts MATCH %s{where}
+          AND (e.kind <> 'post' OR courses_searchentry_fts.rowid >= COALESCE((
+              SELECT f2.rowid FROM courses_searchentry_fts f2
+              JOIN courses_searchentry c ON c.id = f2.rowid
+              WHERE f2.courses_searchentry_fts MATCH %s AND c.kind = 'post'{candidates_where}
+              ORDER BY f2.rowid DESC LIMIT 1 OFFSET %s
+          ), 0))
+        ORDER BY rank
+        LIMIT %s OFFSET %s
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [
+            MARK_START, MARK_END, query, *params,
+            query, *candidates_params, getattr(settings, 'SEARCH_MAX_CANDIDATES', 5000) - 1,
+            limit, offset,
+        ])
+        # bm25 devuelve valores negativos: cuanto menor, más relevante.
+        return [(*row[:5], -row[5]) for row in cursor.fetchall()]
+
+
+def _search_postgresql(text, course_ids, limit, offset):
+    if not WORD.search(text):
+        return []
+    where, params = course_filter(course_ids, 'e.course_id')
+    vector = (
+        f"setweight(to_tsvector('{SEARCH_LANGUAGE}', e.title), 'A') || "
+        f"setweight(to_tsvector('{SEARCH_LANGUAGE}', e.body), 'B')"
+    )
+    sql = f"""
+        SELECT e.kind, e.object_id, e.course_id, e.title,
+               ts_headline('{SEARCH_LANGUAGE}', e.title || ' ' || e.body, q,
+                           %s),
+               ts_rank({vector}, q) AS rank
+        FROM courses_searchentry e, websearch_to_tsquery('{SEARCH_LANGUAGE}', %s) q
+        WHERE {vector} @@ q{where}
+        ORDER BY rank DESC
+        LIMIT %s OFFSET %s
+    """
+    options = f'StartSel={MARK_START}, StopSel={MARK_END}, MaxWords={SNIPPET_WORDS}, MinWords=5'
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [options, text, *params, limit, offset])
+        return cursor.fetchall()
+
+
+def _search_fallback(text, course_ids, limit, offset):
+    entries = SearchEntry.objects.all()
+    for word in WORD.findall(text) or ['']:
+        entries = entries.filter(Q(title__icontains=word) | Q(body__icontains=word))
+    if course_ids is not None:
+        entries = entries.filter(course_id__in=course_ids)
+    rows = entries.order_by('-updated_at').values_list('kind', 'object_id', 'course_id', 'title', 'body')
+    return [(*row[:4], row[4][:200], 0.0) for row in rows[offset:offset + limit]]
+
+
+def highlight(snippet):
+    """
+    Escapa el fragmento (contenido de usuarios) y convierte los marcadores en <mark>.
+    """
+    escaped = html.escape(snippet or '')
+    return mark_safe(escaped.replace(MARK_START, '<mark>').replace(MARK_END, '</mark>'))
+
+
+def attach_urls(results):
+    """
+    Completa la URL y el título de cada resultado; las publicaciones enlazan a su foro.
+    """
+    posts = [result.object_id for result in results if result.kind == 'post']
+    forums = {
+        pk: (forum_id, title)
+        for pk, forum_id, title in Post.objects.filter(pk__in=posts).values_list('pk', 'forum_id', 'forum__title')
+    } if posts else {}
+    for result in results:
+        if result.kind == 'course':
+            result.url = reverse('course_detail', args=[result.object_id])
+        elif result.kind == 'material':
+            result.url = reverse('material_download', args=[result.object_id])
+        elif result.kind == 'forum':
+            result.url = reverse('forum_detail', args=[result.object_id])
+        elif result.object_id in forums:
+            forum_id, title = forums[result.object_id]
+            result.url = reverse('forum_detail', args=[forum_id]) + f'#post-{result.object_id}'
+            result.title = title
+    return results
+
+
+def search(text, user, limit=SEARCH_PAGE_SIZE, offset=0, access=None):
+    """
+    Busca 'text' en los documentos que el usuario puede ver y devuelve una lista de
+    SearchResult ordenada por relevancia. 'access' es el AccessContext de la petición, si lo hay.
+    """
+    course_ids = visible_courses(user, access)
+    backend = {'sqlite': _search_sqlite, 'postgresql': _search_postgresql}.get(connection.vendor, _search_fallback)
+    rows = backend(text, course_ids, limit, offset)
+    return attach_urls([
+        SearchResult(kind=kind, object_id=object_id, course_id=course_id, title=title,
+                     snippet=highlight(snippet), rank=float(rank))
+        for kind, object_id, course_id, title, snippet, rank in rows
+    ])
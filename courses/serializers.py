@@ -1,16 +1,70 @@
+from django.db import models
+from django.db.models import Prefetch
+from django.urls import reverse
 from rest_framework import serializers
 from .models import Course, Material, Exam, Question, Answer, Enrollment, User
 
-class MaterialSerializer(serializers.ModelSerializer):
+class DynamicFieldsMixin:
+    """
+    Mixin para serializers que admite campos dispersos y expansión de relaciones anidadas
+    mediante parámetros de consulta:
+
+    - ``?fields=id,title`` limita la respuesta a los campos indicados.
+    - ``?expand=materials`` serializa completas solo las relaciones anidadas indicadas; el resto
+      se devuelve como listas de claves primarias. Sin ``expand`` se serializan todas.
+
+    Solo se aplica en el serializer raíz de la petición.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None:
+            return
+        params = getattr(request, 'query_params', request.GET)
+
+        fields = params.get('fields')
+        if fields:
+            allowed = {name.strip() for name in fields.split(',')}
+            for name in set(self.fields) - allowed:
+                self.fields.pop(name)
+
+        expand = params.get('expand')
+        if expand is not None:
+            expanded = {name.strip() for name in expand.split(',')}
+            for name, field in list(self.fields.items()):
+                if name in expanded or not isinstance(field, serializers.BaseSerializer):
+                    continue
+                source = {} if field.source == name else {'source': field.source}
+                many = isinstance(field, serializers.ListSerializer)
+                self.fields[name] = serializers.PrimaryKeyRelatedField(many=many, read_only=True, **source)
+
+class MaterialFileField(serializers.FileField):
+    """
+    Archivo de un material: se sube como cualquier FileField, pero se representa con la URL de
+    la vista de descarga, porque el almacenamiento protegido no tiene URL pública.
+    """
+    def to_representation(self, value):
+        if not value:
+            return None
+        url = reverse('material_download', args=[value.instance.pk])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request is not None else url
+
+class MaterialSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer para el modelo Material.
-    Serializa todos los campos del modelo.
+    Serializa todos los campos del modelo; el archivo, como URL de descarga.
     """
+    serializer_field_mapping = {
+        **serializers.ModelSerializer.serializer_field_mapping,
+        models.FileField: MaterialFileField,
+    }
+
     class Meta:
         model = Material
         fields = '__all__'
 
-class QuestionSerializer(serializers.ModelSerializer):
+class QuestionSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer para el modelo Question.
     Serializa todos los campos del modelo.
@@ -19,7 +73,7 @@ class QuestionSerializer(serializers.ModelSerializer):
         model = Question
         fields = '__all__'
 
-class AnswerSerializer(serializers.ModelSerializer):
+class AnswerSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer para el modelo Answer.
     Serializa todos los campos del modelo.
@@ -28,7 +82,7 @@ class AnswerSerializer(serializers.ModelSerializer):
         model = Answer
         fields = '__all__'
 
-class ExamSerializer(serializers.ModelSerializer):
+class ExamSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer para el modelo Exam.
     Incluye una relación anidada con QuestionSerializer para serializar las preguntas asociadas.
@@ -39,7 +93,7 @@ class ExamSerializer(serializers.ModelSerializer):
         model = Exam
         fields = ['id', 'title', 'course', 'total_marks', 'questions']
 
-class CourseSerializer(serializers.ModelSerializer):
+class CourseSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer para el modelo Course.
     Incluye relaciones anidadas con MaterialSerializer y ExamSerializer para serializar los materiales y exámenes asociados.
@@ -77,3 +131,35 @@ class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'role']
+
+def build_prefetch_plan(serializer):
+    """
+    Recorre el árbol de un serializer (clase o instancia ya recortada por DynamicFieldsMixin) y
+    devuelve (select_related, prefetch_related) con las relaciones que necesita para serializarse
+    sin consultas N+1.
+    Los serializers anidados con many=True se convierten en objetos Prefetch cuyo queryset
+    aplica a su vez el plan del serializer hijo; los anidados simples en select_related.
+    """
+    if isinstance(serializer, type):
+        serializer = serializer()
+    select, prefetch = [], []
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*':
+            continue
+        source = field.source.replace('.', '__')
+        if isinstance(field, serializers.ListSerializer) and isinstance(field.child, serializers.ModelSerializer):
+            child_class = type(field.child)
+            child_select, child_prefetch = build_prefetch_plan(child_class)
+            queryset = child_class.Meta.model._default_manager.select_related(*child_select).prefetch_related(*child_prefetch)
+            prefetch.append(Prefetch(source, queryset=queryset))
+        elif isinstance(field, serializers.ModelSerializer):
+            child_select, child_prefetch = build_prefetch_plan(type(field))
+            select.append(source)
+            select.extend(f'{source}__{lookup}' for lookup in child_select)
+            prefetch.extend(
+                Prefetch(f'{source}__{lookup.prefetch_through}', queryset=lookup.queryset)
+                for lookup in child_prefetch
+            )
+        elif isinstance(field, serializers.ManyRelatedField):
+            prefetch.append(source)
+    return select, prefetch
@@ -0,0 +1,108 @@
+"""
+sidebar.py
+
+Construcción de la navegación lateral de la plantilla base (index.html). Devuelve una lista
+acotada de cursos y exámenes según el rol del usuario y la guarda en caché por usuario y rol.
+La invalidación se hace mediante contadores de versión (ver caching.py) que se incrementan
+desde las señales de Course, Exam y Enrollment.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .authorization import AccessContext
+from .caching import bump_version, get_versions, version_key
+from .models import Course, Exam
+
+def user_version_key(user_id):
+    return version_key('sidebar:user', user_id)
+
+
+def course_version_key(course_id):
+    return version_key('sidebar:course', course_id)
+
+
+CATALOG_VERSION_KEY = version_key('sidebar:catalog')
+
+
+def _entry_key(user):
+    return f'sidebar:{user.pk}:{user.role}'
+
+
+def _scope(access):
+    """
+    Devuelve (cursos, exámenes, ids de cursos de los que depende la entrada) para el rol del usuario.
+    """
+    if access.role == 'student':
+        course_ids = sorted(access.enrollments)
+        return Course.objects.filter(pk__in=course_ids), Exam.objects.filter(course_id__in=course_ids), course_ids
+    if access.role == 'instructor':
+        course_ids = sorted(access.owned_course_ids)
+        return Course.objects.filter(pk__in=course_ids), Exam.objects.filter(course_id__in=course_ids), course_ids
+    return Course.objects.all(), Exam.objects.all(), None
+
+
+def _bounded(queryset):
+    """
+    Devuelve como mucho SIDEBAR_LIMIT filas (id, título) e indica si quedan más.
+    """
+    limit = getattr(settings, 'SIDEBAR_LIMIT', 10)
+    rows = list(queryset.order_by('-pk').values('id', 'title')[:limit + 1])
+    return rows[:limit], len(rows) > limit
+
+
+def _dependency_keys(user, course_ids):
+    if course_ids is None:
+        return [CATALOG_VERSION_KEY]
+    return [user_version_key(user.pk)] + [course_version_key(course_id) for course_id in course_ids]
+
+
+def build_sidebar(courses, exams):
+    """
+    Consulta la base de datos y construye la navegación lateral a partir de los querysets del rol.
+    """
+    sidebar_courses, more_courses = _bounded(courses)
+    sidebar_exams, more_exams = _bounded(exams)
+    return {
+        'courses': sidebar_courses,
+        'exams': sidebar_exams,
+        'more_courses': more_courses,
+        'more_exams': more_exams,
+    }
+
+
+def get_sidebar(user, access=None):
+    """
+    Devuelve la navegación lateral del usuario desde la caché, reconstruyéndola si alguna
+    de sus dependencias cambió de versión. Con el AccessContext de la petición, las
+    inscripciones o los cursos propios se comparten con las comprobaciones de acceso.
+    """
+    if not user.is_authenticated:
+        return {'courses': [], 'exams': [], 'more_courses': False, 'more_exams': False}
+
+    key = _entry_key(user)
+    entry = cache.get(key)
+    if entry is not None and get_versions(entry['deps']) == entry['deps']:
+        return entry['data']
+
+    courses, exams, course_ids = _scope(access or AccessContext(user))
+    # Las versiones se leen antes de construir para que un cambio concurrente invalide la entrada.
+    versions = get_versions(_dependency_keys(user, course_ids))
+    data = build_sidebar(courses, exams)
+    cache.set(key, {'deps': versions, 'data': data}, getattr(settings, 'SIDEBAR_CACHE_TIMEOUT', 60 * 15))
+    return data
+
+
+def invalidate_user(user_id):
+    """
+    Invalida la navegación lateral de un usuario (inscripciones o cursos propios modificados).
+    """
+    bump_version(user_version_key(user_id))
+
+
+def invalidate_course(course_id):
+    """
+    Invalida la navegación de quienes ven el curso y la de los administradores.
+    """
+    bump_version(course_version_key(course_id))
+    bump_version(CATALOG_VERSION_KEY)
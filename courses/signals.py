@@ -1,9 +1,10 @@
 # signals.py
 
-from django.db.models.signals import post_save
+from django.db.models.signals import post_init, post_save, post_delete
 from django.contrib.auth.models import User
 from django.dispatch import receiver
-from .models import Profile
+from .models import Profile, Course, Exam, Enrollment, Forum, Material, Question, Answer, Post, User as CustomUser
+from . import counters, exam_cache, forum_events, search, sidebar, storage, thumbnails
 
 @receiver(post_save, sender=User)
 def create_profile(sender, instance, created, **kwargs):
@@ -32,3 +33,276 @@ def save_profile(sender, instance, **kwargs):
         **kwargs: Parámetros adicionales.
     """
     instance.profile.save()
+
+
+@receiver([post_save, post_delete], sender=Course)
+def invalidate_course_sidebar(sender, instance, **kwargs):
+    """
+    Signal que se ejecuta al guardar o eliminar un Course.
+    Invalida la navegación lateral del instructor y de los usuarios que ven el curso.
+
+    Args:
+        sender (Model): El modelo que envía la señal.
+        instance (Course): El curso guardado o eliminado.
+        **kwargs: Parámetros adicionales.
+    """
+    sidebar.invalidate_course(instance.pk)
+    sidebar.invalidate_user(instance.instructor_id)
+
+@receiver([post_save, post_delete], sender=Exam)
+def invalidate_exam_sidebar(sender, instance, **kwargs):
+    """
+    Signal que se ejecuta al guardar o eliminar un Exam.
+    Invalida la navegación lateral de los usuarios que ven el curso del examen.
+
+    Args:
+        sender (Model): El modelo que envía la señal.
+        instance (Exam): El examen guardado o eliminado.
+        **kwargs: Parámetros adicionales.
+    """
+    sidebar.invalidate_course(instance.course_id)
+
+@receiver([post_save, post_delete], sender=Enrollment)
+def invalidate_enrollment_sidebar(sender, instance, **kwargs):
+    """
+    Signal que se ejecuta al guardar o eliminar un Enrollment.
+    Invalida la navegación lateral del estudiante inscrito.
+
+    Args:
+        sender (Model): El modelo que envía la señal.
+        instance (Enrollment): La inscripción guardada o eliminada.
+        **kwargs: Parámetros adicionales.
+    """
+    sidebar.invalidate_user(instance.student_id)
+
+@receiver([post_save, post_delete], sender=Exam)
+def invalidate_exam_content(sender, instance, **kwargs):
+    """
+    Signal que se ejecuta al guardar o eliminar un Exam.
+    Invalida el contenido cacheado del examen.
+
+    Args:
+        sender (Model): El modelo que envía la señal.
+        instance (Exam): El examen guardado o eliminado.
+        **kwargs: Parámetros adicionales.
+    """
+    exam_cache.invalidate_exam(instance.pk)
+
+@receiver([post_save, post_delete], sender=Question)
+def invalidate_question_content(sender, instance, **kwargs):
+    """
+    Signal que se ejecuta al guardar o eliminar una Question.
+    Invalida el contenido cacheado del examen de la pregunta.
+
+    Args:
+        sender (Model): El modelo que envía la señal.
+        instance (Question): La pregunta guardada o eliminada.
+        **kwargs: Parámetros adicionales.
+    """
+    exam_cache.invalidate_exam(instance.exam_id)
+
+@receiver([post_save, post_delete], sender=Answer)
+def invalidate_answer_content(sender, instance, **kwargs):
+    """
+    Signal que se ejecuta al guardar o eliminar una Answer.
+    Invalida el contenido cacheado del examen al que pertenece la respuesta.
+
+    Args:
+        sender (Model): El modelo que envía la señal.
+        instance (Answer): La respuesta guardada o eliminada.
+        **kwargs: Parámetros adicionales.
+    """
+    exam_id = Question.objects.filter(pk=instance.question_id).values_list('exam_id', flat=True).first()
+    if exam_id is not None:
+        exam_cache.invalidate_exam(exam_id)
+
+@receiver(post_save, sender=Enrollment)
+def count_enrollment(sender, instance, created, **kwargs):
+    """
+    Signal que se ejecuta al guardar un Enrollment.
+    Suma la nueva inscripción al contador del curso.
+
+    Args:
+        sender (Model): El modelo que envía la señal.
+        instance (Enrollment): La inscripción guardada.
+        created (bool): Un booleano que indica si se creó una nueva instancia.
+        **kwargs: Parámetros adicionales.
+    """
+    if created:
+        counters.adjust(Course, instance.course_id, enrollment_count=1)
+
+@receiver(post_delete, sender=Enrollment)
+def uncount_enrollment(sender, instance, **kwargs):
+    """
+    Signal que se ejecuta al eliminar un Enrollment.
+    Resta la inscripción del contador del curso.
+
+    Args:
+        sender (Model): El modelo que envía la señal.
+        instance (Enrollment): La inscripción eliminada.
+        **kwargs: Parámetros adicionales.
+    """
+    counters.adjust(Course, instance.course_id, enrollment_count=-1)
+
+@receiver(post_save, sender=Exam)
+def count_exam(sender, instance, created, **kwargs):
+    """
+    Signal que se ejecuta al guardar un Exam.
+    Suma el nuevo examen al contador del curso.
+
+    Args:
+        sender (Model): El modelo que envía la señal.
+        instance (Exam): El examen guardado.
+        created (bool): Un booleano que indica si se creó una nueva instancia.
+        **kwargs: Parámetros adicionales.
+    """
+    if created:
+        counters.adjust(Course, instance.course_id, exam_count=1)
+
+@receiver(post_delete, sender=Exam)
+def uncount_exam(sender, instance, **kwargs):
+    """
+    Signal que se ejecuta al eliminar un Exam.
+    Resta el examen del contador del curso.
+
+    Args:
+        sender (Model): El modelo que envía la señal.
+        instance (Exam): El examen eliminado.
+        **kwargs: Parámetros adicionales.
+    """
+    counters.adjust(Course, instance.course_id, exam_count=-1)
+
+@receiver(post_save, sender=Post)
+def count_post(sender, instance, created, **kwargs):
+    """
+    Signal que se ejecuta al guardar un Post.
+    Suma la publicación al contador del foro y actualiza la fecha de la última publicación.
+
+    Args:
+        sender (Model): El modelo que envía la señal.
+        instance (Post): La publicación guardada.
+        created (bool): Un booleano que indica si se creó una nueva instancia.
+        **kwargs: Parámetros adicionales.
+    """
+    if created:
+        counters.post_added(instance)
+
+@receiver(post_delete, sender=Post)
+def uncount_post(sender, instance, **kwargs):
+    """
+    Signal que se ejecuta al eliminar un Post.
+    Resta la publicación del contador del foro y recalcula la fecha de la última publicación.
+
+    Args:
+        sender (Model): El modelo que envía la señal.
+        instance (Post): La publicación eliminada.
+        **kwargs: Parámetros adicionales.
+    """
+    counters.post_removed(instance)
+
+@receiver(post_init, sender=Material)
+@receiver(post_init, sender=Course)
+@receiver(post_init, sender=CustomUser)
+def remember_stored_files(sender, instance, **kwargs):
+    """
+    Signal que se ejecuta al crear una instancia de Material, Course o User.
+    Recuerda sus archivos para liberar el blob anterior si se reemplazan.
+
+    Args:
+        sender (Model): El modelo que envía la señal.
+        instance (Model): La instancia creada.
+        **kwargs: Parámetros adicionales.
+    """
+    storage.remember_files(instance)
+
+@receiver(post_save, sender=Material)
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=CustomUser)
+def sync_file_references(sender, instance, created, **kwargs):
+    """
+    Signal que se ejecuta al guardar un Material, Course o User.
+    Suma la referencia de los archivos nuevos y libera la de los reemplazados o quitados.
+
+    Args:
+        sender (Model): El modelo que envía la señal.
+        instance (Model): La instancia guardada.
+        created (bool): Un booleano que indica si se creó una nueva instancia.
+        **kwargs: Parámetros adicionales.
+    """
+    storage.sync_references(instance, created)
+
+@receiver(post_delete, sender=Material)
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=CustomUser)
+def release_deleted_files(sender, instance, **kwargs):
+    """
+    Signal que se ejecuta al eliminar un Material, Course o User.
+    Libera la referencia de sus archivos.
+
+    Args:
+        sender (Model): El modelo que envía la señal.
+        instance (Model): La instancia eliminada.
+        **kwargs: Parámetros adicionales.
+    """
+    storage.release_all(instance)
+
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=CustomUser)
+def generate_thumbnails(sender, instance, **kwargs):
+    """
+    Signal que se ejecuta al guardar un Course o un User, después de sync_file_references.
+    Encola las miniaturas de las imágenes nuevas en el pool de hilos.
+
+    Args:
+        sender (Model): El modelo que envía la señal.
+        instance (Model): La instancia guardada.
+        **kwargs: Parámetros adicionales.
+    """
+    thumbnails.schedule_changed(instance)
+
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Material)
+@receiver(post_save, sender=Forum)
+@receiver(post_save, sender=Post)
+def index_for_search(sender, instance, **kwargs):
+    """
+    Signal que se ejecuta al guardar un Course, Material, Forum o Post.
+    Actualiza su documento en el índice de búsqueda.
+
+    Args:
+        sender (Model): El modelo que envía la señal.
+        instance (Model): La instancia guardada.
+        **kwargs: Parámetros adicionales.
+    """
+    search.index(instance)
+
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=Material)
+@receiver(post_delete, sender=Forum)
+@receiver(post_delete, sender=Post)
+def remove_from_search(sender, instance, **kwargs):
+    """
+    Signal que se ejecuta al eliminar un Course, Material, Forum o Post.
+    Elimina su documento del índice de búsqueda.
+
+    Args:
+        sender (Model): El modelo que envía la señal.
+        instance (Model): La instancia eliminada.
+        **kwargs: Parámetros adicionales.
+    """
+    search.remove(instance)
+
+@receiver(post_save, sender=Post)
+def publish_post(sender, instance, created, **kwargs):
+    """
+    Signal que se ejecuta al guardar un Post.
+    Si es nuevo, lo publica en el canal del foro para los clientes conectados al stream.
+
+    Args:
+        sender (Model): El modelo que envía la señal.
+        instance (Post): La instancia de la publicación guardada.
+        created (bool): Indica si la publicación fue creada.
+        **kwargs: Parámetros adicionales.
+    """
+    if created:
+        forum_events.publish_post(instance)
@@ -0,0 +1,64 @@
+// Cuenta atrás de los exámenes. El elemento [data-exam-timer] trae los segundos restantes al
+// renderizar la página; el navegador descuenta cada segundo con su propio reloj y se
+// resincroniza con la vista JSON del temporizador cada data-heartbeat segundos y al volver a la
+// pestaña. Cuando el tiempo se agota recarga la página, y el servidor califica el intento.
+(function() {
+    var element = document.querySelector('[data-exam-timer]');
+    if (!element) {
+        return;
+    }
+    var deadline = Date.now() + Number(element.dataset.remaining) * 1000;
+    var heartbeat = Number(element.dataset.heartbeat) * 1000;
+    var done = false;
+
+    function pad(value) {
+        return (value < 10 ? '0' : '') + value;
+    }
+
+    function finish(url) {
+        done = true;
+        window.location.href = url || window.location.href;
+    }
+
+    function tick() {
+        if (done) {
+            return;
+        }
+        var seconds = Math.max(0, Math.ceil((deadline - Date.now()) / 1000));
+        var hours = Math.floor(seconds / 3600);
+        var text = pad(Math.floor(seconds % 3600 / 60)) + ':' + pad(seconds % 60);
+        element.textContent = hours ? hours + ':' + text : text;
+        element.classList.toggle('text-danger', seconds <= 60);
+        if (seconds === 0) {
+            finish();
+        }
+    }
+
+    function sync() {
+        fetch(element.dataset.examTimer, {credentials: 'same-origin', headers: {'Accept': 'application/json'}})
+            .then(function(response) { return response.ok ? response.json() : null; })
+            .then(function(state) {
+                if (!state || done) {
+                    return;
+                }
+                if (state.status === 'finished') {
+                    finish(state.result_url);
+                } else if (state.status === 'expired') {
+                    finish();
+                } else if (state.status === 'in_progress') {
+                    deadline = Date.now() + state.remaining_seconds * 1000;
+                    tick();
+                }
+            })
+            .catch(function() {});
+    }
+
+    tick();
+    setInterval(tick, 1000);
+    setInterval(sync, heartbeat);
+    document.addEventListener('visibilitychange', function() {
+        if (document.visibilityState === 'visible') {
+            sync();
+        }
+    });
+})();
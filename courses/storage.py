@@ -0,0 +1,285 @@
+"""
+storage.py
+
+Almacenamiento deduplicado por contenido para Material.file, Course.image y User.profile_picture.
+Cada subida se copia por bloques a un archivo temporal mientras se calcula su SHA-256 y se guarda
+una sola vez en blobs/<aa>/<hash><extensión>; si ese contenido ya existía, la copia se descarta y
+el campo apunta al blob existente.
+
+Los materiales usan ProtectedStorage: sus blobs (private/<aa>/<hash><extensión>) viven en
+PROTECTED_MEDIA_ROOT, fuera de MEDIA_ROOT y sin URL pública, de modo que solo se entregan con la
+vista de descarga (downloads.py), que comprueba el acceso. Las imágenes de curso y las fotos de
+perfil siguen en MEDIA_ROOT, servidas directamente por el servidor web.
+
+MediaBlob lleva la cuenta de referencias, que solo cambia en las señales de las filas, dentro de
+su transacción: al guardar, cada campo que pasa a apuntar a un blob suma una referencia y el blob
+que deja resta otra; al eliminar la fila se restan las suyas. Guardar un archivo en el storage no
+suma nada (un archivo guardado con save=False en una fila que nunca se guarda queda con cero
+referencias y lo elimina dedup_media --prune) y DedupStorage.delete() no hace nada: el blob se
+borra del disco al confirmar la transacción en la que pierde su última referencia.
+"""
+
+import hashlib
+import os
+import tempfile
+from collections import Counter
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+from django.utils.functional import cached_property
+
+BLOB_DIR = 'blobs'
+PROTECTED_BLOB_DIR = 'private'
+CHUNK_SIZE = 64 * 1024
+
+# Campos de archivo que usan DedupStorage: (modelo, campo).
+DEDUP_FIELDS = [
+    ('courses.Material', 'file'),
+    ('courses.Course', 'image'),
+    ('courses.User', 'profile_picture'),
+]
+
+
+def is_blob(name, directory=None):
+    directories = (directory,) if directory else (BLOB_DIR, PROTECTED_BLOB_DIR)
+    return bool(name) and name.startswith(tuple(f'{directory}/' for directory in directories))
+
+
+def blob_name(digest, original_name='', directory=BLOB_DIR):
+    """
+    Ruta relativa del blob de un contenido; conserva la extensión para el tipo MIME al servirlo.
+    """
+    extension = os.path.splitext(original_name)[1].lower()
+    return f'{directory}/{digest[:2]}/{digest}{extension}'
+
+
+def hash_file(path):
+    """
+    SHA-256 de un archivo del disco leído por bloques.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DedupStorage(FileSystemStorage):
+    """
+    FileSystemStorage que guarda cada contenido una vez bajo su hash y cuenta sus referencias.
+    """
+    blob_dir = BLOB_DIR
+
+    def get_available_name(self, name, max_length=None):
+        # El nombre final depende del contenido: no hace falta buscar uno libre.
+        return name
+
+    def owns(self, name):
+        """
+        Indica si 'name' es un blob de este storage (y no un archivo anterior a la deduplicación).
+        """
+        return is_blob(name, self.blob_dir)
+
+    def blob_name(self, digest, original_name=''):
+        return blob_name(digest, original_name, self.blob_dir)
+
+    def _save(self, name, content):
+        directory = self.path(self.blob_dir)
+        os.makedirs(directory, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        with tempfile.NamedTemporaryFile(dir=directory, delete=False) as temporary:
+            try:
+                for chunk in content.chunks(CHUNK_SIZE):
+                    digest.update(chunk)
+                    temporary.write(chunk)
+                    size += len(chunk)
+            except BaseException:
+                temporary.close()
+                os.remove(temporary.name)
+                raise
+        digest = digest.hexdigest()
+        name = self.blob_name(digest, name)
+        path = self.path(name)
+        if os.path.exists(path):
+            os.remove(temporary.name)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(temporary.name, path)
+            if self.file_permissions_mode is not None:
+                os.chmod(path, self.file_permissions_mode)
+        self.register(name, digest, size)
+        return name
+
+    def register(self, name, digest='', size=0):
+        """
+        Registra el blob sin referencias si aún no existe (INSERT ... ON CONFLICT DO NOTHING).
+        """
+        MediaBlob = apps.get_model('courses', 'MediaBlob')
+        MediaBlob.objects.bulk_create(
+            [MediaBlob(name=name, digest=digest, size=size, ref_count=0)], ignore_conflicts=True,
+        )
+
+    def acquire(self, name):
+        """
+        Suma una referencia al blob con un UPDATE atómico. Los archivos que no son blobs
+        (anteriores a la deduplicación) no se cuentan.
+        """
+        if not self.owns(name):
+            return
+        MediaBlob = apps.get_model('courses', 'MediaBlob')
+        if not MediaBlob.objects.filter(name=name).update(ref_count=F('ref_count') + 1):
+            # Blob del disco sin registrar (p. ej. uno cuya última referencia se acaba de liberar).
+            self.register(name, os.path.splitext(os.path.basename(name))[0], self.size(name) if self.exists(name) else 0)
+            MediaBlob.objects.filter(name=name).update(ref_count=F('ref_count') + 1)
+
+    def release(self, name):
+        """
+        Resta una referencia al blob. Si llega a cero se elimina su registro y, al confirmar la
+        transacción, el archivo del disco, salvo que entretanto otra fila lo haya vuelto a usar.
+        """
+        if not self.owns(name):
+            return
+        MediaBlob = apps.get_model('courses', 'MediaBlob')
+        MediaBlob.objects.filter(name=name, ref_count__gt=0).update(ref_count=F('ref_count') - 1)
+        if MediaBlob.objects.filter(name=name, ref_count=0).delete()[0]:
+            transaction.on_commit(lambda: self.remove_unused(name))
+
+    def remove_unused(self, name):
+        """
+        Borra del disco un blob sin registro y sus miniaturas.
+        """
+        from . import thumbnails  # thumbnails importa este módulo.
+
+        MediaBlob = apps.get_model('courses', 'MediaBlob')
+        if not MediaBlob.objects.filter(name=name).exists():
+            super().delete(name)
+            thumbnails.remove(name)
+
+    def delete(self, name):
+        # Las referencias las llevan las señales de las filas (ver sync_references y release_all):
+        # FieldFile.delete() no debe restar una referencia que la fila todavía tiene.
+        pass
+
+
+class ProtectedStorage(DedupStorage):
+    """
+    DedupStorage en PROTECTED_MEDIA_ROOT y sin URL: sus archivos no se publican bajo MEDIA_URL.
+    """
+    blob_dir = PROTECTED_BLOB_DIR
+
+    @cached_property
+    def base_location(self):
+        return self._value_or_setting(
+            self._location, getattr(settings, 'PROTECTED_MEDIA_ROOT', os.path.join(settings.BASE_DIR, 'protected_media')),
+        )
+
+    @property
+    def base_url(self):
+        return None
+
+    def _clear_cached_properties(self, setting, **kwargs):
+        super()._clear_cached_properties(setting, **kwargs)
+        if setting == 'PROTECTED_MEDIA_ROOT':
+            self.__dict__.pop('base_location', None)
+            self.__dict__.pop('location', None)
+
+
+def get_media_storage():
+    """
+    Storage de las imágenes deduplicadas. Se usa como callable para poder cambiarlo en los ajustes.
+    """
+    return media_storage
+
+
+def get_protected_storage():
+    """
+    Storage de los archivos de los materiales.
+    """
+    return protected_storage
+
+
+# Sin location explícita siguen a MEDIA_ROOT y PROTECTED_MEDIA_ROOT aunque cambien (p. ej. en las pruebas).
+media_storage = DedupStorage()
+protected_storage = ProtectedStorage()
+
+
+def blob_storage(name):
+    """
+    Storage al que pertenece el blob 'name' según su directorio.
+    """
+    return protected_storage if protected_storage.owns(name) else media_storage
+
+
+def dedup_fields():
+    """
+    Devuelve [(modelo, nombre del campo)] de los campos que usan DedupStorage.
+    """
+    return [(apps.get_model(label), field) for label, field in DEDUP_FIELDS]
+
+
+def field_storage(model, field):
+    return model._meta.get_field(field).storage
+
+
+def remember_files(instance):
+    """
+    Guarda en la instancia los nombres de archivo cargados para detectar cambios al guardar.
+    """
+    instance._stored_files = {
+        field: getattr(instance, field).name
+        for label, field in DEDUP_FIELDS if label == instance._meta.label and field in instance.__dict__
+    }
+
+
+def sync_references(instance, created=False):
+    """
+    Ajusta las referencias de los campos que cambiaron de archivo al guardar la instancia (todos
+    si se acaba de crear): suma la del blob nuevo y resta la del anterior. Deja en
+    instance._changed_files los campos que cambiaron.
+    """
+    instance._changed_files = {}
+    for field, old_name in getattr(instance, '_stored_files', {}).items():
+        file = getattr(instance, field)
+        old_name = None if created else old_name
+        if (old_name or '') == (file.name or ''):
+            continue
+        instance._changed_files[field] = file.name
+        with transaction.atomic():
+            if file.name:
+                file.storage.acquire(file.name)
+            if old_name:
+                file.storage.release(old_name)
+    remember_files(instance)
+
+
+def release_all(instance):
+    """
+    Resta las referencias de una instancia eliminada.
+    """
+    for field, name in getattr(instance, '_stored_files', {}).items():
+        if name:
+            getattr(instance, field).storage.release(name)
+
+
+def recount_blobs():
+    """
+    Recalcula ref_count de todos los blobs a partir de los campos que los referencian.
+    """
+    MediaBlob = apps.get_model('courses', 'MediaBlob')
+    references = Counter()
+    for model, field in dedup_fields():
+        references.update(
+            model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+            .values_list(field, flat=True).iterator()
+        )
+    blobs = list(MediaBlob.objects.all())
+    for blob in blobs:
+        blob.ref_count = references.get(blob.name, 0)
+    MediaBlob.objects.bulk_update(blobs, ['ref_count'], batch_size=500)
+    return references
@@ -0,0 +1,27 @@
+from django import template
+from django.forms.utils import flatatt
+from django.templatetags.static import static
+from django.utils.html import format_html
+
+from courses import thumbnails
+
+register = template.Library()
+
+@register.simple_tag
+def responsive_image(file, width, default='', **attrs):
+    """
+    <img> con srcset de las miniaturas de 'file' para mostrarse a 'width' píxeles CSS; el
+    navegador elige la adecuada a la densidad de la pantalla. Sin archivo usa la imagen
+    estática 'default'.
+    """
+    attrs.setdefault('alt', '')
+    if not file:
+        return format_html('<img src="{}" width="{}"{}>', static(default), width, flatatt(attrs))
+    available = thumbnails.candidates(file)
+    if not available:
+        return format_html('<img src="{}" width="{}"{}>', file.url, width, flatatt(attrs))
+    src = thumbnails.best_fit(available, width)
+    srcset = ', '.join(f'{url} {size}w' for size, url in available)
+    return format_html(
+        '<img src="{}" srcset="{}" sizes="{}px" width="{}"{}>', src, srcset, width, width, flatatt(attrs),
+    )
@@ -1,3 +1,1195 @@
-from django.test import TestCase
+import asyncio
+import io
+import os
+import shutil
+import tempfile
+from datetime import date, timedelta
+from importlib import import_module
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from asgiref.sync import sync_to_async
+from PIL import Image
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.template import Context, Template
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, include, path, reverse
+from rest_framework.test import APIClient
+
+from . import (
+    analytics, async_views, counters, downloads, enrollments, exam_cache, exam_stats, forum_events, grading, search, storage,
+    threads, thumbnails, urls,
+)
+from .authorization import AccessContext
+from .instrumentation import query_stats, reset_query_stats
+from .models import (
+    Answer, Course, Enrollment, Exam, ExamAttempt, Forum, Grade, Material, MediaBlob, Post, Question, SearchEntry, User,
+)
+from .sidebar import get_sidebar
+
+
+def make_pdf(text):
+    """
+    PDF mínimo de una página con 'text' en Helvetica.
+    """
+    stream = f'BT /F1 12 Tf 72 720 Td ({text}) Tj ET'.encode()
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R '
+        b'/Resources << /Font << /F1 5 0 R >> >> >>',
+        b'<< /Length %d >>\nstream\n' % len(stream) + stream + b'\nendstream',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+    ]
+    content, offsets = b'%PDF-1.4\n', []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(content))
+        content += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+    xref = len(content)
+    content += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    content += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    content += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return content
+
+
+def make_course(instructor, title='Python'):
+    return Course.objects.create(
+        title=title, description='', start_date=date(2024, 1, 1), end_date=date(2024, 6, 1),
+        instructor=instructor,
+    )
+
+
+class SidebarTests(TestCase):
+    """
+    Pruebas de la navegación lateral cacheada por usuario y rol.
+    """
+    def setUp(self):
+        cache.clear()
+        self.instructor = User.objects.create_user('profe', 'profe@example.com', 'x', role='instructor')
+        self.student = User.objects.create_user('alumno', 'alumno@example.com', 'x')
+        self.course = make_course(self.instructor)
+        make_course(self.instructor, 'Otro')
+
+    def test_student_sees_only_enrollments(self):
+        self.assertEqual(get_sidebar(self.student)['courses'], [])
+        Enrollment.objects.create(student=self.student, course=self.course)
+        titles = [course['title'] for course in get_sidebar(self.student)['courses']]
+        self.assertEqual(titles, ['Python'])
+
+    def test_cached_until_exam_changes(self):
+        Enrollment.objects.create(student=self.student, course=self.course)
+        get_sidebar(self.student)
+        with self.assertNumQueries(0):
+            get_sidebar(self.student)
+        Exam.objects.create(title='Parcial', course=self.course, total_marks=10)
+        self.assertEqual([exam['title'] for exam in get_sidebar(self.student)['exams']], ['Parcial'])
+
+    @override_settings(SIDEBAR_LIMIT=1)
+    def test_limit_is_read_per_call(self):
+        sidebar = get_sidebar(self.instructor)
+        self.assertEqual([course['title'] for course in sidebar['courses']], ['Otro'])
+        self.assertTrue(sidebar['more_courses'])
+
+
+class CourseAPITests(TestCase):
+    """
+    Pruebas de la serialización anidada de la API sin consultas N+1.
+    """
+    def setUp(self):
+        self.instructor = User.objects.create_user('profe', 'profe@example.com', 'x', role='instructor')
+        self.client = APIClient()
+        self.client.force_authenticate(self.instructor)
+
+    def add_courses(self, count):
+        for n in range(count):
+            course = make_course(self.instructor, f'Curso {n}')
+            Material.objects.create(title='Guía', course=course, file_type='pdf')
+            for m in range(2):
+                exam = Exam.objects.create(title=f'Examen {m}', course=course, total_marks=10)
+                question = Question.objects.create(text='¿?', exam=exam, question_type='multiple_choice')
+                Answer.objects.create(text='Sí', question=question, is_correct=True)
+
+    def count_list_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_course_list_query_count_is_constant(self):
+        self.add_courses(2)
+        small = self.count_list_queries('/api/courses/')
+        self.add_courses(8)
+        self.assertEqual(self.count_list_queries('/api/courses/'), small)
+
+    def test_exam_list_query_count_is_constant(self):
+        self.add_courses(2)
+        small = self.count_list_queries('/api/exams/')
+        self.add_courses(8)
+        self.assertEqual(self.count_list_queries('/api/exams/'), small)
+
+    def test_sparse_fields_and_expand(self):
+        self.add_courses(1)
+        course = self.client.get('/api/courses/?fields=id,title').json()['results'][0]
+        self.assertEqual(set(course), {'id', 'title'})
+        course = self.client.get('/api/courses/?expand=materials').json()['results'][0]
+        self.assertEqual(course['materials'][0]['title'], 'Guía')
+        self.assertEqual(len(course['exams']), 2)
+        self.assertIsInstance(course['exams'][0], int)
+
+    def test_cursor_pagination(self):
+        self.add_courses(3)
+        page = self.client.get('/api/courses/?page_size=2&fields=id').json()
+        self.assertEqual(len(page['results']), 2)
+        rest = self.client.get(page['next']).json()
+        self.assertEqual(len(rest['results']), 1)
+        self.assertIsNone(rest['next'])
+
+
+class ExamContentCacheTests(TestCase):
+    """
+    Pruebas de la caché versionada del contenido de los exámenes.
+    """
+    def setUp(self):
+        cache.clear()
+        instructor = User.objects.create_user('profe', 'profe@example.com', 'x', role='instructor')
+        self.exam = Exam.objects.create(title='Final', course=make_course(instructor), total_marks=10)
+        self.question = Question.objects.create(text='¿2+2?', exam=self.exam, question_type='multiple_choice')
+        self.answer = Answer.objects.create(text='4', question=self.question, is_correct=True)
+
+    def test_content_is_cached_without_is_correct(self):
+        questions = exam_cache.get_questions(self.exam.pk)
+        self.assertEqual(questions[0]['answers'], [{'id': self.answer.pk, 'text': '4'}])
+        with self.assertNumQueries(0):
+            exam_cache.get_questions(self.exam.pk)
+
+    def test_answer_change_invalidates(self):
+        exam_cache.get_questions(self.exam.pk)
+        self.answer.text = 'cuatro'
+        self.answer.save()
+        self.assertEqual(exam_cache.get_questions(self.exam.pk)[0]['answers'][0]['text'], 'cuatro')
+
+
+class GradingTests(TestCase):
+    """
+    Pruebas del motor de calificación y de los intentos de examen.
+    """
+    def setUp(self):
+        instructor = User.objects.create_user('profe', 'profe@example.com', 'x', role='instructor')
+        self.student = User.objects.create_user('alumno', 'alumno@example.com', 'x')
+        self.exam = Exam.objects.create(title='Final', course=make_course(instructor), total_marks=100)
+        self.questions = []
+        for n in range(4):
+            question = Question.objects.create(text=f'P{n}', exam=self.exam, question_type='multiple_choice')
+            right = Answer.objects.create(text='Bien', question=question, is_correct=True)
+            wrong = Answer.objects.create(text='Mal', question=question)
+            self.questions.append((question, right, wrong))
+        self.attempt = ExamAttempt.objects.start(self.student, self.exam)
+
+    def test_marks_count_only_selected_correct_answers(self):
+        for n, (question, right, wrong) in enumerate(self.questions):
+            self.attempt.record_answer(question.pk, (right if n < 3 else wrong).pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(grading.score_attempt(self.attempt), (3, 4))
+        self.assertEqual(grading.calculate_marks(self.attempt), 75)
+
+    def test_resubmitting_replaces_answer(self):
+        question, right, wrong = self.questions[0]
+        self.attempt.record_answer(question.pk, wrong.pk)
+        with self.assertNumQueries(1):
+            self.attempt.record_answer(question.pk, right.pk)
+        self.assertEqual(grading.score_attempt(self.attempt), (1, 4))
+
+    def test_attempt_resumes_without_session(self):
+        question = exam_cache.get_question(self.exam.pk, self.attempt.question_ids, 2)
+        self.assertEqual(question['id'], self.questions[1][0].pk)
+        resumed = ExamAttempt.objects.start(self.student, self.exam)
+        self.assertEqual(resumed.pk, self.attempt.pk)
+        self.assertIsNone(exam_cache.get_question(self.exam.pk, resumed.question_ids, 5))
+
+    def test_answering_last_question_grades_exam(self):
+        self.client.force_login(self.student)
+        for n, (question, right, wrong) in enumerate(self.questions, start=1):
+            response = self.client.post(f'/exam/{self.exam.pk}/question/{n}/', {'answer': right.pk})
+        self.assertRedirects(response, f'/exam/{self.exam.pk}/result/')
+        self.assertEqual(Grade.objects.get(student=self.student, exam=self.exam).marks_obtained, 100)
+
+    def test_single_page_exam_grades_in_one_post(self):
+        self.client.force_login(self.student)
+        response = self.client.get(f'/exam/{self.exam.pk}/take/')
+        self.assertContains(response, 'P3')
+        data = {f'question_{question.pk}': right.pk for question, right, wrong in self.questions[:2]}
+        response = self.client.post(f'/exam/{self.exam.pk}/take/', data)
+        self.assertRedirects(response, f'/exam/{self.exam.pk}/result/')
+        self.assertEqual(Grade.objects.get(student=self.student, exam=self.exam).marks_obtained, 50)
+
+
+class ExamTimerTests(TestCase):
+    """
+    Pruebas del temporizador de los exámenes.
+    """
+    def setUp(self):
+        instructor = User.objects.create_user('profe', 'profe@example.com', 'x', role='instructor')
+        self.student = User.objects.create_user('alumno', 'alumno@example.com', 'x')
+        self.exam = Exam.objects.create(title='Final', course=make_course(instructor), total_marks=10, duration=20)
+        question = Question.objects.create(text='P', exam=self.exam, question_type='multiple_choice')
+        Answer.objects.create(text='Bien', question=question, is_correct=True)
+        self.url = reverse('exam_timer', args=[self.exam.pk])
+        self.client.force_login(self.student)
+
+    def test_heartbeat_reports_attempt_status(self):
+        self.assertEqual(self.client.get(self.url).json()['status'], 'not_started')
+        response = self.client.get(f'/exam/{self.exam.pk}/question/1/')
+        self.assertContains(response, 'data-exam-timer="%s"' % self.url)
+        self.assertContains(response, '20 minutos')
+        # El usuario y el intento; la sesión sale de la caché (cached_db).
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        self.assertIn('no-store', response['Cache-Control'])
+        state = response.json()
+        self.assertEqual(state['status'], 'in_progress')
+        self.assertTrue(1190 <= state['remaining_seconds'] <= 1200)
+
+        attempt = ExamAttempt.objects.get(student=self.student, exam=self.exam)
+        ExamAttempt.objects.filter(pk=attempt.pk).update(started_at=attempt.started_at - timedelta(days=1, minutes=5))
+        self.assertEqual(self.client.get(self.url).json(), {'status': 'expired', 'remaining_seconds': 0, 'heartbeat': 30})
+        self.assertRedirects(self.client.get(f'/exam/{self.exam.pk}/question/1/'), f'/exam/{self.exam.pk}/result/')
+        state = self.client.get(self.url).json()
+        self.assertEqual(state['status'], 'finished')
+        self.assertEqual(state['result_url'], f'/exam/{self.exam.pk}/result/')
+
+
+class SessionTests(TestCase):
+    """
+    Pruebas de la configuración de sesiones y mensajes.
+    """
+    def test_exam_answers_do_not_touch_the_session(self):
+        instructor = User.objects.create_user('profe', 'profe@example.com', 'x', role='instructor')
+        student = User.objects.create_user('alumno', 'alumno@example.com', 'x')
+        exam = Exam.objects.create(title='Final', course=make_course(instructor), total_marks=10)
+        question = Question.objects.create(text='P', exam=exam, question_type='multiple_choice')
+        answer = Answer.objects.create(text='Bien', question=question, is_correct=True)
+        Question.objects.create(text='P2', exam=exam, question_type='multiple_choice')
+        self.client.force_login(student)
+        self.client.get(f'/exam/{exam.pk}/question/1/')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(f'/exam/{exam.pk}/question/1/', {'answer': answer.pk}, follow=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '¡Correcto!')
+        # La plantilla base consume el mensaje y la cookie queda vacía.
+        self.assertEqual(self.client.cookies['messages'].value, '')
+        self.assertFalse([query for query in queries if 'django_session' in query['sql']])
+
+    def test_trim_sessions_removes_legacy_exam_keys(self):
+        store = import_module(settings.SESSION_ENGINE).SessionStore()
+        store.update({'exam_3_start_time': '2024-01-01T00:00:00', 'other': 1})
+        store.create()
+        call_command('trim_sessions', stdout=io.StringIO())
+        data = Session.objects.get(session_key=store.session_key).get_decoded()
+        self.assertEqual(data, {'other': 1})
+        self.assertEqual(dict(import_module(settings.SESSION_ENGINE).SessionStore(store.session_key).items()), {'other': 1})
+
+
+class ExamImportTests(TestCase):
+    """
+    Pruebas de la creación masiva de exámenes.
+    """
+    def setUp(self):
+        self.instructor = User.objects.create_user('profe', 'profe@example.com', 'x', role='instructor')
+        self.course = make_course(self.instructor)
+        self.client.force_login(self.instructor)
+
+    def test_form_and_csv_questions_are_bulk_created(self):
+        csv_file = SimpleUploadedFile(
+            'banco.csv',
+            'question_text,question_type,option1,option2,option3,option4,option5,correct_option\n'
+            '¿Capital de Francia?,multiple_choice,Roma,París,,,,2\n'
+            'Explica la herencia,text,,,,,,\n'.encode(),
+        )
+        response = self.client.post(f'/course/{self.course.pk}/exam/create/', {
+            'title': 'Parcial', 'total_marks': 10,
+            'question_text': ['¿2+2?'], 'question_type': ['multiple_choice'],
+            'option1': ['3'], 'option2': ['4'], 'option3': [''], 'option4': [''], 'option5': [''],
+            'correct_option': ['2'],
+            'import_file': csv_file,
+        })
+        self.assertRedirects(response, f'/{self.course.pk}/', fetch_redirect_response=False)
+        exam = Exam.objects.get(title='Parcial')
+        self.assertEqual(exam.questions.count(), 3)
+        self.assertEqual(
+            list(Answer.objects.filter(question__exam=exam, is_correct=True).values_list('text', flat=True)),
+            ['4', 'París'],
+        )
+
+    def test_invalid_file_creates_nothing(self):
+        bad = SimpleUploadedFile('banco.json', b'{"questions": [{"text": "x", "question_type": "essay"}]}')
+        self.client.post(f'/course/{self.course.pk}/exam/create/', {
+            'title': 'Parcial', 'total_marks': 10, 'import_file': bad,
+        })
+        self.assertFalse(Exam.objects.exists())
+
+
+class ForumThreadTests(TestCase):
+    """
+    Pruebas de la paginación por cursor de los hilos de los foros.
+    """
+    def setUp(self):
+        self.student = User.objects.create_user('alumno', 'alumno@example.com', 'x')
+        self.forum = Forum.objects.create(
+            course=make_course(self.student), title='Dudas', created_by=self.student,
+        )
+        self.posts = [
+            Post.objects.create(forum=self.forum, content=f'Mensaje {n}', created_by=self.student)
+            for n in range(7)
+        ]
+
+    def test_pages_walk_back_without_gaps(self):
+        page = threads.load_page(self.forum, page_size=3)
+        self.assertEqual([post.content for post in page.posts], ['Mensaje 4', 'Mensaje 5', 'Mensaje 6'])
+        seen = list(page.posts)
+        while page.has_older:
+            page = threads.load_page(self.forum, before=page.older_cursor, page_size=3)
+            seen = page.posts + seen
+        self.assertEqual(seen, self.posts)
+
+    def test_load_newer_since_cursor(self):
+        self.client.force_login(self.student)
+        cursor = threads.encode_cursor(self.posts[4])
+        data = self.client.get(f'/forum/{self.forum.pk}/posts/', {'after': cursor}).json()
+        self.assertEqual([post['content'] for post in data['posts']], ['Mensaje 5', 'Mensaje 6'])
+        self.assertEqual(data['cursor'], data['posts'][-1]['cursor'])
+        response = self.client.get(f'/forum/{self.forum.pk}/posts/', {'after': 'basura'})
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(QUERY_BUDGET_STRICT=True)
+    def test_forum_page_query_count_is_constant(self):
+        self.client.force_login(self.student)
+        self.client.get(f'/forum/{self.forum.pk}/')
+        with CaptureQueriesContext(connection) as small:
+            self.assertEqual(self.client.get(f'/forum/{self.forum.pk}/').status_code, 200)
+        for n in range(20):
+            author = User.objects.create_user(f'autor{n}', f'autor{n}@example.com', 'x')
+            Post.objects.create(forum=self.forum, content='Más', created_by=author)
+        with CaptureQueriesContext(connection) as large:
+            self.client.get(f'/forum/{self.forum.pk}/')
+        self.assertEqual(len(large), len(small))
+
+
+class ActivityCounterTests(TestCase):
+    """
+    Pruebas de los contadores desnormalizados de cursos y foros.
+    """
+    def setUp(self):
+        self.instructor = User.objects.create_user('profe', 'profe@example.com', 'x', role='instructor')
+        self.student = User.objects.create_user('alumno', 'alumno@example.com', 'x')
+        self.course = make_course(self.instructor)
+        self.forum = Forum.objects.create(course=self.course, title='Dudas', created_by=self.instructor)
+
+    def test_hooks_keep_counters_in_sync(self):
+        enrollment = Enrollment.objects.create(student=self.student, course=self.course)
+        exam = Exam.objects.create(title='Parcial', course=self.course, total_marks=10)
+        first = Post.objects.create(forum=self.forum, content='Hola', created_by=self.student)
+        last = Post.objects.create(forum=self.forum, content='Adiós', created_by=self.student)
+        self.course.refresh_from_db()
+        self.forum.refresh_from_db()
+        self.assertEqual((self.course.enrollment_count, self.course.exam_count), (1, 1))
+        self.assertEqual((self.forum.post_count, self.forum.last_post_at), (2, last.created_at))
+
+        last.delete()
+        enrollment.delete()
+        exam.delete()
+        self.course.refresh_from_db()
+        self.forum.refresh_from_db()
+        self.assertEqual((self.course.enrollment_count, self.course.exam_count), (0, 0))
+        self.assertEqual((self.forum.post_count, self.forum.last_post_at), (1, first.created_at))
+
+    def test_stale_instance_save_keeps_counters(self):
+        stale = Course.objects.get(pk=self.course.pk)
+        Enrollment.objects.create(student=self.student, course=self.course)
+        stale.title = 'Python avanzado'
+        stale.save()
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.enrollment_count, 1)
+
+    def test_recount_rebuilds_in_bulk(self):
+        Enrollment.objects.bulk_create([Enrollment(student=self.student, course=self.course)])
+        Post.objects.bulk_create([Post(forum=self.forum, content='Hola', created_by=self.student)])
+        with self.assertNumQueries(2):
+            counters.recount_courses()
+            counters.recount_forums()
+        self.course.refresh_from_db()
+        self.forum.refresh_from_db()
+        self.assertEqual(self.course.enrollment_count, 1)
+        self.assertEqual(self.forum.post_count, 1)
+        self.assertIsNotNone(self.forum.last_post_at)
+        call_command('recount', stdout=io.StringIO())
+
+    def test_lists_show_activity_without_per_row_queries(self):
+        self.client.force_login(self.instructor)
+        for n in range(5):
+            forum = Forum.objects.create(course=self.course, title=f'Foro {n}', created_by=self.instructor)
+            Post.objects.create(forum=forum, content='Hola', created_by=self.student)
+        self.client.get(f'/course/{self.course.pk}/foros/')
+        with CaptureQueriesContext(connection) as small:
+            response = self.client.get(f'/course/{self.course.pk}/foros/')
+        self.assertContains(response, '1 publicación')
+        for n in range(5):
+            Forum.objects.create(course=self.course, title=f'Nuevo {n}', created_by=self.instructor)
+        with CaptureQueriesContext(connection) as large:
+            self.client.get(f'/course/{self.course.pk}/foros/')
+        self.assertEqual(len(large), len(small))
+
+
+class AnalyticsTests(TestCase):
+    """
+    Pruebas de la analítica materializada de los dashboards.
+    """
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'x')
+        self.instructor = User.objects.create_user('profe', 'profe@example.com', 'x', role='instructor')
+        self.course = make_course(self.instructor)
+        self.other = make_course(User.objects.create_user('otro', 'otro@example.com', 'x', role='instructor'), 'Otro')
+        self.exam = Exam.objects.create(title='Final', course=self.course, total_marks=10)
+        for n, marks in enumerate([2, 9, 10]):
+            student = User.objects.create_user(f'alumno{n}', f'alumno{n}@example.com', 'x')
+            Enrollment.objects.create(student=student, course=self.course)
+            Grade.objects.create(student=student, exam=self.exam, marks_obtained=marks)
+            ExamAttempt.objects.start(student, self.exam)
+        Enrollment.objects.create(student=student, course=self.other)
+
+    def test_refresh_builds_summaries(self):
+        self.assertEqual(analytics.refresh_all(), {'enrollments': 3, 'grades': 1, 'activity': 2})
+        data = analytics.dashboard()
+        self.assertEqual(data['enrollment_chart']['data'][-1], 4)
+        self.assertEqual(data['exam_stats'][0].distribution, [0, 0, 1, 0, 0, 0, 0, 0, 0, 2])
+        self.assertEqual([(stat.course, stat.active_students) for stat in data['course_activity']],
+                         [(self.course, 3), (self.other, 0)])
+        own = analytics.dashboard(Course.objects.filter(instructor=self.instructor))
+        self.assertEqual(own['enrollments_total'], 3)
+
+    def test_dashboards_read_only_summaries(self):
+        analytics.refresh_all()
+        for user, url in [(self.admin, reverse('admin_dashboard')), (self.instructor, reverse('instructor_dashboard'))]:
+            self.client.force_login(user)
+            self.client.get(url)
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertContains(response, 'Final')
+            tables = ' '.join(query['sql'] for query in queries)
+            self.assertNotIn('courses_grade"', tables)
+            self.assertNotIn('courses_enrollment"', tables)
+
+
+class ExamStatisticsTests(TestCase):
+    """
+    Pruebas del análisis de ítems vectorizado de los exámenes.
+    """
+    def setUp(self):
+        self.instructor = User.objects.create_user('profe', 'profe@example.com', 'x', role='instructor')
+        self.exam = Exam.objects.create(title='Final', course=make_course(self.instructor), total_marks=3)
+        self.questions = []
+        for n in range(3):
+            question = Question.objects.create(text=f'P{n}', exam=self.exam, question_type='multiple_choice')
+            right = Answer.objects.create(text='Bien', question=question, is_correct=True)
+            wrong = Answer.objects.create(text='Mal', question=question)
+            self.questions.append((question, right, wrong))
+        # Aciertos por intento: 3, 2, 1 y 0 preguntas.
+        for n, hits in enumerate([3, 2, 1, 0]):
+            student = User.objects.create_user(f'alumno{n}', f'alumno{n}@example.com', 'x')
+            attempt = ExamAttempt.objects.start(student, self.exam)
+            attempt.record_answers([
+                (question.pk, (right if m < hits else wrong).pk)
+                for m, (question, right, wrong) in enumerate(self.questions)
+            ])
+            grading.finish_attempt(attempt)
+
+    def test_statistics_match_hand_computation(self):
+        stats = exam_stats.exam_statistics(self.exam)
+        self.assertEqual(stats['grades']['count'], 4)
+        self.assertAlmostEqual(stats['grades']['mean'], 1.5)
+        self.assertAlmostEqual(stats['grades']['median'], 1.5)
+        self.assertEqual(sum(stats['grades']['histogram']['counts']), 4)
+        self.assertEqual([question['difficulty'] for question in stats['questions']], [0.75, 0.5, 0.25])
+        self.assertEqual([question['discrimination'] for question in stats['questions']], [1.0, 1.0, 1.0])
+        self.assertAlmostEqual(stats['cronbach_alpha'], 0.75)
+
+    def test_view_and_api_are_for_the_instructor(self):
+        student = User.objects.get(username='alumno0')
+        self.client.force_login(student)
+        self.assertTemplateUsed(self.client.get(f'/exam/{self.exam.pk}/statistics/'), '404.html')
+        api = APIClient()
+        api.force_authenticate(student)
+        self.assertEqual(api.get(f'/api/exams/{self.exam.pk}/statistics/').status_code, 403)
+
+        self.client.force_login(self.instructor)
+        self.assertContains(self.client.get(f'/exam/{self.exam.pk}/statistics/'), 'Alfa de Cronbach')
+        api.force_authenticate(self.instructor)
+        self.assertEqual(api.get(f'/api/exams/{self.exam.pk}/statistics/').json()['attempts'], 4)
+
+    def test_large_response_matrix(self):
+        # El rendimiento lo mide el comando benchmark_exam_stats; aquí solo la corrección.
+        rng = np.random.default_rng(0)
+        attempt_ids = np.arange(1, 100_001, dtype=np.int64)
+        question_ids = np.arange(1, 21, dtype=np.int64)
+        correct = rng.random((100_000, 20)) < 0.6
+        rows, cols = np.nonzero(correct)
+        pairs = np.column_stack([attempt_ids[rows], question_ids[cols]])
+        matrix = exam_stats.response_matrix(attempt_ids, question_ids, pairs)
+        self.assertTrue(np.array_equal(matrix.astype(bool), correct))
+        summary = exam_stats.grade_summary(matrix.sum(axis=1).astype(float), 20)
+        self.assertEqual(summary['count'], 100_000)
+        self.assertEqual(sum(summary['histogram']['counts']), 100_000)
+        items = exam_stats.item_analysis(matrix)
+        self.assertEqual(len(items['difficulty']), 20)
+        self.assertTrue(all(0.55 < difficulty < 0.65 for difficulty in items['difficulty']))
+
+
+class ExportTests(TestCase):
+    """
+    Pruebas de las exportaciones en streaming.
+    """
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'x')
+        self.instructor = User.objects.create_user('profe', 'profe@example.com', 'x', role='instructor')
+        self.course = make_course(self.instructor)
+        self.other = make_course(User.objects.create_user('otro', 'otro@example.com', 'x', role='instructor'), 'Otro')
+        self.exam = Exam.objects.create(title='Final', course=self.course, total_marks=10)
+        other_exam = Exam.objects.create(title='Ajeno', course=self.other, total_marks=10)
+        for n in range(3):
+            student = User.objects.create_user(f'alumno{n}', f'alumno{n}@example.com', 'x')
+            Enrollment.objects.create(student=student, course=self.course)
+            Grade.objects.create(student=student, exam=self.exam, marks_obtained=n)
+            Grade.objects.create(student=student, exam=other_exam, marks_obtained=n)
+
+    def read_csv(self, response):
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+
+    def test_grades_csv_streams_filtered_rows(self):
+        self.client.force_login(self.admin)
+        lines = self.read_csv(self.client.get('/export/grades/'))
+        self.assertEqual(lines[0], 'Estudiante,Correo,Curso,Examen,Nota,Puntaje total,Fecha')
+        self.assertEqual(len(lines), 7)
+        lines = self.read_csv(self.client.get('/export/grades/', {'exam': self.exam.pk}))
+        self.assertEqual(len(lines), 4)
+        lines = self.read_csv(self.client.get('/export/grades/', {'until': '2000-01-01'}))
+        self.assertEqual(len(lines), 1)
+
+    def test_instructor_exports_only_own_courses(self):
+        self.client.force_login(self.instructor)
+        lines = self.read_csv(self.client.get('/export/grades/'))
+        self.assertTrue(all('Ajeno' not in line for line in lines))
+        self.assertEqual(len(lines), 4)
+        self.assertEqual(self.client.get('/export/roster/').status_code, 400)
+        lines = self.read_csv(self.client.get('/export/roster/', {'course': self.course.pk}))
+        self.assertEqual(len(lines), 4)
+
+    def test_enrollments_xlsx(self):
+        from openpyxl import load_workbook
+
+        self.client.force_login(self.admin)
+        response = self.client.get('/export/enrollments/', {'format': 'xlsx'})
+        sheet = load_workbook(io.BytesIO(b''.join(response.streaming_content))).active
+        rows = list(sheet.values)
+        self.assertEqual(rows[0][0], 'Estudiante')
+        self.assertEqual(len(rows), 4)
+
+    def test_students_cannot_export(self):
+        self.client.force_login(User.objects.get(username='alumno0'))
+        self.assertTemplateUsed(self.client.get('/export/grades/'), '404.html')
+
+
+class BulkEnrollmentTests(TestCase):
+    """
+    Pruebas de las inscripciones masivas y los borrados por lotes.
+    """
+    def setUp(self):
+        cache.clear()
+        self.instructor = User.objects.create_user('profe', 'profe@example.com', 'x', role='instructor')
+        self.course = make_course(self.instructor)
+        self.other = make_course(User.objects.create_user('otro', 'otro@example.com', 'x', role='instructor'), 'Otro')
+        self.students = [User.objects.create_user(f'alumno{n}', f'alumno{n}@example.com', 'x') for n in range(3)]
+        Enrollment.objects.create(student=self.students[0], course=self.course)
+
+    def test_bulk_enroll_reports_each_row(self):
+        pairs = [
+            ('alumno0', self.course.pk), ('alumno1', self.course.pk), ('alumno1', str(self.course.pk)),
+            ('nadie', self.course.pk), ('profe', self.course.pk), ('alumno2', 999), ('alumno2', 'x'),
+            ('alumno2', self.other.pk),
+        ]
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(6):
+            results = enrollments.bulk_enroll(pairs, user=self.instructor)
+        self.assertEqual([result['status'] for result in results], [
+            'already_enrolled', 'created', 'duplicate', 'unknown_user', 'not_student', 'unknown_course',
+            'invalid', 'forbidden',
+        ])
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.enrollment_count, 2)
+        self.assertEqual([course['title'] for course in get_sidebar(self.students[1])['courses']], ['Python'])
+
+    def test_csv_upload_and_api(self):
+        self.client.force_login(self.instructor)
+        upload = SimpleUploadedFile('alumnos.csv', f'username,course\nalumno1,{self.course.pk}\n'.encode())
+        response = self.client.post('/enrollments/import/', {'file': upload})
+        self.assertEqual(response.context['summary'], {'created': 1})
+        api = APIClient()
+        api.force_authenticate(self.instructor)
+        response = api.post('/api/enrollments/bulk/', {
+            'enrollments': [{'username': 'alumno2', 'course': self.course.pk}],
+        }, format='json')
+        self.assertEqual(response.json()['summary'], {'created': 1})
+        api.force_authenticate(self.students[0])
+        self.assertEqual(api.post('/api/enrollments/bulk/', [], format='json').status_code, 403)
+
+    def test_delete_is_scoped_and_batched(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            enrollments.bulk_enroll([
+                (student.username, course.pk) for student in self.students for course in (self.course, self.other)
+            ])
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.assertEqual(enrollments.delete_enrollments(self.course, batch_size=2), 3)
+        self.assertEqual(sum(query['sql'].startswith('DELETE') for query in queries), 2)
+        self.assertEqual(len(callbacks), 2)
+        self.assertFalse(Enrollment.objects.filter(course=self.course).exists())
+        self.assertEqual(Enrollment.objects.filter(course=self.other).count(), 3)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.enrollment_count, 0)
+
+        self.client.force_login(self.students[0])
+        self.client.post(f'/course/{self.other.pk}/delete_enrollments/')
+        self.assertEqual(Enrollment.objects.filter(course=self.other).count(), 3)
+
+
+@override_settings(SEARCH_ASYNC=False)
+class DedupStorageTests(TestCase):
+    """
+    Pruebas del almacenamiento deduplicado de archivos subidos.
+    """
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.protected_root = os.path.join(self.media_root, 'protected')
+        settings = override_settings(MEDIA_ROOT=self.media_root, PROTECTED_MEDIA_ROOT=self.protected_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.instructor = User.objects.create_user('profe', 'profe@example.com', 'x', role='instructor')
+        self.course = make_course(self.instructor)
+
+    def upload(self, name, content=None):
+        content = make_pdf('Contenido') if content is None else content
+        material = Material(course=self.course, title=name)
+        material.file.save(name, SimpleUploadedFile(name, content))
+        return material
+
+    def test_same_content_is_stored_once(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.upload('Historia.pdf')
+            second = self.upload('Historia_copia.pdf')
+            self.upload('Otro.pdf', make_pdf('Otro contenido'))
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertEqual(MediaBlob.objects.count(), 2)
+        self.assertEqual(MediaBlob.objects.get(name=first.file.name).ref_count, 2)
+        self.assertTrue(first.file.name.startswith(storage.PROTECTED_BLOB_DIR + '/'))
+        self.assertEqual(len(os.listdir(os.path.join(self.protected_root, os.path.dirname(first.file.name)))), 1)
+
+    def test_blob_is_removed_with_last_reference(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.upload('Historia.pdf')
+            second = self.upload('Historia_copia.pdf')
+        path = first.file.path
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertEqual(MediaBlob.objects.get(name=second.file.name).ref_count, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            second = Material.objects.get(pk=second.pk)
+            second.file = self.upload('Nuevo.pdf', make_pdf('Nuevo')).file.name
+            second.save()
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(MediaBlob.objects.filter(name=first.file.name).exists())
+
+    def test_references_follow_the_rows(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.upload('Historia.pdf')
+            first.save()
+            second = Material.objects.create(course=self.course, title='Copia', file=first.file.name)
+        name, path = first.file.name, first.file.path
+        self.assertEqual(MediaBlob.objects.get(name=name).ref_count, 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            first.file.delete()
+        self.assertEqual(MediaBlob.objects.get(name=name).ref_count, 1)
+        self.assertTrue(os.path.exists(path))
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(MediaBlob.objects.filter(name=name).exists())
+        self.assertFalse(os.path.exists(path))
+
+        orphan = Material(course=self.course, title='Borrador')
+        orphan.file.save('Borrador.pdf', SimpleUploadedFile('Borrador.pdf', make_pdf('Borrador')), save=False)
+        self.assertEqual(MediaBlob.objects.get(name=orphan.file.name).ref_count, 0)
+        call_command('dedup_media', '--prune', '--prune-age', '0', stdout=io.StringIO())
+        self.assertFalse(MediaBlob.objects.filter(name=orphan.file.name).exists())
+        self.assertFalse(os.path.exists(orphan.file.path))
+
+    def test_dedup_media_command(self):
+        directory = os.path.join(self.media_root, 'materials')
+        os.makedirs(directory)
+        for name in ('a.pdf', 'a_x1.pdf', 'b.pdf'):
+            with open(os.path.join(directory, name), 'wb') as handle:
+                handle.write(b'b' if name == 'b.pdf' else b'a')
+        material = Material.objects.create(course=self.course, title='a', file='materials/a_x1.pdf')
+        # Un material anterior a ProtectedStorage, con su blob en MEDIA_ROOT.
+        public_blob = storage.media_storage.save('c.pdf', SimpleUploadedFile('c.pdf', make_pdf('C')))
+        public = Material.objects.create(course=self.course, title='c', file=public_blob)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('dedup_media', stdout=io.StringIO())
+        material.refresh_from_db()
+        self.assertEqual(
+            material.file.name, storage.protected_storage.blob_name(storage.hash_file(material.file.path), 'a.pdf'),
+        )
+        self.assertTrue(material.file.path.startswith(self.protected_root))
+        self.assertEqual(os.listdir(directory), [])
+        self.assertEqual(MediaBlob.objects.get(name=material.file.name).ref_count, 1)
+        public.refresh_from_db()
+        self.assertTrue(storage.protected_storage.owns(public.file.name))
+        self.assertTrue(os.path.exists(public.file.path))
+        self.assertFalse(os.path.exists(storage.media_storage.path(public_blob)))
+        self.assertFalse(MediaBlob.objects.filter(name=public_blob).exists())
+        self.assertEqual(MediaBlob.objects.count(), 3)
+
+
+@override_settings(THUMBNAIL_ASYNC=False)
+class ThumbnailTests(TestCase):
+    """
+    Pruebas de las miniaturas de imágenes y de la etiqueta responsive_image.
+    """
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings = override_settings(MEDIA_ROOT=self.media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        cache.clear()
+        self.user = User.objects.create_user('alumno', 'alumno@example.com', 'x')
+
+    def image(self, color='red', size=(1200, 900)):
+        content = io.BytesIO()
+        Image.new('RGB', size, color).save(content, 'PNG')
+        return SimpleUploadedFile('foto.png', content.getvalue())
+
+    def render(self, user):
+        return Template('{% load images %}{% responsive_image user.profile_picture 50 %}').render(
+            Context({'user': user})
+        )
+
+    def test_thumbnails_generated_on_upload(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.profile_picture = self.image()
+            self.user.save()
+        digest = thumbnails.source_digest(self.user.profile_picture.name)
+        for size in thumbnails.THUMBNAIL_SIZES:
+            with Image.open(storage.media_storage.path(thumbnails.thumbnail_name(digest, size))) as thumbnail:
+                self.assertEqual(thumbnail.size, (size, size * 3 // 4))
+                self.assertEqual(thumbnail.format.lower(), thumbnails.THUMBNAIL_FORMAT)
+        html = self.render(self.user)
+        self.assertIn(f'_64.{thumbnails.THUMBNAIL_FORMAT} 64w', html)
+        self.assertIn('sizes="50px"', html)
+        self.assertNotIn(self.user.profile_picture.url, html)
+
+    def test_sizes_are_cached_and_removed_with_the_blob(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.profile_picture = self.image()
+            self.user.save()
+        self.render(self.user)
+        with mock.patch.object(storage.media_storage, 'exists') as exists:
+            self.assertIn('srcset=', self.render(self.user))
+        exists.assert_not_called()
+        digest = thumbnails.source_digest(self.user.profile_picture.name)
+        path = storage.media_storage.path(thumbnails.thumbnail_name(digest, 64))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+        self.assertFalse(os.path.exists(path))
+        self.assertIsNone(cache.get(thumbnails.sizes_key(digest)))
+
+    def test_dashboard_shows_course_thumbnails(self):
+        course = make_course(User.objects.create_user('profe', 'profe@example.com', 'x', role='instructor'))
+        with self.captureOnCommitCallbacks(execute=True):
+            course.image = self.image()
+            course.save()
+        Enrollment.objects.create(student=self.user, course=course)
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('student_dashboard'))
+        self.assertContains(response, f'_128.{thumbnails.THUMBNAIL_FORMAT} 128w')
+        self.assertNotContains(response, f'src="{course.image.url}"')
+
+    def test_missing_thumbnails_fall_back_to_original(self):
+        self.user.profile_picture = storage.media_storage.save('legacy.png', self.image('blue'))
+        User.objects.filter(pk=self.user.pk).update(profile_picture=self.user.profile_picture.name)
+        with mock.patch.object(thumbnails, 'schedule') as schedule:
+            html = self.render(self.user)
+        schedule.assert_called_once_with(self.user.profile_picture.name)
+        self.assertIn(f'src="{self.user.profile_picture.url}"', html)
+        call_command('generate_thumbnails', stdout=io.StringIO())
+        self.assertIn('srcset=', self.render(self.user))
+
+
+class MaterialDownloadTests(TestCase):
+    """
+    Pruebas de la descarga protegida de materiales con Range, ETag y X-Sendfile.
+    """
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.protected_root = os.path.join(self.media_root, 'protected')
+        settings = override_settings(MEDIA_ROOT=self.media_root, PROTECTED_MEDIA_ROOT=self.protected_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.instructor = User.objects.create_user('profe', 'profe@example.com', 'x', role='instructor')
+        self.student = User.objects.create_user('alumno', 'alumno@example.com', 'x')
+        self.course = make_course(self.instructor)
+        self.content = bytes(range(256)) * 40
+        self.material = Material(course=self.course, title='Apuntes')
+        self.material.file.save('apuntes.pdf', SimpleUploadedFile('apuntes.pdf', self.content))
+        self.url = reverse('material_download', args=[self.material.pk])
+
+    def content_of(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_requires_enrollment(self):
+        self.client.force_login(self.student)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        Enrollment.objects.create(student=self.student, course=self.course, status='cancelado')
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        Enrollment.objects.filter(student=self.student).update(status='inscrito')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.content_of(response), self.content)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('Apuntes.pdf', response['Content-Disposition'])
+
+    def test_file_is_not_public(self):
+        self.assertTrue(self.material.file.path.startswith(self.protected_root))
+        with self.assertRaises(ValueError):
+            self.material.file.url
+        self.client.force_login(self.instructor)
+        self.assertEqual(self.client.get(settings.MEDIA_URL + self.material.file.name).status_code, 404)
+        api = APIClient()
+        api.force_authenticate(self.instructor)
+        self.assertTrue(api.get(f'/api/materials/{self.material.pk}/').json()['file'].endswith(self.url))
+
+    def test_range_and_etag(self):
+        self.client.force_login(self.instructor)
+        response = self.client.get(self.url, HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(self.content)}')
+        self.assertEqual(self.content_of(response), self.content[100:200])
+        self.assertEqual(self.content_of(self.client.get(self.url, HTTP_RANGE='bytes=-10')), self.content[-10:])
+        self.assertEqual(self.client.get(self.url, HTTP_RANGE=f'bytes={len(self.content)}-').status_code, 416)
+
+        etag = response['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        stale = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"otro"')
+        self.assertEqual(stale.status_code, 200)
+
+    def test_sendfile(self):
+        self.client.force_login(self.instructor)
+        with mock.patch.object(downloads, 'MEDIA_SENDFILE', 'x-accel-redirect'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/' + self.material.file.name)
+        self.assertEqual(response.content, b'')
+        with mock.patch.object(downloads, 'MEDIA_SENDFILE', 'x-sendfile'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Sendfile'], self.material.file.path)
+
+
+@override_settings(SEARCH_ASYNC=False)
+class SearchTests(TestCase):
+    """
+    Pruebas de la búsqueda de texto completo y de su índice.
+    """
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.protected_root = os.path.join(self.media_root, 'protected')
+        settings = override_settings(MEDIA_ROOT=self.media_root, PROTECTED_MEDIA_ROOT=self.protected_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.instructor = User.objects.create_user('profe', 'profe@example.com', 'x', role='instructor')
+        self.student = User.objects.create_user('alumno', 'alumno@example.com', 'x')
+        self.course = make_course(self.instructor, 'Geometría')
+        self.other = make_course(User.objects.create_user('otro', 'otro@example.com', 'x', role='instructor'), 'Otro')
+        self.forum = Forum.objects.create(course=self.course, title='Dudas de triángulos', created_by=self.instructor)
+        self.post = Post.objects.create(forum=self.forum, content='¿Cómo se aplica el teorema?', created_by=self.student)
+        Post.objects.create(forum=Forum.objects.create(course=self.other, title='Foro', created_by=self.instructor),
+                            content='Otro teorema', created_by=self.instructor)
+
+    def kinds(self, text, user):
+        return [(result.kind, result.object_id) for result in search.search(text, user)]
+
+    def test_signals_keep_index_updated(self):
+        self.assertEqual(self.kinds('teorema', self.instructor), [('post', self.post.pk)])
+        self.post.content = 'Pregunta sobre ángulos'
+        self.post.save()
+        self.assertEqual(self.kinds('teorema', self.instructor), [])
+        self.assertEqual(self.kinds('angulos', self.instructor), [('post', self.post.pk)])
+        self.post.delete()
+        self.assertEqual(self.kinds('angulos', self.instructor), [])
+
+    def test_results_are_ranked_and_filtered(self):
+        self.course.description = 'Triángulos y polígonos'
+        self.course.save()
+        self.assertEqual(self.kinds('triangulos', self.student), [])
+        Enrollment.objects.create(student=self.student, course=self.course, status='inscrito')
+        self.assertEqual(
+            self.kinds('triangulos', self.student), [('forum', self.forum.pk), ('course', self.course.pk)],
+        )
+        self.assertEqual(len(self.kinds('teorema', User.objects.create_superuser('admin', 'a@example.com', 'x'))), 2)
+
+    @override_settings(SEARCH_MAX_CANDIDATES=5)
+    def test_candidate_window_only_limits_posts(self):
+        course = make_course(self.instructor, 'Curso de Python avanzado')
+        posts = [
+            Post.objects.create(forum=self.forum, content=f'Duda {n} de python', created_by=self.student)
+            for n in range(6)
+        ]
+        self.assertEqual(search.rebuild(), 13)
+        results = self.kinds('python', self.instructor)
+        self.assertEqual(results[0], ('course', course.pk))
+        self.assertEqual(sorted(results[1:]), [('post', post.pk) for post in posts[1:]])
+
+    def test_pdf_text_is_indexed(self):
+        material = Material(course=self.course, title='Apuntes', file_type='pdf')
+        with self.captureOnCommitCallbacks(execute=True):
+            material.file.save('apuntes.pdf', SimpleUploadedFile('apuntes.pdf', make_pdf('Teorema de Pitagoras')))
+        self.assertIn(('material', material.pk), self.kinds('pitagoras', self.instructor))
+        with mock.patch.object(search, 'BATCH_SIZE', 2), CaptureQueriesContext(connection) as queries:
+            self.assertEqual(search.rebuild(), 7)
+        self.assertEqual(sum(query['sql'].startswith('INSERT INTO "courses_searchentry"') for query in queries), 4)
+        self.assertEqual(SearchEntry.objects.count(), 7)
+        self.assertIn(('material', material.pk), self.kinds('pitagoras', self.instructor))
+
+    def test_view_and_api(self):
+        Post.objects.create(forum=self.forum, content='<script>teorema</script>', created_by=self.instructor)
+        self.client.force_login(self.instructor)
+        response = self.client.get(reverse('search'), {'q': 'teorema'})
+        self.assertContains(response, '&lt;script&gt;<mark>teorema</mark>')
+        self.assertContains(response, f'#post-{self.post.pk}')
+        client = APIClient()
+        client.force_authenticate(self.instructor)
+        data = client.get(reverse('api_search'), {'q': '(teorema*"'}).json()
+        self.assertEqual(len(data['results']), 2)
+        self.assertEqual(data['results'][0]['title'], 'Dudas de triángulos')
+
+
+class ForumEventsTests(TestCase):
+    """
+    Pruebas de las publicaciones en tiempo real por server-sent events.
+    """
+    def setUp(self):
+        self.instructor = User.objects.create_user('profe', 'profe@example.com', 'x', role='instructor')
+        self.forum = Forum.objects.create(course=make_course(self.instructor), title='Dudas', created_by=self.instructor)
+        self.first = Post.objects.create(forum=self.forum, content='Primera', created_by=self.instructor)
+        self.url = reverse('forum_events', args=[self.forum.pk])
+
+    def create_post(self, content):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Post.objects.create(forum=self.forum, content=content, created_by=self.instructor)
+
+    def test_stream_without_asgi_sends_missed_posts(self):
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.client.force_login(self.instructor)
+        self.assertEqual(self.client.get(self.url, {'after': 'x'}).status_code, 400)
+        second = Post.objects.create(forum=self.forum, content='Segunda', created_by=self.instructor)
+        response = self.client.get(self.url, HTTP_LAST_EVENT_ID=threads.encode_cursor(self.first))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = b''.join(response.streaming_content).decode()
+        self.assertIn(f'id: {threads.encode_cursor(second)}\nevent: post\n', body)
+        self.assertNotIn('Primera', body)
+
+    async def test_live_stream_receives_new_posts(self):
+        cursor = threads.encode_cursor(self.first)
+        stream = forum_events.event_stream(self.forum.pk, cursor)
+        self.assertTrue((await stream.__anext__()).startswith('retry:'))
+        waiting = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0)
+        post = await sync_to_async(self.create_post)('En directo')
+        event = await asyncio.wait_for(waiting, 2)
+        self.assertIn('"content": "En directo"', event)
+        self.assertIn(f'id: {threads.encode_cursor(post)}', event)
+        await stream.aclose()
+        self.assertEqual(forum_events.get_hub().publish(forum_events.channel(self.forum.pk), {}), 0)
+
+
+class AsyncURLConf:
+    """
+    urlconf del proyecto con las vistas de lectura asíncronas, como con ASGI (ASYNC_VIEWS).
+    """
+    urlpatterns = [
+        path('api/', include('courses.api_urls')),
+        path('', include([
+            URLPattern(
+                pattern.pattern, getattr(async_views, pattern.callback.view_class.__name__).as_view(),
+                pattern.default_args, pattern.name,
+            )
+            if pattern.name in ('index', 'course_list', 'course_detail', 'forum_list', 'forum_detail') else pattern
+            for pattern in urls.urlpatterns
+        ])),
+    ]
+
+
+@override_settings(ROOT_URLCONF=AsyncURLConf, QUERY_BUDGET_STRICT=True, SERVER_TIMING_HEADERS=True)
+class AsyncViewTests(TestCase):
+    """
+    Pruebas de las vistas de lectura asíncronas.
+    """
+    def setUp(self):
+        cache.clear()
+        self.instructor = User.objects.create_user('profe', 'profe@example.com', 'x', role='instructor')
+        self.student = User.objects.create_user('alumno', 'alumno@example.com', 'x')
+        self.course = make_course(self.instructor)
+        self.other = make_course(self.instructor, 'Otro curso')
+        Enrollment.objects.create(student=self.student, course=self.course)
+        Exam.objects.create(title='Parcial', course=self.course, total_marks=10)
+        self.forum = Forum.objects.create(course=self.course, title='Dudas', created_by=self.instructor)
+        Post.objects.create(forum=self.forum, content='Primera', created_by=self.instructor)
+
+    async def test_read_views(self):
+        response = await self.async_client.get('/')
+        self.assertEqual(response.status_code, 302)
+        await self.async_client.aforce_login(self.student)
+        response = await self.async_client.get('/')
+        self.assertIs(response.resolver_match.func.view_class, async_views.IndexView)
+        self.assertContains(response, 'Otro curso')
+        self.assertIn('queries', response['Server-Timing'])
+        self.assertContains(await self.async_client.get(f'/{self.course.pk}/'), 'Parcial')
+        self.assertRedirects(
+            await self.async_client.get(f'/{self.other.pk}/'), f'/{self.other.pk}/enroll/', fetch_redirect_response=False,
+        )
+        self.assertEqual((await self.async_client.get('/999/')).status_code, 404)
+        self.assertTemplateUsed(await self.async_client.get('/list/'), '404.html')
+        self.assertContains(await self.async_client.get(f'/course/{self.course.pk}/foros/'), 'Dudas')
+        self.assertContains(await self.async_client.get(f'/forum/{self.forum.pk}/', {'before': 'x'}), 'Primera')
+
+        await self.async_client.aforce_login(self.instructor)
+        self.assertContains(await self.async_client.get('/list/'), 'Otro curso')
+        response = await self.async_client.post(f'/forum/{self.forum.pk}/', {'content': 'Segunda'})
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(await Post.objects.filter(forum=self.forum, content='Segunda').aexists())
+
+
+class HotQueryTests(TestCase):
+    """
+    Pruebas de los índices de las consultas frecuentes.
+    """
+    def test_hot_queries_use_indexes(self):
+        call_command('explain_hot_queries', '--strict', stdout=io.StringIO())
+
+
+@override_settings(QUERY_BUDGET_STRICT=True, SERVER_TIMING_HEADERS=True)
+class QueryBudgetTests(TestCase):
+    """
+    Pruebas de los presupuestos de consultas: una regresión N+1 en las vistas o sus
+    plantillas hace fallar estas pruebas con QueryBudgetExceeded.
+    """
+    def setUp(self):
+        cache.clear()
+        reset_query_stats()
+        self.instructor = User.objects.create_user('profe', 'profe@example.com', 'x', role='instructor')
+        self.student = User.objects.create_user('alumno', 'alumno@example.com', 'x')
+        for n in range(15):
+            self.course = make_course(self.instructor, f'Curso {n}')
+            Enrollment.objects.create(student=self.student, course=self.course)
+            self.exam = Exam.objects.create(title=f'Examen {n}', course=self.course, total_marks=10)
+            for m in range(3):
+                question = Question.objects.create(text=f'P{m}', exam=self.exam, question_type='multiple_choice')
+                Answer.objects.create(text='Sí', question=question, is_correct=True)
+                Answer.objects.create(text='No', question=question)
+
+    def test_pages_stay_within_budget(self):
+        for user in (self.student, self.instructor):
+            self.client.force_login(user)
+            for url in ['/', '/list/', f'/{self.course.pk}/']:
+                self.assertEqual(self.client.get(url).status_code, 200)
+        self.client.force_login(self.student)
+        self.assertEqual(self.client.get(f'/exam/{self.exam.pk}/question/1/').status_code, 200)
+        self.assertEqual(self.client.get(f'/exam/{self.exam.pk}/take/').status_code, 200)
+
+    def test_server_timing_and_stats(self):
+        self.client.force_login(self.student)
+        response = self.client.get('/')
+        self.assertIn('queries', response['Server-Timing'])
+        self.assertEqual(query_stats()['index']['requests'], 1)
+
+
+class AuthorizationTests(TestCase):
+    """
+    Pruebas de la capa de autorización: las reglas de acceso no cambian y el rol, las
+    inscripciones y el objeto de la vista se consultan una sola vez por petición.
+    """
+    def setUp(self):
+        self.instructor = User.objects.create_user('profe', 'profe@example.com', 'x', role='instructor')
+        self.other = User.objects.create_user('otro', 'otro@example.com', 'x', role='instructor')
+        self.student = User.objects.create_user('alumno', 'alumno@example.com', 'x')
+        self.course = make_course(self.instructor)
+        self.exam = Exam.objects.create(title='Parcial', course=self.course, total_marks=10)
+
+    def object_queries(self, url, table):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        lookup = f'WHERE "{table}"."id" = '
+        return response, sum(lookup in query['sql'] for query in queries)
+
+    def test_object_is_fetched_once(self):
+        self.client.force_login(self.instructor)
+        response, fetches = self.object_queries(f'/{self.course.pk}/edit/', 'courses_course')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(fetches, 1)
+        response, fetches = self.object_queries(f'/exam/{self.exam.pk}/delete/', 'courses_exam')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(fetches, 1)
+
+    def test_permissions(self):
+        self.client.force_login(self.other)
+        self.assertTemplateUsed(self.client.get(f'/{self.course.pk}/edit/'), '404.html')
+        self.assertTemplateUsed(self.client.post(f'/exam/{self.exam.pk}/delete/'), '404.html')
+        self.assertTrue(Exam.objects.filter(pk=self.exam.pk).exists())
+        self.client.force_login(self.student)
+        self.assertTemplateUsed(self.client.get(reverse('instructor_list')), '404.html')
+        self.assertTemplateUsed(self.client.get(reverse('agregar_curso')), '404.html')
+        self.client.force_login(self.instructor)
+        self.assertTemplateNotUsed(self.client.get(reverse('agregar_curso')), '404.html')
+        self.client.logout()
+        material = Material.objects.create(course=self.course, title='Apuntes', file='apuntes.pdf')
+        response = self.client.get(reverse('material_download', args=[material.pk]))
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(f'next=/materials/{material.pk}/download/', response['Location'])
+
+    def test_access_context_is_memoized(self):
+        Enrollment.objects.create(student=self.student, course=self.course, status='en_espera')
+        access = AccessContext(self.student)
+        with self.assertNumQueries(1):
+            self.assertTrue(access.can_access_course(self.course))
+            self.assertTrue(access.is_enrolled(self.course.pk))
+            self.assertFalse(access.is_enrolled(self.course.pk, ['inscrito']))
+            self.assertEqual(access.visible_course_ids(), [self.course.pk])
+        access = AccessContext(self.instructor)
+        with self.assertNumQueries(1):
+            self.assertEqual(access.visible_course_ids(), [self.course.pk])
+            self.assertTrue(access.can_manage_course(self.course))
+            self.assertTrue(access.can_manage_enrollments(self.course))
+        self.assertFalse(AccessContext(self.other).can_view_exam_statistics(self.exam))
+
+    async def test_async_loader_shares_the_enrollment_rules(self):
+        await Enrollment.objects.acreate(student=self.student, course=self.course)
+        other_course = await sync_to_async(make_course)(self.instructor, 'Otro curso')
+        access = AccessContext(self.student)
+        self.assertEqual(await access.aload_enrollments(), {self.course.pk: 'en_espera'})
+        # Las reglas síncronas usan lo ya cargado, sin consultar desde el bucle de eventos.
+        self.assertFalse(access.must_enroll(self.course))
+        self.assertTrue(access.must_enroll(other_course))
+        self.assertFalse(AccessContext(self.instructor).must_enroll(other_course))
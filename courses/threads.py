@@ -0,0 +1,123 @@
+"""
+threads.py
+
+Carga de los hilos de los foros con paginación por conjunto de claves (keyset) sobre
+(created_at, id). Cada página cuesta una consulta acotada por su tamaño, independientemente
+de la longitud del hilo, y trae el autor de cada publicación con select_related.
+"""
+
+import base64
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db.models import Q
+from django.templatetags.static import static
+from django.utils.dateparse import parse_datetime
+
+from . import thumbnails
+from .models import Post
+
+FORUM_PAGE_SIZE = getattr(settings, 'FORUM_PAGE_SIZE', 30)
+
+
+def encode_cursor(post):
+    """
+    Codifica la posición (created_at, id) de una publicación como cursor opaco.
+    """
+    raw = f'{post.created_at.isoformat()}|{post.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Decodifica un cursor en (created_at, id). Lanza ValueError si no es válido.
+    """
+    try:
+        created_at, pk = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit('|', 1)
+        created_at = parse_datetime(created_at)
+        pk = int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError('Cursor no válido.')
+    if created_at is None:
+        raise ValueError('Cursor no válido.')
+    return created_at, pk
+
+
+def thread_queryset(forum):
+    return Post.objects.filter(forum=forum).select_related('created_by')
+
+
+@dataclass
+class ThreadPage:
+    """
+    Página de un hilo en orden cronológico, con los cursores para navegar.
+    """
+    posts: list
+    has_older: bool
+
+    @property
+    def older_cursor(self):
+        return encode_cursor(self.posts[0]) if self.has_older else None
+
+    @property
+    def newest_cursor(self):
+        return encode_cursor(self.posts[-1]) if self.posts else None
+
+
+def page_queryset(forum, before=None, page_size=FORUM_PAGE_SIZE):
+    """
+    Consulta de una página: page_size + 1 publicaciones anteriores al cursor 'before', de la
+    más reciente a la más antigua (la sobrante indica si hay más).
+    """
+    queryset = thread_queryset(forum)
+    if before:
+        created_at, pk = decode_cursor(before)
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+    return queryset.order_by('-created_at', '-id')[:page_size + 1]
+
+
+def make_page(posts, page_size=FORUM_PAGE_SIZE):
+    return ThreadPage(posts=posts[:page_size][::-1], has_older=len(posts) > page_size)
+
+
+def load_page(forum, before=None, page_size=FORUM_PAGE_SIZE):
+    """
+    Devuelve las page_size publicaciones más recientes anteriores al cursor 'before'
+    (o las últimas del hilo si no se indica).
+    """
+    return make_page(list(page_queryset(forum, before, page_size)), page_size)
+
+
+async def aload_page(forum, before=None, page_size=FORUM_PAGE_SIZE):
+    """
+    Versión asíncrona de load_page().
+    """
+    return make_page([post async for post in page_queryset(forum, before, page_size)], page_size)
+
+
+def load_newer(forum, after, limit=FORUM_PAGE_SIZE):
+    """
+    Devuelve, en orden cronológico, como mucho 'limit' publicaciones posteriores al cursor 'after'.
+    """
+    created_at, pk = decode_cursor(after)
+    queryset = thread_queryset(forum).filter(Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk))
+    return list(queryset.order_by('created_at', 'id')[:limit])
+
+
+def serialize_post(post):
+    """
+    Representación JSON de una publicación para las respuestas incrementales.
+    """
+    author = post.created_by
+    return {
+        'id': post.pk,
+        'content': post.content,
+        'created_at': post.created_at.isoformat(),
+        'author': author.username,
+        'avatar': (
+            thumbnails.thumbnail_url(author.profile_picture, 50) if author.profile_picture
+            else static('img/undraw_profile.svg')
+        ),
+        'avatar_srcset': ', '.join(f'{url} {size}w' for size, url in thumbnails.candidates(author.profile_picture)),
+        'cursor': encode_cursor(post),
+    }
@@ -0,0 +1,208 @@
+"""
+thumbnails.py
+
+Miniaturas de las imágenes de curso y fotos de perfil. Al subir una imagen se encola su
+generación en un pool de hilos (fuera del hilo de la petición) que escribe una versión WebP
+(JPEG si Pillow no soporta WebP) por cada ancho de THUMBNAIL_SIZES en
+thumbs/<aa>/<hash>_<ancho>.<ext>. La clave es el hash del contenido original, así que dos
+usuarios con la misma foto comparten miniaturas y una imagen nueva nunca reutiliza una antigua.
+
+Las plantillas usan {% responsive_image %} (templatetags/images.py), que emite srcset con las
+miniaturas ya generadas y recurre al original mientras no existen. Los anchos disponibles de cada
+hash se guardan en la caché cuando están todos, de modo que renderizar no consulta el disco; al
+borrarse el blob original se borran también sus miniaturas (ver storage.DedupStorage.remove_unused).
+"""
+
+import logging
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+from . import storage
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZES = tuple(sorted(getattr(settings, 'THUMBNAIL_SIZES', (64, 128, 256, 512))))
+THUMBNAIL_QUALITY = getattr(settings, 'THUMBNAIL_QUALITY', 80)
+THUMBNAIL_WORKERS = getattr(settings, 'THUMBNAIL_WORKERS', 2)
+THUMBNAIL_DIR = 'thumbs'
+THUMBNAIL_FORMAT = 'webp' if features.check('webp') else 'jpeg'
+
+# Campos de imagen con miniaturas: (modelo, campo).
+IMAGE_FIELDS = [
+    ('courses.Course', 'image'),
+    ('courses.User', 'profile_picture'),
+]
+
+BLOB_DIGEST = re.compile(r'^[0-9a-f]{64}$')
+
+_executor = None
+_pending = set()
+_lock = threading.Lock()
+
+
+def thumbnail_name(digest, size):
+    return f'{THUMBNAIL_DIR}/{digest[:2]}/{digest}_{size}.{THUMBNAIL_FORMAT}'
+
+
+def sizes_key(digest):
+    return f'thumbnails:sizes:{digest}'
+
+
+def source_digest(name, compute=False):
+    """
+    Hash del contenido de una imagen. Los blobs lo llevan en el nombre; para los archivos
+    anteriores a la deduplicación se calcula (solo si 'compute') y se guarda en la caché.
+    """
+    stem = os.path.splitext(os.path.basename(name))[0]
+    if name.startswith(storage.BLOB_DIR + '/') and BLOB_DIGEST.match(stem):
+        return stem
+    key = f'thumbnails:digest:{name}'
+    digest = cache.get(key)
+    if digest is None and compute:
+        digest = storage.hash_file(storage.media_storage.path(name))
+        cache.set(key, digest, None)
+    return digest
+
+
+def generate(name, sizes=THUMBNAIL_SIZES):
+    """
+    Genera las miniaturas que falten de la imagen 'name'. Devuelve los nombres creados.
+    """
+    media = storage.media_storage
+    if not media.exists(name):
+        return []
+    digest = source_digest(name, compute=True)
+    missing = [size for size in sizes if not media.exists(thumbnail_name(digest, size))]
+    if not missing:
+        return []
+    try:
+        with Image.open(media.path(name)) as original:
+            image = ImageOps.exif_transpose(original)
+            has_alpha = image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+            image = image.convert('RGBA' if has_alpha and THUMBNAIL_FORMAT == 'webp' else 'RGB')
+    except (OSError, UnidentifiedImageError):
+        logger.warning('No se pudo leer la imagen %s para generar miniaturas.', name)
+        return []
+
+    created = []
+    for size in missing:
+        thumbnail = image.copy()
+        thumbnail.thumbnail((size, size), Image.LANCZOS)
+        target = thumbnail_name(digest, size)
+        path = media.path(target)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Se escribe a un temporal y se renombra: una petición nunca ve una miniatura a medias.
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), delete=False) as temporary:
+            thumbnail.save(temporary, THUMBNAIL_FORMAT, quality=THUMBNAIL_QUALITY)
+        os.replace(temporary.name, path)
+        created.append(target)
+    return created
+
+
+def executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=THUMBNAIL_WORKERS, thread_name_prefix='thumbnails')
+    return _executor
+
+
+def _run(name):
+    try:
+        return generate(name)
+    except Exception:
+        logger.exception('Error al generar las miniaturas de %s.', name)
+    finally:
+        with _lock:
+            _pending.discard(name)
+
+
+def schedule(name):
+    """
+    Encola la generación de las miniaturas de 'name' en el pool; no encola dos veces la misma imagen.
+    Con THUMBNAIL_ASYNC = False (se lee en cada llamada) las genera en el hilo actual.
+    """
+    if not getattr(settings, 'THUMBNAIL_ASYNC', True):
+        return generate(name)
+    with _lock:
+        if name in _pending:
+            return None
+        _pending.add(name)
+    return executor().submit(_run, name)
+
+
+def schedule_changed(instance):
+    """
+    Encola, al confirmar la transacción, las miniaturas de las imágenes nuevas de la instancia.
+    """
+    for label, field in IMAGE_FIELDS:
+        if label != instance._meta.label:
+            continue
+        name = getattr(instance, '_changed_files', {}).get(field)
+        if name:
+            transaction.on_commit(lambda name=name: schedule(name))
+
+
+def candidates(file):
+    """
+    Devuelve [(ancho, url)] de las miniaturas ya generadas de 'file', de menor a mayor. Si falta
+    alguna se encola su generación; cuando están todas, los anchos se guardan en la caché y no
+    se vuelve a comprobar el disco.
+    """
+    if not file:
+        return []
+    media = storage.media_storage
+    digest = source_digest(file.name)
+    if digest is None:
+        schedule(file.name)
+        return []
+    sizes = cache.get(sizes_key(digest))
+    if sizes is None:
+        sizes = [size for size in THUMBNAIL_SIZES if media.exists(thumbnail_name(digest, size))]
+        if len(sizes) < len(THUMBNAIL_SIZES):
+            schedule(file.name)
+        else:
+            cache.set(sizes_key(digest), sizes, None)
+    return [(size, media.url(thumbnail_name(digest, size))) for size in sizes]
+
+
+def remove(name):
+    """
+    Borra las miniaturas de la imagen 'name' (cuando se borra el original) y olvida sus anchos.
+    """
+    digest = source_digest(name)
+    if digest is None:
+        return
+    media = storage.media_storage
+    for size in THUMBNAIL_SIZES:
+        try:
+            os.remove(media.path(thumbnail_name(digest, size)))
+        except FileNotFoundError:
+            pass
+    cache.delete(sizes_key(digest))
+
+
+def best_fit(available, width):
+    """
+    De las miniaturas [(ancho, url)] de candidates(), URL de la más pequeña que cubre 'width'
+    píxeles o, si ninguna llega, de la más grande.
+    """
+    return next((url for size, url in available if size >= width), available[-1][1])
+
+
+def thumbnail_url(file, width):
+    """
+    URL de la miniatura más pequeña que cubre 'width' píxeles, o del original si no hay ninguna.
+    """
+    available = candidates(file)
+    if not available:
+        return file.url
+    return best_fit(available, width)
@@ -5,17 +5,20 @@ Este archivo contiene las rutas de URL para la aplicación de cursos en línea.
 """
 
 from django.urls import path
-from . import views
+from . import async_views, views
 from .views import (
-    ExamDeleteView, ExamDetailView, ExamResultView, ExamResultsView, ExamUpdateView, ExamViewSet, QuestionView, 
-    SignupView, MyLoginView, MyLogoutView, CrearExamenView, admin_panel, delete_all_enrollments, 
-    ForumListView, ForumCreateView, ForumDetailView, PostCreateView
+    ExamDeleteView, ExamDetailView, ExamResultView, ExamResultsView, ExamUpdateView, ExamViewSet, QuestionView, ExamSinglePageView,
+    SignupView, MyLoginView, MyLogoutView, CrearExamenView, admin_panel, 
+    ForumCreateView, ForumPostsView, PostCreateView
 )
 from django.contrib.auth import views as auth_views
 from django.conf.urls.static import static
 from django.conf import settings
 from rest_framework.routers import DefaultRouter
 
+# Con ASGI (ASYNC_VIEWS) las vistas de lectura más visitadas son asíncronas (async_views.py)
+read_views = async_views if getattr(settings, 'ASYNC_VIEWS', False) else views
+
 # Creamos un enrutador para las vistas de API
 router = DefaultRouter()
 router.register(r'api/exam', ExamViewSet)
@@ -24,14 +27,15 @@ router.register(r'api/answer', views.AnswerViewSet)
 
 urlpatterns = [
     # Rutas de cursos
-    path('', views.IndexView.as_view(), name='index'),
-    path('list/', views.CourseListView.as_view(), name='course_list'),
+    path('', read_views.IndexView.as_view(), name='index'),
+    path('list/', read_views.CourseListView.as_view(), name='course_list'),
     path('add/', views.CourseCreateView.as_view(), name='agregar_curso'),
-    path('<int:pk>/', views.CourseDetailView.as_view(), name='course_detail'),
+    path('<int:pk>/', read_views.CourseDetailView.as_view(), name='course_detail'),
     path('<int:pk>/edit/', views.CourseUpdateView.as_view(), name='editar_curso'),
     path('<int:pk>/delete/', views.CourseDeleteView.as_view(), name='eliminar_curso'),
     path('<int:pk>/enroll/', views.enroll_course, name='enroll_course'),
-    path('delete_all_enrollments/', delete_all_enrollments, name='delete_all_enrollments'),
+    path('course/<int:course_id>/delete_enrollments/', views.delete_course_enrollments, name='delete_course_enrollments'),
+    path('enrollments/import/', views.BulkEnrollmentView.as_view(), name='bulk_enroll'),
     
     # Rutas de materiales
     path('materials/', views.MaterialListView.as_view(), name='material_list'),
@@ -39,6 +43,7 @@ urlpatterns = [
     path('materials/<int:pk>/', views.MaterialDetailView.as_view(), name='material_detail'),
     path('materials/<int:pk>/edit/', views.MaterialUpdateView.as_view(), name='material_edit'),
     path('materials/<int:pk>/delete/', views.MaterialDeleteView.as_view(), name='material_delete'),
+    path('materials/<int:pk>/download/', views.MaterialDownloadView.as_view(), name='material_download'),
 
     # Rutas de instructores
     path('instructors/', views.InstructorListView.as_view(), name='instructor_list'),
@@ -60,9 +65,10 @@ urlpatterns = [
     path('accounts/register/', SignupView.as_view(), name='register'),
     path('accounts/profile/', views.ProfileView.as_view(), name='profile'),
     path('admin_panel/', admin_panel, name='admin_panel'),
+    path('admin_panel/query_stats/', views.query_stats_view, name='query_stats'),
 
     # Rutas de dashboards
-    path('admin/dashboard/', views.AdminDashboardView.as_view(), name='admin_dashboard'),
+    path('admin_panel/dashboard/', views.AdminDashboardView.as_view(), name='admin_dashboard'),
     path('instructors/dashboard/', views.InstructorDashboardView.as_view(), name='instructor_dashboard'),
     path('students/dashboard/', views.StudentDashboardView.as_view(), name='student_dashboard'),
 
@@ -72,19 +78,29 @@ urlpatterns = [
     path('exam/<int:pk>/', ExamDetailView.as_view(), name='exam_detail'),
     path('exam/<int:exam_id>/result/', ExamResultView.as_view(), name='exam_result'),
     path('exam/<int:exam_id>/question/<int:question_number>/', QuestionView.as_view(), name='question_detail'),
+    path('exam/<int:exam_id>/take/', ExamSinglePageView.as_view(), name='exam_take'),
+    path('exam/<int:exam_id>/timer/', views.ExamTimerView.as_view(), name='exam_timer'),
     path('exam/<int:pk>/edit/', ExamUpdateView.as_view(), name='exam_edit'),
+    path('exam/<int:pk>/statistics/', views.ExamStatisticsView.as_view(), name='exam_statistics'),
     path('exam-results/', ExamResultsView.as_view(), name='exam_results'),
+    path('export/<slug:dataset>/', views.ExportView.as_view(), name='export'),
 
     # Rutas para foros
-    path('course/<int:course_id>/foros/', ForumListView.as_view(), name='forum_list'),
+    path('course/<int:course_id>/foros/', read_views.ForumListView.as_view(), name='forum_list'),
     path('course/<int:course_id>/foros/crear/', ForumCreateView.as_view(), name='forum_create'),
-    path('forum/<int:pk>/', ForumDetailView.as_view(), name='forum_detail'),
+    path('forum/<int:pk>/', read_views.ForumDetailView.as_view(), name='forum_detail'),
+    path('forum/<int:pk>/posts/', ForumPostsView.as_view(), name='forum_posts'),
+    path('forum/<int:pk>/events/', views.ForumEventsView.as_view(), name='forum_events'),
     path('forum/<int:forum_id>/crear_post/', PostCreateView.as_view(), name='post_create'),
+
+    # Búsqueda
+    path('search/', views.SearchView.as_view(), name='search'),
 ]
 
 # Añadir las rutas del enrutador de DRF
 urlpatterns += router.urls
 
-# Añadir soporte para archivos estáticos en desarrollo
+# Añadir soporte para archivos estáticos en desarrollo. Solo se publica MEDIA_ROOT (imágenes de
+# curso y fotos de perfil): los materiales están en PROTECTED_MEDIA_ROOT y se descargan con material_download.
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -6,41 +6,53 @@ Este archivo contiene las vistas para la aplicación de cursos en línea. Incluy
 
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView, TemplateView
 from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from django.contrib.auth.decorators import login_required, user_passes_test
 from rest_framework.permissions import IsAuthenticated
 from django.urls import reverse_lazy, reverse
-from django.contrib.auth.views import LoginView 
-from django.contrib.auth.mixins import UserPassesTestMixin, LoginRequiredMixin
+from django.contrib.auth.views import LoginView, redirect_to_login
+from django.contrib.auth.mixins import LoginRequiredMixin
 from django.shortcuts import get_object_or_404, render, redirect
 from django.views import View
 from .forms import (
     ExamForm, ForumForm, PostForm, UserProfileForm, CourseForm, InstructorForm, CustomAuthenticationForm, 
-    MaterialForm, SignupForm, LoginForm, AnswerForm
+    MaterialForm, SignupForm, LoginForm, AnswerForm, ExamAnswersForm, ExportFilterForm, EnrollmentImportForm,
+    SearchForm,
 )
 from .models import (
-    Course, Enrollment, Forum, Material, Exam, Post, Question, Answer, Grade, User
+    Course, Enrollment, Forum, Material, Exam, ExamAttempt, Post, Question, Answer, Grade, User
+)
+from . import (
+    analytics, downloads, enrollments, exam_cache, exam_import, exam_stats, exam_timer, exports, forum_events, grading,
+    search, threads,
+)
+from .authorization import get_access
+from .instrumentation import query_stats
+from .mixins import (
+    AuthorizationMixin, QueryBudgetMixin, RoleRequiredMixin, StudentAccessMixin, SuperuserRequiredMixin,
+)
+from .serializers import (
+    CourseSerializer, MaterialSerializer, ExamSerializer, QuestionSerializer, AnswerSerializer, build_prefetch_plan
 )
-from .serializers import CourseSerializer, MaterialSerializer, ExamSerializer, QuestionSerializer, AnswerSerializer
 from django.contrib.auth.models import Group, Permission
-from django.http import HttpResponse, HttpResponseRedirect, JsonResponse, HttpResponseForbidden
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import (
+    Http404, HttpResponseRedirect, JsonResponse, HttpResponseForbidden, StreamingHttpResponse,
+)
 from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout
 from django.utils.decorators import method_decorator
-from django.utils import timezone
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_POST
+from django.db import transaction
+from django.db.models import F
 from datetime import timedelta
 
 
-class StudentAccessMixin(UserPassesTestMixin):
-    """
-    Mixin para restringir el acceso de los estudiantes.
-    """
-    def test_func(self):
-        return self.request.user.role != 'student'
-
-    def handle_no_permission(self):
-        return render(self.request, '404.html')
-
-
 class StudentCheckMixin:
     """
     Mixin para verificar si el usuario es un estudiante.
@@ -52,44 +64,31 @@ class StudentCheckMixin:
         return []
 
 
-class RoleRequiredMixin(UserPassesTestMixin):
-    """
-    Mixin para verificar el rol del usuario.
-    """
-    required_role = None
-
-    def test_func(self):
-        return self.request.user.role == self.required_role
-
-    def handle_no_permission(self):
-        return render(self.request, '404.html')
-
-
-class IndexView(LoginRequiredMixin, TemplateView, StudentCheckMixin):
+class IndexView(QueryBudgetMixin, LoginRequiredMixin, TemplateView, StudentCheckMixin):
     """
     Vista para la página principal.
     """
     template_name = 'index.html'
+    query_budget = 10
 
     def get_context_data(self, **kwargs):
         """
-        Agrega los cursos y exámenes al contexto.
+        Agrega los cursos al contexto. La navegación lateral la aporta el procesador de contexto 'sidebar'.
         """
         context = super().get_context_data(**kwargs)
-        user = self.request.user
         context['courses'] = Course.objects.all()
-        context['exams'] = Exam.objects.all()
         context['enrolled_courses'] = self.get_user_courses()
         return context
 
 
-class CourseListView(LoginRequiredMixin, StudentAccessMixin, ListView, StudentCheckMixin):
+class CourseListView(QueryBudgetMixin, LoginRequiredMixin, StudentAccessMixin, ListView, StudentCheckMixin):
     """
     Vista para listar los cursos.
     """
     model = Course
     template_name = 'course/course_list.html'
     context_object_name = 'courses'
+    query_budget = 10
 
     def get_queryset(self):
         """
@@ -101,21 +100,21 @@ class CourseListView(LoginRequiredMixin, StudentAccessMixin, ListView, StudentCh
         return Course.objects.all()
 
 
-class CourseDetailView(LoginRequiredMixin, DetailView):
+class CourseDetailView(QueryBudgetMixin, LoginRequiredMixin, DetailView):
     """
     Vista para los detalles de un curso.
     """
     model = Course
     template_name = 'course/course_detail.html'
     context_object_name = 'course'
+    query_budget = 12
 
     def get(self, request, *args, **kwargs):
         """
         Verifica la inscripción del estudiante antes de mostrar el curso.
         """
         self.object = self.get_object()
-        user = request.user
-        if user.role == 'student' and not Enrollment.objects.filter(student=user, course=self.object).exists():
+        if get_access(request).must_enroll(self.object):
             messages.error(request, 'Debes inscribirte en el curso para verlo.')
             return redirect('enroll_course', pk=self.object.pk)
         return super().get(request, *args, **kwargs)
@@ -130,7 +129,7 @@ class CourseDetailView(LoginRequiredMixin, DetailView):
         return context
 
 
-class CourseCreateView(LoginRequiredMixin, UserPassesTestMixin, CreateView):
+class CourseCreateView(LoginRequiredMixin, RoleRequiredMixin, CreateView):
     """
     Vista para crear un curso.
     """
@@ -138,21 +137,11 @@ class CourseCreateView(LoginRequiredMixin, UserPassesTestMixin, CreateView):
     form_class = CourseForm
     template_name = 'course/course_form.html'
     success_url = reverse_lazy('course_list')
-
-    def test_func(self):
-        """
-        Verifica si el usuario es un superusuario o un instructor.
-        """
-        return self.request.user.is_superuser or self.request.user.role == 'instructor'
-
-    def handle_no_permission(self):
-        """
-        Maneja el caso en el que el usuario no tiene permisos para crear un curso.
-        """
-        return render(self.request, '404.html')
+    required_role = 'instructor'
+    allow_superuser = True
 
 
-class CourseUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
+class CourseUpdateView(LoginRequiredMixin, AuthorizationMixin, UpdateView):
     """
     Vista para actualizar un curso.
     """
@@ -161,39 +150,22 @@ class CourseUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
     template_name = 'course/course_form.html'
     success_url = reverse_lazy('course_list')
 
-    def test_func(self):
+    def has_permission(self, access):
         """
         Verifica si el usuario es el instructor del curso o un superusuario.
         """
-        course = self.get_object()
-        return self.request.user.is_superuser or (self.request.user.role == 'instructor' and course.instructor == self.request.user)
-
-    def handle_no_permission(self):
-        """
-        Maneja el caso en el que el usuario no tiene permisos para actualizar el curso.
-        """
-        return render(self.request, '404.html')
+        return access.can_manage_course(self.get_object())
 
 
-class CourseDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
+class CourseDeleteView(LoginRequiredMixin, RoleRequiredMixin, DeleteView):
     """
     Vista para eliminar un curso.
     """
     model = Course
     template_name = 'course/course_confirm_delete.html'
     success_url = reverse_lazy('course_list')
-
-    def test_func(self):
-        """
-        Verifica si el usuario es un superusuario o un instructor.
-        """
-        return self.request.user.is_superuser or self.request.user.role == 'instructor'
-
-    def handle_no_permission(self):
-        """
-        Maneja el caso en el que el usuario no tiene permisos para eliminar el curso.
-        """
-        return render(self.request, '404.html')
+    required_role = 'instructor'
+    allow_superuser = True
 
 
 class MaterialListView(LoginRequiredMixin, StudentAccessMixin, ListView):
@@ -214,29 +186,22 @@ class MaterialListView(LoginRequiredMixin, StudentAccessMixin, ListView):
         return Material.objects.none()
 
 
-class MaterialDetailView(LoginRequiredMixin, StudentAccessMixin, UserPassesTestMixin, DetailView):
+class MaterialDetailView(LoginRequiredMixin, AuthorizationMixin, DetailView):
     """
     Vista para los detalles de un material del curso.
     """
-    model = Material
+    queryset = Material.objects.select_related('course')
     template_name = 'material/material_detail.html'
     context_object_name = 'material'
 
-    def test_func(self):
+    def has_permission(self, access):
         """
         Verifica si el usuario es el instructor del material o un superusuario.
         """
-        material = self.get_object()
-        return self.request.user == material.course.instructor or self.request.user.is_superuser
+        return access.is_superuser or access.owns_course(self.get_object().course)
 
-    def handle_no_permission(self):
-        """
-        Maneja el caso en el que el usuario no tiene permisos para ver el material.
-        """
-        return render(self.request, '404.html')
 
-
-class MaterialCreateView(LoginRequiredMixin, StudentAccessMixin, UserPassesTestMixin, CreateView):
+class MaterialCreateView(LoginRequiredMixin, RoleRequiredMixin, CreateView):
     """
     Vista para crear un material del curso.
     """
@@ -244,65 +209,78 @@ class MaterialCreateView(LoginRequiredMixin, StudentAccessMixin, UserPassesTestM
     form_class = MaterialForm
     template_name = 'material/material_form.html'
     success_url = reverse_lazy('material_list')
-
-    def test_func(self):
-        """
-        Verifica si el usuario es un superusuario o un instructor.
-        """
-        return self.request.user.is_superuser or self.request.user.role == 'instructor'
-
-    def handle_no_permission(self):
-        """
-        Maneja el caso en el que el usuario no tiene permisos para crear el material.
-        """
-        return render(self.request, '404.html')
+    required_role = 'instructor'
+    allow_superuser = True
 
 
-class MaterialUpdateView(LoginRequiredMixin, StudentAccessMixin, UserPassesTestMixin, UpdateView):
+class MaterialUpdateView(LoginRequiredMixin, AuthorizationMixin, UpdateView):
     """
     Vista para actualizar un material del curso.
     """
-    model = Material
+    queryset = Material.objects.select_related('course')
     form_class = MaterialForm
     template_name = 'material/material_form.html'
     success_url = reverse_lazy('material_list')
 
-    def test_func(self):
+    def has_permission(self, access):
         """
         Verifica si el usuario es el instructor del material o un superusuario.
         """
-        material = self.get_object()
-        return self.request.user.is_superuser or (self.request.user.role == 'instructor' and material.course.instructor == self.request.user)
+        return access.can_manage_course(self.get_object().course)
 
-    def handle_no_permission(self):
-        """
-        Maneja el caso en el que el usuario no tiene permisos para actualizar el material.
-        """
-        return render(self.request, '404.html')
 
-
-class MaterialDeleteView(LoginRequiredMixin, StudentAccessMixin, UserPassesTestMixin, DeleteView):
+class MaterialDeleteView(LoginRequiredMixin, RoleRequiredMixin, DeleteView):
     """
     Vista para eliminar un material del curso.
     """
     model = Material
     template_name = 'material/material_confirm_delete.html'
     success_url = reverse_lazy('material_list')
+    required_role = 'instructor'
+    allow_superuser = True
 
-    def test_func(self):
+
+class MaterialDownloadView(QueryBudgetMixin, LoginRequiredMixin, AuthorizationMixin, View):
+    """
+    Vista para descargar el archivo de un material tras comprobar el acceso al curso. El envío
+    lo hace el servidor web (X-Sendfile/X-Accel-Redirect) o downloads.serve_file con soporte de Range.
+    """
+    query_budget = 4
+
+    def has_permission(self, access):
         """
-        Verifica si el usuario es un superusuario o un instructor.
+        Verifica una sola vez que el usuario puede descargar el material.
         """
-        return self.request.user.is_superuser or self.request.user.role == 'instructor'
+        self.material = get_object_or_404(Material.objects.select_related('course'), pk=self.kwargs['pk'])
+        return bool(self.material.file) and access.can_access_course(self.material.course)
 
     def handle_no_permission(self):
         """
-        Maneja el caso en el que el usuario no tiene permisos para eliminar el material.
+        Maneja el caso en el que el usuario no puede descargar el material.
         """
-        return render(self.request, '404.html')
+        if not self.request.user.is_authenticated:
+            return redirect_to_login(self.request.get_full_path(), self.get_login_url(), self.get_redirect_field_name())
+        raise Http404('Material no encontrado.')
+
+    def get(self, request, pk):
+        return downloads.serve_file(
+            request, self.material.file.name, downloads.download_name(self.material),
+            as_attachment='download' in request.GET,
+        )
+
+
+class PrefetchSerializerMixin:
+    """
+    Mixin para ViewSets que aplica al queryset el plan de select_related/prefetch_related
+    derivado del serializer de la petición (con sus campos dispersos), de modo que el número de consultas no crece con el tamaño de la lista.
+    """
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        select, prefetch = build_prefetch_plan(self.get_serializer())
+        return queryset.select_related(*select).prefetch_related(*prefetch)
 
 
-class CourseViewSet(viewsets.ModelViewSet):
+class CourseViewSet(PrefetchSerializerMixin, viewsets.ModelViewSet):
     """
     API ViewSet para los cursos.
     """
@@ -311,7 +289,7 @@ class CourseViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
 
 
-class MaterialViewSet(viewsets.ModelViewSet):
+class MaterialViewSet(PrefetchSerializerMixin, viewsets.ModelViewSet):
     """
     API ViewSet para los materiales de los cursos.
     """
@@ -320,7 +298,7 @@ class MaterialViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
 
 
-class ExamViewSet(viewsets.ModelViewSet):
+class ExamViewSet(PrefetchSerializerMixin, viewsets.ModelViewSet):
     """
     API ViewSet para los exámenes.
     """
@@ -328,24 +306,24 @@ class ExamViewSet(viewsets.ModelViewSet):
     serializer_class = ExamSerializer
     permission_classes = [IsAuthenticated]
 
+    @action(detail=True, methods=['get'])
+    def statistics(self, request, pk=None):
+        """
+        Devuelve el análisis de ítems del examen (ver exam_stats.py).
+        """
+        exam = get_object_or_404(Exam.objects.select_related('course'), pk=pk)
+        if not get_access(request).can_view_exam_statistics(exam):
+            raise PermissionDenied
+        return Response(exam_stats.exam_statistics(exam))
+
 
-class CrearExamenView(LoginRequiredMixin, UserPassesTestMixin, View):
+class CrearExamenView(LoginRequiredMixin, RoleRequiredMixin, View):
     """
     Vista para crear un examen.
     """
     template_name = 'exam/crear_examen.html'
-
-    def test_func(self):
-        """
-        Verifica si el usuario es un superusuario o un instructor.
-        """
-        return self.request.user.is_superuser or self.request.user.role == 'instructor'
-
-    def handle_no_permission(self):
-        """
-        Maneja el caso en el que el usuario no tiene permisos para crear el examen.
-        """
-        return render(self.request, '404.html')
+    required_role = 'instructor'
+    allow_superuser = True
 
     def get(self, request, course_id):
         """
@@ -361,38 +339,30 @@ class CrearExamenView(LoginRequiredMixin, UserPassesTestMixin, View):
     def post(self, request, course_id):
         """
         Maneja la solicitud POST para crear un nuevo examen.
+        Las preguntas del formulario y las del archivo de importación (JSON o CSV) se insertan
+        en bloque dentro de una sola transacción.
         """
         course = get_object_or_404(Course, id=course_id)
         exam_form = ExamForm(request.POST)
 
         if exam_form.is_valid():
-            exam = exam_form.save(commit=False)
-            exam.course = course
-            exam.save()
-
-            # Lógica para agregar preguntas al examen
-            question_texts = request.POST.getlist('question_text')
-            question_types = request.POST.getlist('question_type')
-            option1s = request.POST.getlist('option1')
-            option2s = request.POST.getlist('option2')
-            option3s = request.POST.getlist('option3')
-            option4s = request.POST.getlist('option4')
-            option5s = request.POST.getlist('option5')
-            correct_options = request.POST.getlist('correct_option')
-
-            for i, question_text in enumerate(question_texts):
-                question = Question.objects.create(
-                    exam=exam,
-                    text=question_text,
-                    question_type=question_types[i]
-                )
-
-                if question.question_type == 'multiple_choice':
-                    options = [option1s[i], option2s[i], option3s[i], option4s[i], option5s[i]]
-                    for j, option_text in enumerate(options):
-                        if option_text:
-                            is_correct = (j + 1) == int(correct_options[i])
-                            Answer.objects.create(question=question, text=option_text, is_correct=is_correct)
+            try:
+                questions = exam_import.parse_form_questions(request.POST)
+                import_file = request.FILES.get('import_file')
+                if import_file:
+                    questions += exam_import.parse_import_file(import_file)
+            except ValueError as error:
+                messages.error(request, str(error))
+                return render(request, self.template_name, {
+                    'course': course,
+                    'exam_form': exam_form
+                })
+
+            with transaction.atomic():
+                exam = exam_form.save(commit=False)
+                exam.course = course
+                exam.save()
+                exam_import.create_questions(exam, questions)
 
             messages.success(request, 'Examen y preguntas creados exitosamente.')
             return redirect('course_detail', pk=course_id)
@@ -414,22 +384,25 @@ class ExamUpdateView(UpdateView):
     success_url = reverse_lazy('index')
 
 
-from django.utils.dateparse import parse_datetime
-
-class QuestionView(View):
+class QuestionView(QueryBudgetMixin, View):
     """
     Vista para mostrar una pregunta de un examen.
+    El progreso se guarda en un ExamAttempt, no en la sesión.
     """
     template_name = 'question/question_detail.html'
+    query_budget = 12
 
-    def get_question(self, exam, question_number):
+    def get_attempt(self, request, exam):
         """
-        Obtiene una pregunta específica del examen.
+        Obtiene o crea el intento del estudiante en el examen.
         """
-        questions = exam.questions.all()
-        if question_number < 1 or question_number > len(questions):
-            return None
-        return questions[question_number - 1]
+        return ExamAttempt.objects.start(request.user, exam)
+
+    def finish_attempt(self, attempt):
+        """
+        Califica el intento y guarda la nota.
+        """
+        grading.finish_attempt(attempt)
 
     @method_decorator(login_required)
     def get(self, request, *args, **kwargs):
@@ -438,33 +411,30 @@ class QuestionView(View):
         """
         exam = get_object_or_404(Exam, pk=kwargs['exam_id'])
         question_number = kwargs.get('question_number', 1)
-        question = self.get_question(exam, question_number)
-        grade = Grade.objects.filter(student=request.user, exam=exam).first()
-
-        if grade:
+        # Grade(student, exam) es único: basta con comprobar si existe
+        if Grade.objects.filter(student=request.user, exam=exam).exists():
             # El examen ya fue tomado por el estudiante
             return redirect('exam_result', exam_id=exam.id)
 
-        start_time = request.session.get(f'exam_{exam.id}_start_time')
-        if not start_time:
-            start_time = timezone.now()
-            request.session[f'exam_{exam.id}_start_time'] = start_time.isoformat()
-        else:
-            start_time = parse_datetime(start_time)
-
-        remaining_time = exam.duration - (timezone.now() - start_time).seconds // 60
-        if remaining_time <= 0:
+        attempt = self.get_attempt(request, exam)
+        remaining_seconds = attempt.remaining_seconds()
+        if remaining_seconds <= 0:
             # El tiempo ha expirado
+            self.finish_attempt(attempt)
             return redirect('exam_result', exam_id=exam.id)
 
+        question = exam_cache.get_question(exam.id, attempt.question_ids, question_number)
         form = AnswerForm(question=question)
+        return self.render_question(request, exam, attempt, question, question_number, form)
+
+    def render_question(self, request, exam, attempt, question, question_number, form):
         return render(request, self.template_name, {
             'exam': exam,
             'question': question,
             'question_number': question_number,
-            'total_questions': exam.questions.count(),
+            'total_questions': attempt.total_questions,
             'form': form,
-            'remaining_time': remaining_time,
+            **exam_timer.timer_context(attempt),
         })
 
     @method_decorator(login_required)
@@ -474,48 +444,104 @@ class QuestionView(View):
         """
         exam = get_object_or_404(Exam, pk=kwargs['exam_id'])
         question_number = kwargs.get('question_number', 1)
-        question = self.get_question(exam, question_number)
+        attempt = self.get_attempt(request, exam)
+        if attempt.is_finished:
+            return redirect('exam_result', exam_id=exam.id)
+        if attempt.remaining_seconds() <= 0:
+            self.finish_attempt(attempt)
+            return redirect('exam_result', exam_id=exam.id)
+
+        question = exam_cache.get_question(exam.id, attempt.question_ids, question_number)
         if not question:
             return redirect('exam_result', exam_id=exam.id)   
 
         form = AnswerForm(request.POST, question=question)
         if form.is_valid():
-            selected_answer = get_object_or_404(Answer, id=form.cleaned_data['answer'])
-            if selected_answer.is_correct:
+            # La opción ya se validó contra las respuestas de la pregunta; is_correct no se cachea.
+            answer_id = int(form.cleaned_data['answer'])
+            attempt.record_answer(question['id'], answer_id)
+            if Answer.objects.filter(pk=answer_id, is_correct=True).exists():
                 messages.success(request, '¡Correcto!')
             else:
                 messages.error(request, '¡Incorrecto!')
 
             next_question_number = question_number + 1
-            if next_question_number <= exam.questions.count():
+            if next_question_number <= attempt.total_questions:
                 return redirect('question_detail', exam_id=exam.id, question_number=next_question_number)
             else:
-                total_marks = self.calculate_marks(request.user, exam)
-                Grade.objects.create(student=request.user, exam=exam, marks_obtained=total_marks)
+                self.finish_attempt(attempt)
                 return redirect('exam_result', exam_id=exam.id)
 
+        return self.render_question(request, exam, attempt, question, question_number, form)
+
+
+class ExamTimerView(QueryBudgetMixin, LoginRequiredMixin, View):
+    """
+    Vista JSON con el tiempo restante y el estado del intento del estudiante, consultada
+    periódicamente por el temporizador de las páginas del examen (ver exam_timer.py).
+    """
+    query_budget = 3
+
+    @method_decorator(never_cache)
+    def get(self, request, exam_id):
+        return JsonResponse(exam_timer.timer_state(request.user, exam_id))
+
+
+class ExamSinglePageView(QuestionView):
+    """
+    Vista para presentar un examen completo en una sola página.
+    Lee preguntas y respuestas de la caché de exámenes y califica todas las respuestas en un único envío.
+    """
+    template_name = 'exam/exam_single_page.html'
+    query_budget = 15
+
+    def render_exam(self, request, exam, attempt, form):
         return render(request, self.template_name, {
             'exam': exam,
-            'question': question,
-            'question_number': question_number,
-            'total_questions': exam.questions.count(),
             'form': form,
+            'total_questions': attempt.total_questions,
+            **exam_timer.timer_context(attempt),
         })
 
-    def calculate_marks(self, user, exam):
+    @method_decorator(login_required)
+    def get(self, request, *args, **kwargs):
+        """
+        Maneja la solicitud GET para mostrar todas las preguntas del examen.
+        """
+        exam = get_object_or_404(Exam, pk=kwargs['exam_id'])
+        if Grade.objects.filter(student=request.user, exam=exam).exists():
+            return redirect('exam_result', exam_id=exam.id)
+
+        attempt = self.get_attempt(request, exam)
+        if attempt.remaining_seconds() <= 0:
+            self.finish_attempt(attempt)
+            return redirect('exam_result', exam_id=exam.id)
+
+        form = ExamAnswersForm(questions=exam_cache.get_questions(exam.id, attempt.question_ids))
+        return self.render_exam(request, exam, attempt, form)
+
+    @method_decorator(login_required)
+    def post(self, request, *args, **kwargs):
         """
-        Calcula las calificaciones del usuario para un examen.
+        Maneja la solicitud POST con todas las respuestas: las guarda en una sentencia y califica el intento.
         """
-        questions = exam.questions.all()
-        marks_obtained = 0
-        for question in questions:
-            selected_answer = Answer.objects.filter(question=question, is_correct=True).first()
-            if selected_answer:
-                marks_obtained += 1
-        return marks_obtained
+        exam = get_object_or_404(Exam, pk=kwargs['exam_id'])
+        attempt = self.get_attempt(request, exam)
+        if attempt.is_finished:
+            return redirect('exam_result', exam_id=exam.id)
+
+        form = ExamAnswersForm(request.POST, questions=exam_cache.get_questions(exam.id, attempt.question_ids))
+        if not form.is_valid():
+            return self.render_exam(request, exam, attempt, form)
 
+        # Las respuestas enviadas fuera de tiempo no se registran; el intento se califica igualmente.
+        if attempt.remaining_seconds() > 0:
+            attempt.record_answers(form.selected_answers())
+        self.finish_attempt(attempt)
+        return redirect('exam_result', exam_id=exam.id)
 
-class AnswerViewSet(viewsets.ModelViewSet):
+
+class AnswerViewSet(PrefetchSerializerMixin, viewsets.ModelViewSet):
     """
     API ViewSet para las respuestas de las preguntas de los exámenes.
     """
@@ -524,7 +550,7 @@ class AnswerViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
 
 
-class QuestionViewSet(viewsets.ModelViewSet):
+class QuestionViewSet(PrefetchSerializerMixin, viewsets.ModelViewSet):
     """
     API ViewSet para las preguntas de los exámenes.
     """
@@ -551,7 +577,7 @@ class InstructorDetailView(LoginRequiredMixin, StudentAccessMixin, DetailView):
     context_object_name = 'instructor'
 
 
-class InstructorCreateView(LoginRequiredMixin, UserPassesTestMixin, CreateView):
+class InstructorCreateView(LoginRequiredMixin, SuperuserRequiredMixin, CreateView):
     """
     Vista para crear un instructor.
     """
@@ -560,18 +586,6 @@ class InstructorCreateView(LoginRequiredMixin, UserPassesTestMixin, CreateView):
     template_name = 'instructors/instructor_form.html'
     success_url = reverse_lazy('instructor_list')
 
-    def test_func(self):
-        """
-        Verifica si el usuario es un superusuario.
-        """
-        return self.request.user.is_superuser
-
-    def handle_no_permission(self):
-        """
-        Maneja el caso en el que el usuario no tiene permisos para crear un instructor.
-        """
-        return render(self.request, '404.html')
-
     def form_valid(self, form):
         """
         Establece el rol del usuario como 'instructor'.
@@ -589,12 +603,6 @@ class InstructorUpdateView(LoginRequiredMixin, StudentAccessMixin, UpdateView):
     template_name = 'instructors/instructor_form.html'
     success_url = reverse_lazy('instructor_list')
 
-    def handle_no_permission(self):
-        """
-        Maneja el caso en el que el usuario no tiene permisos para actualizar el instructor.
-        """
-        return render(self.request, '404.html')
-
 
 class InstructorDeleteView(LoginRequiredMixin, StudentAccessMixin, DeleteView):
     """
@@ -604,12 +612,6 @@ class InstructorDeleteView(LoginRequiredMixin, StudentAccessMixin, DeleteView):
     template_name = 'instructors/instructor_confirm_delete.html'
     success_url = reverse_lazy('instructor_list')
 
-    def handle_no_permission(self):
-        """
-        Maneja el caso en el que el usuario no tiene permisos para eliminar el instructor.
-        """
-        return render(self.request, '404.html')
-
 
 class InstructorLoginView(LoginView):
     """
@@ -625,32 +627,40 @@ class InstructorLoginView(LoginView):
         return reverse('instructor_dashboard')
 
 
-class AdminDashboardView(LoginRequiredMixin, RoleRequiredMixin, TemplateView):
+class AdminDashboardView(QueryBudgetMixin, LoginRequiredMixin, RoleRequiredMixin, TemplateView):
     """
     Vista para el dashboard del administrador.
+    Lee la analítica precalculada por el comando refresh_analytics.
     """
     template_name = 'admin/admin_dashboard.html'
     required_role = 'admin'
+    query_budget = 8
 
-    def handle_no_permission(self):
+    def get_context_data(self, **kwargs):
         """
-        Maneja el caso en el que el usuario no tiene permisos para acceder al dashboard del administrador.
+        Agrega la analítica de todos los cursos al contexto.
         """
-        return render(self.request, '404.html')
+        context = super().get_context_data(**kwargs)
+        context.update(analytics.dashboard())
+        return context
 
 
-class InstructorDashboardView(LoginRequiredMixin, RoleRequiredMixin, TemplateView):
+class InstructorDashboardView(QueryBudgetMixin, LoginRequiredMixin, RoleRequiredMixin, TemplateView):
     """
     Vista para el dashboard del instructor.
+    Lee la analítica precalculada de sus cursos.
     """
     template_name = 'instructors/instructor_dashboard.html'
     required_role = 'instructor'
+    query_budget = 8
 
-    def handle_no_permission(self):
+    def get_context_data(self, **kwargs):
         """
-        Maneja el caso en el que el usuario no tiene permisos para acceder al dashboard del instructor.
+        Agrega la analítica de los cursos del instructor al contexto.
         """
-        return render(self.request, '404.html')
+        context = super().get_context_data(**kwargs)
+        context.update(analytics.dashboard(Course.objects.filter(instructor=self.request.user)))
+        return context
 
 
 class StudentDashboardView(LoginRequiredMixin, TemplateView):
@@ -711,29 +721,66 @@ def enroll_course(request, pk):
     return render(request, 'course/enroll_confirm.html', {'course': course})
 
 
-class AdminRequiredMixin(UserPassesTestMixin):
+@login_required
+@require_POST
+def delete_course_enrollments(request, course_id):
     """
-    Mixin para verificar si el usuario es un administrador.
+    Vista para eliminar las inscripciones de un curso por lotes (ver enrollments.py).
     """
-    def test_func(self):
-        """
-        Verifica si el usuario es un administrador.
-        """
-        return self.request.user.is_authenticated and self.request.user.role == 'admin'
+    course = get_object_or_404(Course, pk=course_id)
+    if not get_access(request).can_manage_enrollments(course):
+        return render(request, '404.html')
+    deleted = enrollments.delete_enrollments(course)
+    messages.success(request, f'Se eliminaron {deleted} inscripciones del curso "{course.title}".')
+    return redirect('course_detail', pk=course.pk)
 
-    def handle_no_permission(self):
+
+class BulkEnrollmentView(LoginRequiredMixin, AuthorizationMixin, View):
+    """
+    Vista para inscribir estudiantes de forma masiva desde un CSV con columnas username y course.
+    """
+    template_name = 'course/bulk_enroll.html'
+
+    def has_permission(self, access):
         """
-        Maneja el caso en el que el usuario no tiene permisos para acceder a la vista.
+        Verifica si el usuario es administrador o instructor.
         """
-        return render(self.request, '404.html')
+        return access.can_manage_enrollments()
+
+    def get(self, request):
+        return render(request, self.template_name, {'form': EnrollmentImportForm()})
 
+    def post(self, request):
+        form = EnrollmentImportForm(request.POST, request.FILES)
+        context = {'form': form}
+        if form.is_valid():
+            try:
+                pairs = enrollments.parse_enrollment_csv(form.cleaned_data['file'])
+            except ValueError as error:
+                form.add_error('file', str(error))
+            else:
+                results = enrollments.bulk_enroll(pairs, user=request.user)
+                context.update(results=results, summary=enrollments.summarize(results))
+        return render(request, self.template_name, context)
 
-def delete_all_enrollments(request):
+
+class BulkEnrollmentAPIView(APIView):
     """
-    Vista para eliminar todas las inscripciones.
+    API para inscripciones masivas. Recibe {"enrollments": [{"username": ..., "course": ...}]}
+    y devuelve el resultado de cada fila.
     """
-    Enrollment.objects.all().delete()
-    return HttpResponse("All enrollments have been deleted.")
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        if not get_access(request).can_manage_enrollments():
+            raise PermissionDenied
+        rows = request.data.get('enrollments') if isinstance(request.data, dict) else request.data
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            return Response({'detail': 'Se esperaba una lista de objetos {username, course}.'}, status=400)
+        results = enrollments.bulk_enroll(
+            [(row.get('username'), row.get('course')) for row in rows], user=request.user,
+        )
+        return Response({'summary': enrollments.summarize(results), 'results': results})
 
 
 @login_required
@@ -771,6 +818,15 @@ def admin_panel(request):
     return render(request, 'accounts/user_management.html', context)
 
 
+@login_required
+@user_passes_test(lambda u: u.is_superuser)
+def query_stats_view(request):
+    """
+    Vista JSON con el histograma de consultas SQL por URL de este proceso.
+    """
+    return JsonResponse(query_stats())
+
+
 class CustomLoginView(LoginView):
     """
     Vista para el inicio de sesión personalizado.
@@ -923,13 +979,64 @@ class ExamDetailView(LoginRequiredMixin, DetailView):
 
     def get_context_data(self, **kwargs):
         """
-        Agrega las preguntas del examen al contexto.
+        Agrega las preguntas del examen al contexto desde la caché de exámenes.
+        """
+        context = super().get_context_data(**kwargs)
+        context['questions'] = exam_cache.get_questions(self.object.id)
+        return context
+
+
+class ExamStatisticsView(LoginRequiredMixin, AuthorizationMixin, DetailView):
+    """
+    Vista con el análisis de ítems de un examen para su instructor.
+    """
+    model = Exam
+    template_name = 'exam/exam_statistics.html'
+    context_object_name = 'exam'
+
+    def get_queryset(self):
+        return Exam.objects.select_related('course')
+
+    def has_permission(self, access):
+        """
+        Verifica si el usuario puede ver las estadísticas del examen.
+        """
+        return access.can_view_exam_statistics(self.get_object())
+
+    def get_context_data(self, **kwargs):
+        """
+        Agrega las estadísticas del examen al contexto.
         """
         context = super().get_context_data(**kwargs)
-        context['questions'] = self.object.questions.all()
+        context['stats'] = exam_stats.exam_statistics(self.object)
         return context
 
 
+class ExportView(LoginRequiredMixin, RoleRequiredMixin, View):
+    """
+    Vista para descargar en streaming las notas, inscripciones o lista de clase en CSV o XLSX.
+    Filtros opcionales: ?course=, ?exam=, ?since= y ?until= (fechas AAAA-MM-DD).
+    """
+    required_role = ('admin', 'instructor')
+    allow_superuser = True
+
+    def get(self, request, dataset):
+        if dataset not in exports.EXPORTS:
+            raise Http404
+        form = ExportFilterForm(request.GET)
+        if not form.is_valid():
+            return JsonResponse({'errors': form.errors}, status=400)
+        filters = form.cleaned_data
+        if exports.EXPORTS[dataset].requires_course and not filters['course']:
+            return JsonResponse({'errors': {'course': ['Este campo es obligatorio.']}}, status=400)
+        if filters['format'] == 'xlsx' and exports.Workbook is None:
+            return JsonResponse({'errors': {'format': ['La exportación a Excel requiere openpyxl.']}}, status=400)
+        return exports.export_response(
+            dataset, request.user, file_format=filters['format'], course=filters['course'],
+            exam=filters['exam'], since=filters['since'], until=filters['until'],
+        )
+
+
 class ExamResultView(View):
     """
     Vista para mostrar el resultado de un examen.
@@ -968,26 +1075,19 @@ class ExamResultsView(LoginRequiredMixin, ListView):
         return Grade.objects.filter(student=self.request.user)
 
 
-class ExamDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
+class ExamDeleteView(LoginRequiredMixin, AuthorizationMixin, DeleteView):
     """
     Vista para eliminar un examen.
     """
-    model = Exam
+    queryset = Exam.objects.select_related('course')
     template_name = 'exam/exam_confirm_delete.html'
     success_url = reverse_lazy('course_list')
 
-    def test_func(self):
+    def has_permission(self, access):
         """
         Verifica si el usuario tiene permisos para eliminar el examen.
         """
-        exam = self.get_object()
-        return self.request.user.is_superuser or (self.request.user.role == 'instructor' and exam.course.instructor == self.request.user)
-
-    def handle_no_permission(self):
-        """
-        Maneja el caso en el que el usuario no tiene permisos para eliminar el examen.
-        """
-        return render(self.request, '404.html')
+        return access.can_manage_course(self.get_object().course)
 
     def delete(self, request, *args, **kwargs):
         """
@@ -1000,53 +1100,40 @@ class ExamDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
         return redirect(success_url)
 
 
-class ForumListView(ListView):
+class ForumListView(QueryBudgetMixin, ListView):
     """
-    Vista para listar los foros de un curso.
+    Vista para listar los foros de un curso con su actividad (contadores desnormalizados).
     """
     model = Forum
     template_name = 'forum/forum_list.html'
     context_object_name = 'forums'
+    query_budget = 8
 
     def get_queryset(self):
         """
-        Devuelve los foros de un curso específico.
+        Devuelve los foros de un curso específico, los más activos recientemente primero.
         """
         course_id = self.kwargs['course_id']
-        return Forum.objects.filter(course_id=course_id)
+        return Forum.objects.filter(course_id=course_id).order_by(F('last_post_at').desc(nulls_last=True), '-id')
 
     def get_context_data(self, **kwargs):
         """
-        Agrega el curso al contexto.
+        Agrega el curso al contexto (lo recibe en 'course' si ya está cargado).
         """
         context = super().get_context_data(**kwargs)
-        context['course'] = get_object_or_404(Course, pk=self.kwargs['course_id'])
+        if 'course' not in context:
+            context['course'] = get_object_or_404(Course, pk=self.kwargs['course_id'])
         return context
 
 
-class InstructorRequiredMixin(UserPassesTestMixin):
-    """
-    Mixin para verificar si el usuario es un instructor.
-    """
-    def test_func(self):
-        """
-        Verifica si el usuario es un instructor.
-        """
-        return self.request.user.is_authenticated and self.request.user.role == 'instructor'
-    def handle_no_permission(self):
-        """
-        Maneja el caso en el que el usuario no tiene permisos para acceder a la vista.
-        """
-        return render(self.request, '404.html')  
-
-
-class ForumCreateView(LoginRequiredMixin, InstructorRequiredMixin, CreateView):
+class ForumCreateView(LoginRequiredMixin, RoleRequiredMixin, CreateView):
     """
     Vista para crear un foro.
     """
     model = Forum
     form_class = ForumForm
     template_name = 'forum/forum_form.html'
+    required_role = 'instructor'
 
     def form_valid(self, form):
         """
@@ -1071,20 +1158,33 @@ class ForumCreateView(LoginRequiredMixin, InstructorRequiredMixin, CreateView):
         return context
 
 
-class ForumDetailView(DetailView):
+class ForumDetailView(QueryBudgetMixin, DetailView):
     """
     Vista para los detalles de un foro.
+    Muestra una página del hilo; ?before=<cursor> carga las publicaciones anteriores.
     """
     model = Forum
     template_name = 'forum/forum_detail.html'
     context_object_name = 'forum'
+    query_budget = 10
+
+    def get_queryset(self):
+        return Forum.objects.select_related('course')
+
+    def get_thread_page(self):
+        try:
+            return threads.load_page(self.object, before=self.request.GET.get('before'))
+        except ValueError:
+            return threads.load_page(self.object)
 
     def get_context_data(self, **kwargs):
         """
-        Agrega las publicaciones del foro al contexto.
+        Agrega una página de publicaciones del foro al contexto (la recibe en 'thread' si ya está cargada).
         """
         context = super().get_context_data(**kwargs)
-        context['posts'] = Post.objects.filter(forum=self.object)
+        if 'thread' not in context:
+            context['thread'] = self.get_thread_page()
+        context['posts'] = context['thread'].posts
         context['post_form'] = PostForm()
         return context
 
@@ -1107,6 +1207,106 @@ class ForumDetailView(DetailView):
         return self.render_to_response(context)
 
 
+class ForumPostsView(LoginRequiredMixin, View):
+    """
+    Vista JSON con las publicaciones de un foro posteriores a un cursor (?after=<cursor>),
+    para que la página del hilo cargue solo las novedades.
+    """
+    def get(self, request, pk):
+        forum = get_object_or_404(Forum, pk=pk)
+        after = request.GET.get('after')
+        try:
+            posts = threads.load_newer(forum, after) if after else threads.load_page(forum).posts
+        except ValueError as error:
+            return JsonResponse({'error': str(error)}, status=400)
+        return JsonResponse({
+            'posts': [threads.serialize_post(post) for post in posts],
+            'cursor': threads.encode_cursor(posts[-1]) if posts else after,
+        })
+
+
+def run_search(request, params):
+    """
+    Valida los parámetros de búsqueda y devuelve (formulario, resultados, página, hay más).
+    """
+    form = SearchForm(params)
+    if not form.is_valid() or not form.cleaned_data['q']:
+        return form, [], 1, False
+    page = form.cleaned_data['page'] or 1
+    size = search.SEARCH_PAGE_SIZE
+    results = search.search(
+        form.cleaned_data['q'], request.user, limit=size + 1, offset=(page - 1) * size, access=get_access(request),
+    )
+    return form, results[:size], page, len(results) > size
+
+
+class SearchView(QueryBudgetMixin, LoginRequiredMixin, TemplateView):
+    """
+    Vista de búsqueda de texto completo en cursos, materiales, foros y publicaciones, ordenada
+    por relevancia.
+    """
+    template_name = 'search/search.html'
+    query_budget = 6
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        form, results, page, has_next = run_search(self.request, self.request.GET)
+        context.update({
+            'form': form,
+            'query': form.cleaned_data.get('q', ''),
+            'results': results,
+            'page': page,
+            'has_next': has_next,
+        })
+        return context
+
+
+class SearchAPIView(APIView):
+    """
+    API de búsqueda: GET ?q=<texto>&page=<n> devuelve los resultados ordenados por relevancia.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        form, results, page, has_next = run_search(request, request.query_params)
+        if not form.is_valid():
+            return Response(form.errors, status=400)
+        return Response({
+            'query': form.cleaned_data['q'],
+            'page': page,
+            'next': page + 1 if has_next else None,
+            'results': [result.as_dict() for result in results],
+        })
+
+
+class ForumEventsView(View):
+    """
+    Vista asíncrona con el stream de server-sent events de un foro (ver forum_events.py). El
+    cursor inicial llega en la cabecera Last-Event-ID al reconectar o en ?after=<cursor>.
+    """
+    async def get(self, request, pk):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return HttpResponseForbidden()
+        if not await Forum.objects.filter(pk=pk).aexists():
+            raise Http404('Foro no encontrado.')
+        cursor = request.headers.get('Last-Event-ID') or request.GET.get('after') or None
+        if cursor:
+            try:
+                threads.decode_cursor(cursor)
+            except ValueError as error:
+                return JsonResponse({'error': str(error)}, status=400)
+        if isinstance(request, ASGIRequest):
+            events = forum_events.event_stream(pk, cursor)
+        else:
+            events = await sync_to_async(forum_events.pending_events)(pk, cursor)
+        response = StreamingHttpResponse(events, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # nginx no debe acumular el stream en su búfer.
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
 class PostCreateView(CreateView):
     """
     Vista para crear una publicación en un foro.
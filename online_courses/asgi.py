@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'online_courses.settings')
+# Las vistas de lectura asíncronas solo compensan con un servidor ASGI (ver courses/async_views.py).
+os.environ.setdefault('ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
@@ -48,6 +48,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'courses.middleware.QueryInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -71,14 +72,86 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'courses.context_processors.sidebar',
             ],
         },
     },
 ]
 
 AUTH_USER_MODEL = 'courses.User'
+
+# Instrumentación de SQL (courses/middleware.py y courses/mixins.QueryBudgetMixin)
+SERVER_TIMING_HEADERS = DEBUG
+QUERY_BUDGET_STRICT = False
+
+# Navegación lateral (courses/sidebar.py): elementos por sección y duración en caché
+SIDEBAR_LIMIT = 10
+SIDEBAR_CACHE_TIMEOUT = 60 * 15
+
+# Publicaciones por página en los hilos de los foros (courses/threads.py)
+FORUM_PAGE_SIZE = 30
+
+# Publicaciones en tiempo real (courses/forum_events.py): hub de publicación/suscripción,
+# segundos entre keepalives, duración máxima de un stream y espera de reconexión (ms)
+FORUM_EVENTS_HUB = 'courses.forum_events.InProcessHub'
+FORUM_EVENTS_KEEPALIVE = 15
+FORUM_EVENTS_MAX_AGE = 300
+FORUM_EVENTS_RETRY = 5000
+
+# Vistas de lectura asíncronas (courses/async_views.py). online_courses/asgi.py activa
+# ASYNC_VIEWS=1; con WSGI (runserver, wsgi.py) se usan las vistas síncronas
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', '0') == '1'
+
+# Analítica de los dashboards (courses/analytics.py): ventana de estudiantes activos y días del gráfico
+ANALYTICS_ACTIVE_DAYS = 30
+ANALYTICS_DASHBOARD_DAYS = 30
+
+# Filas leídas por bloque en las exportaciones en streaming (courses/exports.py)
+EXPORT_CHUNK_SIZE = 2000
+
+# Filas por sentencia en las inscripciones masivas y los borrados por lotes (courses/enrollments.py)
+ENROLLMENT_BATCH_SIZE = 500
+
+# Miniaturas de imágenes de curso y fotos de perfil (courses/thumbnails.py): anchos generados,
+# calidad de compresión e hilos del pool que las genera fuera de la petición (con
+# THUMBNAIL_ASYNC = False se generan en el hilo que las pide)
+THUMBNAIL_SIZES = (64, 128, 256, 512)
+THUMBNAIL_QUALITY = 80
+THUMBNAIL_WORKERS = 2
+THUMBNAIL_ASYNC = True
+
+# Descarga protegida de materiales (courses/downloads.py): None envía el archivo desde Django con
+# soporte de Range; 'x-sendfile' o 'x-accel-redirect' delegan el envío en el servidor web. Con
+# nginx, MEDIA_ACCEL_PREFIX debe ser una location interna que apunte a PROTECTED_MEDIA_ROOT:
+#
+#     location /protected-media/ {
+#         internal;
+#         alias /ruta/a/protected_media/;
+#     }
+#
+# Con Apache (mod_xsendfile), XSendFilePath debe permitir PROTECTED_MEDIA_ROOT.
+MEDIA_SENDFILE = None
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+
+# Búsqueda de texto completo (courses/search.py): resultados por página, coincidencias que se
+# ordenan por relevancia, caracteres indexados por PDF e hilos del pool que extrae su texto (con
+# SEARCH_ASYNC = False lo extrae el hilo que guarda el material)
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_CANDIDATES = 5000
+SEARCH_PDF_MAX_CHARS = 500000
+SEARCH_WORKERS = 1
+SEARCH_ASYNC = True
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Archivos de los materiales (courses/storage.py, ProtectedStorage): fuera de MEDIA_ROOT y sin
+# URL, solo se entregan con la vista de descarga. No debe publicarse con el servidor web; los
+# archivos subidos antes a MEDIA_ROOT se trasladan con el comando dedup_media.
+PROTECTED_MEDIA_ROOT = os.path.join(BASE_DIR, 'protected_media')
+
+REST_FRAMEWORK = {
+    'DEFAULT_PAGINATION_CLASS': 'courses.pagination.IdCursorPagination',
+}
 
 WSGI_APPLICATION = 'online_courses.wsgi.application'
 
@@ -94,6 +167,33 @@ DATABASES = {
 }
 
 
+# Cache
+# Por defecto en memoria del proceso. Para compartirla entre varios procesos de un mismo nodo
+# sin Redis: CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache
+# y CACHE_LOCATION=/var/tmp/online_courses_cache
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'online-courses'),
+    }
+}
+
+# Sesiones: cached_db las lee de la caché 'default' y solo escribe en la base de datos cuando
+# cambian. Con varios procesos la caché debe ser compartida (ver CACHE_BACKEND); si no, usar
+# SESSION_ENGINE=django.contrib.sessions.backends.db. Los mensajes flash van en una cookie
+# firmada, de modo que mostrar un mensaje no modifica la sesión, y el progreso de los exámenes
+# se guarda en ExamAttempt (python manage.py trim_sessions limpia las claves antiguas)
+SESSION_ENGINE = os.environ.get('SESSION_ENGINE', 'django.contrib.sessions.backends.cached_db')
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
+# Contenido de exámenes cacheado (courses/exam_cache.py)
+EXAM_CONTENT_CACHE_TIMEOUT = 60 * 60
+
+# Segundos entre las resincronizaciones del temporizador de los exámenes con el servidor (courses/exam_timer.py)
+EXAM_TIMER_HEARTBEAT = 30
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -3,6 +3,7 @@ from django.urls import path, include
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/', include('courses.api_urls')),
     path('courses/', include('courses.urls')),  
     path('', include('courses.urls')),   
 ]